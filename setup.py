@@ -228,6 +228,9 @@ setup(
         'sqlite': [],
         'sqlite3': [],
         'memcache': memcache_require,
+        # Optional cache compression.
+        'lz4': ['lz4'],
+        'zstd': ['zstandard'],
         'test': tests_require,
         'docs': [
             'sphinx',
@@ -182,7 +182,15 @@ class AbstractAdapter(DatabaseHelpersMixin):
 
 
     @metricmethod_sampled
-    def lock_objects_and_detect_conflicts(self, cursor, read_current_oids):
+    def lock_objects_and_detect_conflicts(self, cursor, read_current_oids, min_oid=None):
+        if min_oid is not None and (
+                not self._best_lock_objects_and_detect_conflicts_sets_min_oid
+                or self.force_lock_readCurrent_for_share_blocking
+                or self.force_lock_objects_and_detect_conflicts_interleavable
+        ):
+            self.oidallocator.set_min_oid(cursor, min_oid)
+            min_oid = None
+
         if (
                 self.force_lock_readCurrent_for_share_blocking
                 or self.force_lock_objects_and_detect_conflicts_interleavable
@@ -194,6 +202,9 @@ class AbstractAdapter(DatabaseHelpersMixin):
                                                                     read_current_oids)
         begin = time.time()
         try:
+            if min_oid is not None:
+                return self._best_lock_objects_and_detect_conflicts(cursor, read_current_oids,
+                                                                    min_oid)
             return self._best_lock_objects_and_detect_conflicts(cursor, read_current_oids)
         except self.locker.lock_exceptions:
             # Heuristic to guess. If the stored proc or stored proc runner can do better,
@@ -241,5 +252,13 @@ class AbstractAdapter(DatabaseHelpersMixin):
     #: of conflicts that supports len() and iterating multiple times.
     _best_lock_objects_and_detect_conflicts = _composed_lock_objects_and_detect_conflicts
 
+    #: Set to true by subclasses whose
+    #: :meth:`_best_lock_objects_and_detect_conflicts` accepts an
+    #: optional *min_oid* argument and passes it to the database in
+    #: the same call that takes the locks. Otherwise, a *min_oid* given to
+    #: :meth:`lock_objects_and_detect_conflicts` is sent to the OID
+    #: allocator first.
+    _best_lock_objects_and_detect_conflicts_sets_min_oid = False
+
     def _describe_best_lock_objects_and_detect_conflicts(self):
         return '<unknown>'
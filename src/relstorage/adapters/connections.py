@@ -497,14 +497,21 @@ class ClosedConnectionPool(object):
 
 
 class SingleConnectionPool(object):
-    __slots__ = ('connection',)
+    __slots__ = ('connection', 'guard')
 
-    def __init__(self, connection):
+    def __init__(self, connection, guard=None):
         self.connection = connection
+        # If given, a callable returning a context manager to hold
+        # while the connection is borrowed.
+        self.guard = guard
 
     @contextlib.contextmanager
     def borrowing(self, commit=False): # pylint:disable=unused-argument
         """
         The *commit* parameter is ignored
         """
-        yield self.connection
+        if self.guard is None:
+            yield self.connection
+        else:
+            with self.guard():
+                yield self.connection
@@ -791,6 +791,19 @@ class IObjectMover(Interface):
         Returns None if no later state exists.
         """
 
+    def load_before_with_next(cursor, oid, tid):
+        """
+        Combines :meth:`exists`, :meth:`load_before` and
+        :meth:`get_object_tid_after` into one database round trip.
+
+        Returns ``(state, start_tid, end_tid)``, where *end_tid* is
+        None if no later state exists. Returns ``(None, None, None)``
+        if no earlier state exists, and None if the object does not
+        exist.
+
+        .. versionadded:: 3.4.0
+        """
+
     def current_object_tids(cursor, oids, timeout=None):
         """
         Returns the current ``{oid_int: tid_int}`` for specified object ids.
@@ -935,12 +948,22 @@ class IOIDAllocator(Interface):
     :meth:`store connection <IConnectionManager.open_for_store>`.
     """
 
-    def new_oids(cursor):
+    def new_oids(cursor, range_count=1):
         """
         Return a new :class:`list` of new, unused integer OIDs.
 
-        The list should be contiguous and must be in sorted order from
-        highest to lowest. It must never contain 0.
+        The list must be in sorted order from highest to lowest. It
+        must never contain 0.
+
+        OIDs are reserved from the database in ranges of 16. Asking
+        for a *range_count* larger than one reserves that many ranges
+        in a single call; the result then has that many times as many
+        OIDs, but they need not be contiguous. OIDs that are reserved
+        but never used are simply skipped; there is no need to return
+        them.
+
+        .. versionchanged:: 3.4.0
+           Add the *range_count* parameter.
         """
 
     def set_min_oid(cursor, oid_int):
@@ -1001,6 +1024,17 @@ class IPackUndo(Interface):
         packed_func, if provided, will be called for every object state
         packed, just after the object is removed. The function must
         accept two parameters, oid and tid (64 bit integers).
+
+        If a previous pack was interrupted after pre_pack finished,
+        this continues where it left off.
+        """
+
+    def get_pack_progress():
+        """
+        Return ``(pack_tid, deleted_zoid)`` if pre_pack has finished
+        but the pack that follows it hasn't, otherwise None.
+
+        .. versionadded:: 3.4.0
         """
 
     def deleteObject(cursor, oid_int, tid_int):
@@ -1096,6 +1130,16 @@ class ISchemaInstaller(Interface):
     def drop_all():
         """Drop all tables and sequences."""
 
+    def has_table(table_name):
+        """
+        Return whether the table *table_name* exists.
+
+        Tables added in newer versions don't exist until the schema is
+        prepared again.
+
+        .. versionadded:: 3.4.0
+        """
+
 
 class IScriptRunner(Interface):
     """Run database-agnostic SQL scripts.
@@ -1360,6 +1404,7 @@ class IRelStorageAdapter(Interface):
     def lock_objects_and_detect_conflicts(
             cursor,
             read_current_oids,
+            min_oid=None,
     ):
         """
         Without taking the commit lock, lock the objects this
@@ -1460,6 +1505,14 @@ class IRelStorageAdapter(Interface):
         allowed to be ``None`` if there isn't an efficient way to
         query that in bulk from the database.
 
+        .. rubric:: Minimum OID
+
+        If *min_oid* is given, this transaction stored an OID that
+        this process has never allocated, and the database must be
+        told not to allocate it (see
+        :meth:`IOIDAllocator.set_min_oid`). Implementations may do
+        that in the same call that takes the locks.
+
         .. rubric:: Deadlocks, and Shared vs Exclusive Locks
 
         It might seem that, because no method of a transaction
@@ -200,6 +200,63 @@ class AbstractObjectMover(DatabaseHelpersMixin, ABC):
         if row:
             return row[0]
 
+    # Combines ``exists``, ``load_before`` and ``get_object_tid_after``.
+    # The driving table produces no rows if the object doesn't exist;
+    # the outer join produces NULLs if there's no earlier revision.
+    # Both queries take the parameters ``(tid, oid)``.
+    _load_before_with_next_queries = (
+        """
+        SELECT prior.state, prior.tid, (
+            SELECT MIN(later.tid)
+            FROM object_state later
+            WHERE later.zoid = cur.zoid
+            AND later.tid > prior.tid
+        )
+        FROM current_object cur
+        LEFT JOIN object_state prior
+            ON prior.zoid = cur.zoid
+            AND prior.tid = (
+                SELECT MAX(earlier.tid)
+                FROM object_state earlier
+                WHERE earlier.zoid = cur.zoid
+                AND earlier.tid < %s
+            )
+        WHERE cur.zoid = %s
+        """,
+        # History free: there's only ever one revision, and nothing after it.
+        """
+        SELECT prior.state, prior.tid, NULL
+        FROM object_state cur
+        LEFT JOIN object_state prior
+            ON prior.zoid = cur.zoid
+            AND prior.tid < %s
+        WHERE cur.zoid = %s
+        """
+    )
+
+    _load_before_with_next_query = _query_property('_load_before_with_next')
+
+    @metricmethod_sampled
+    def load_before_with_next(self, cursor, oid, tid):
+        """
+        Returns the state and tid of an object before transaction tid,
+        and the tid of the next change after that, in one query.
+
+        Returns ``(state, start_tid, end_tid)``, where *end_tid* is None
+        if no later state exists. Returns ``(None, None, None)`` if no
+        earlier state exists, and None if the object does not exist.
+        """
+        cursor.execute(self._load_before_with_next_query, (tid, oid))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        state, start_tid, end_tid = row
+        if start_tid is None:
+            return None, None, None
+        # None in state means The object's creation has been undone
+        state = self.driver.binary_column_as_state_type(state)
+        return state, start_tid, end_tid
+
     _current_object_tids_queries = (
         (('zoid', 'tid'), 'current_object', 'zoid'),
         (('zoid', 'tid'), 'object_state', 'zoid'),
@@ -259,6 +316,19 @@ class AbstractObjectMover(DatabaseHelpersMixin, ABC):
         it.c.state
     )
 
+    #: Set to true by subclasses whose ``store_temps`` can send buffers
+    #: (such as :class:`memoryview`) to the database as well as bytes.
+    #: The states can then be handed over without copying them out of
+    #: the temporary storage first.
+    store_temps_accepts_buffers = False
+
+    def _temp_states(self, state_oid_tid_iter):
+        if self.store_temps_accepts_buffers:
+            buffers = getattr(state_oid_tid_iter, 'buffers', None)
+            if buffers is not None:
+                return buffers()
+        return state_oid_tid_iter
+
     @metricmethod_sampled
     def store_temps(self, cursor, state_oid_tid_iter):
         """
@@ -291,7 +361,9 @@ class AbstractObjectMover(DatabaseHelpersMixin, ABC):
               PyMySQL as well, but it must be a simple INSERT
               statement matching a regular expression. Note that it
               has a bug though: it can't handle an iterator that's
-              empty.
+              empty. It also limits statements to 64KB, so we use our
+              own RowBatcher, with batches sized by the server's
+              ``max_allowed_packet``.
         """
         query = self._store_temp_query
         do_md5 = self._compute_md5sum
@@ -302,7 +374,7 @@ class AbstractObjectMover(DatabaseHelpersMixin, ABC):
             (
                 (oid_int, tid_int, do_md5(data), Binary(data))
                 for (data, oid_int, tid_int)
-                in state_oid_tid_iter
+                in self._temp_states(state_oid_tid_iter)
             )
         )
 
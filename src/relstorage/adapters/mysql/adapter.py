@@ -289,7 +289,9 @@ class MySQLAdapter(AbstractAdapter):
 
     DEFAULT_LOCK_OBJECTS_AND_DETECT_CONFLICTS_INTERLEAVABLE = False
 
-    def _best_lock_objects_and_detect_conflicts(self, cursor, read_current_oids):
+    _best_lock_objects_and_detect_conflicts_sets_min_oid = True
+
+    def _best_lock_objects_and_detect_conflicts(self, cursor, read_current_oids, min_oid=None):
         read_current_param = None
         if read_current_oids:
             # In MySQL 8, we could pass in a JSON array and use JSON_TABLE
@@ -314,12 +316,19 @@ class MySQLAdapter(AbstractAdapter):
             # doesn't matter.
             read_current_param = json.dumps(list(read_current_oids.items()))
 
-        proc = 'lock_objects_and_detect_conflicts(%s, %s)'
+        # If this transaction stored OIDs we haven't allocated, the
+        # procedure reserves them too (see ``set_min_oid``) to save a
+        # round trip.
+        min_oid_range = None
+        if min_oid is not None:
+            min_oid_range = self.oidallocator.oid_range_for(min_oid)
+
+        proc = 'lock_objects_and_detect_conflicts(%s, %s, %s)'
         try:
             multi_results = self.driver.callproc_multi_result(
                 cursor,
                 proc,
-                (read_current_param, 0)
+                (read_current_param, min_oid_range, 0)
             )
         except self.locker.lock_exceptions as e:
             # On MySQL 5.7, the time-based mechanism to determine that
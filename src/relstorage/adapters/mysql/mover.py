@@ -22,7 +22,41 @@ from relstorage.adapters.interfaces import IObjectMover
 
 from ..schema import Schema
 from ..mover import AbstractObjectMover
+from ..mover import RowBatcherStoreTemps
 from ..mover import metricmethod_sampled
+from ..batch import RowBatcher
+
+
+class MySQLRowBatcher(RowBatcher):
+    """
+    A row batcher whose statements can be as large as the
+    ``max_allowed_packet`` of the cursor's connection allows, up to
+    ``bulk_size_limit``.
+    """
+
+    #: The most data to send in one statement.
+    bulk_size_limit = 16 * 1024 * 1024
+
+    def __init__(self, cursor, row_limit=None, **kwargs):
+        super(MySQLRowBatcher, self).__init__(cursor, row_limit, **kwargs)
+        # Found when the store connection is opened.
+        max_allowed_packet = getattr(getattr(cursor, 'connection', None),
+                                     '_rs_max_allowed_packet', None)
+        if max_allowed_packet:
+            # Escaping binary data can double its size.
+            self.size_limit = max(
+                RowBatcher.size_limit,
+                min(self.bulk_size_limit, max_allowed_packet // 4)
+            )
+
+
+class MySQLRowBatcherStoreTemps(RowBatcherStoreTemps):
+    generic_suffix = """
+    ON DUPLICATE KEY UPDATE
+        prev_tid = VALUES(prev_tid),
+        md5 = VALUES(md5),
+        state = VALUES(state)
+    """
 
 
 @implementer(IObjectMover)
@@ -30,6 +64,28 @@ class MySQLObjectMover(AbstractObjectMover):
 
     _create_temp_store = Schema.temp_store.create()
 
+    #: How many rows to send in one ``INSERT`` when storing temporary
+    #: objects.
+    bulk_row_limit = 8192
+
+    def __init__(self, database_driver, options, runner=None,
+                 version_detector=None,
+                 batcher_factory=MySQLRowBatcher):
+        super(MySQLObjectMover, self).__init__(database_driver, options, runner,
+                                               version_detector, batcher_factory)
+        # The drivers' ``executemany`` for an INSERT does combine rows,
+        # but never into statements bigger than 64KB (mysqlclient),
+        # so larger objects each take a round trip. Instead, we
+        # combine rows into statements as big as the server allows.
+        batcher = MySQLRowBatcherStoreTemps(self.keep_history,
+                                            self.driver.Binary,
+                                            self._make_bulk_batcher)
+        self.store_temps = batcher.store_temps
+        self.replace_temps = batcher.replace_temps
+
+    def _make_bulk_batcher(self, cursor):
+        return self.make_batcher(cursor, self.bulk_row_limit)
+
     @metricmethod_sampled
     def on_store_opened(self, cursor, restart=False):
         """Create the temporary table for storing objects"""
@@ -88,6 +144,11 @@ class MySQLObjectMover(AbstractObjectMover):
             """
             cursor.execute(stmt)
 
+            # Each connection may have its own value, so keep it there for
+            # MySQLRowBatcher.
+            cursor.execute('SELECT @@max_allowed_packet')
+            cursor.connection._rs_max_allowed_packet = cursor.fetchone()[0]
+
         AbstractObjectMover.on_store_opened(self, cursor, restart=restart)
 
     @metricmethod_sampled
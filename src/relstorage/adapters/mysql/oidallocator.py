@@ -112,3 +112,12 @@ class MySQLOIDAllocator(AbstractTableOIDAllocator):
 
     def _timeout(self, cursor, batch_timeout):
         return lock_timeout(cursor, batch_timeout)
+
+    def _auto_increment_step(self, cursor):
+        # Galera and multi-source replication set
+        # auto_increment_increment so that each server generates
+        # different values; the ones in between belong to the other
+        # servers, and may be given to other processes. The session
+        # value is the one our INSERT just used.
+        cursor.execute('SELECT @@auto_increment_increment')
+        return cursor.fetchone()[0]
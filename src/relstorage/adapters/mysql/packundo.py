@@ -25,6 +25,48 @@ class _LockStmt(object):
     # this.
     _lock_for_share = 'LOCK IN SHARE MODE'
 
+
+class _TraverseGraphStmt(object):
+    # Recursive common table expressions are new in 8.0. By default
+    # they stop after 1000 levels, which isn't nearly enough. MySQL
+    # also doesn't let an UPDATE read the table it's updating in a
+    # subquery, so collect the reachable objects in a temporary table
+    # first.
+    _traverse_graph_in_database_script = """
+    SET SESSION cte_max_recursion_depth = 4294967295;
+
+    DROP TEMPORARY TABLE IF EXISTS temp_pack_reachable;
+
+    CREATE TEMPORARY TABLE temp_pack_reachable (
+        zoid BIGINT UNSIGNED NOT NULL PRIMARY KEY
+    );
+
+    INSERT INTO temp_pack_reachable (zoid)
+    WITH RECURSIVE reachable (zoid) AS (
+        SELECT zoid
+        FROM pack_object
+        WHERE keep = TRUE
+      UNION
+        SELECT object_ref.to_zoid
+        FROM object_ref
+            INNER JOIN reachable ON (object_ref.zoid = reachable.zoid)
+            INNER JOIN pack_object ON (object_ref.zoid = pack_object.zoid)
+        WHERE object_ref.tid >= pack_object.keep_tid
+    )
+    SELECT zoid
+    FROM reachable;
+
+    UPDATE pack_object
+        INNER JOIN temp_pack_reachable USING (zoid)
+    SET keep = TRUE, visited = TRUE;
+
+    DROP TEMPORARY TABLE temp_pack_reachable;
+    """
+
+    def _can_traverse_graph_in_database(self, cursor):
+        return self.locker.version_detector.get_major_version(cursor) >= 8
+
+
 class MySQLHistoryPreservingPackUndo(_LockStmt, HistoryPreservingPackUndo):
 
     # Previously we needed to work around a MySQL performance bug by
@@ -112,5 +154,5 @@ class MySQLHistoryPreservingPackUndo(_LockStmt, HistoryPreservingPackUndo):
     ).limit(1000)
 
 
-class MySQLHistoryFreePackUndo(_LockStmt, HistoryFreePackUndo):
+class MySQLHistoryFreePackUndo(_LockStmt, _TraverseGraphStmt, HistoryFreePackUndo):
     pass
@@ -1,5 +1,6 @@
 CREATE PROCEDURE lock_objects_and_detect_conflicts(
   read_current_oids_tids JSON,
+  min_oid_range BIGINT,
   constant INT -- A version check to prevent older versions from running
 )
   COMMENT '{CHECKSUM}'
@@ -123,6 +124,15 @@ label_proc:BEGIN
 
   END IF;
 
+  IF min_oid_range IS NOT NULL THEN
+    -- The transaction stored OIDs newer than any the client has
+    -- allocated; make sure they never get allocated. Doing that here
+    -- instead of in a separate call saves a round trip during vote.
+    -- We wait until any readCurrent conflicts have been found, because
+    -- we roll back when there are some.
+    CALL set_min_oid(min_oid_range);
+  END IF;
+
   DELETE FROM temp_locked_zoid;
 
   INSERT INTO temp_locked_zoid
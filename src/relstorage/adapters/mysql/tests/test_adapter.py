@@ -69,3 +69,23 @@ class TestAdapter(test_adapter.AdapterTestBase):
 
     def test_lock_database_and_move_keeps_critical_section_wo_commit(self):
         self._test_lock_database_and_move_ends_critical_section_on_commit(False)
+
+    def _test_lock_objects_and_detect_conflicts(self, min_oid, expected_range):
+        adapter = self._makeOne(None)
+        driver = adapter.driver = MockDriver()
+        driver.last_callproc_multi_result = [[(1, 2, 3, None)], ()]
+
+        conflicts = adapter.lock_objects_and_detect_conflicts(None, {}, min_oid)
+
+        self.assertEqual(conflicts, [(1, 2, 3, None)])
+        self.assertEqual(
+            driver.last_callproc_args,
+            ('lock_objects_and_detect_conflicts(%s, %s, %s)', (None, expected_range, 0))
+        )
+
+    def test_lock_objects_and_detect_conflicts(self):
+        self._test_lock_objects_and_detect_conflicts(None, None)
+
+    def test_lock_objects_and_detect_conflicts_sets_min_oid(self):
+        # One round trip reserves the OIDs too.
+        self._test_lock_objects_and_detect_conflicts(33, 3)
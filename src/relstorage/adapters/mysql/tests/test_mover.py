@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from relstorage.tests import TestCase
+from relstorage.tests import MockOptions
+from relstorage.tests import MockDriver
+from relstorage.tests import MockCursor
+from relstorage.tests import MockConnection
+
+from ..mover import MySQLObjectMover
+
+
+class TestMySQLObjectMover(TestCase):
+
+    def _makeOne(self, keep_history=False):
+        options = MockOptions.from_args(keep_history=keep_history)
+        return MySQLObjectMover(MockDriver(), options)
+
+    def test_batcher_size_follows_max_allowed_packet(self):
+        from ..mover import MySQLRowBatcher
+        mover = self._makeOne()
+        conn = MockConnection()
+        cursor = MockCursor(conn)
+        # Until we know, the default...
+        self.assertIsInstance(mover.make_batcher(cursor), MySQLRowBatcher)
+        self.assertEqual(mover.make_batcher(cursor).size_limit, 2 * 1024 * 1024)
+        self.assertEqual(mover.make_batcher(MockCursor()).size_limit, 2 * 1024 * 1024)
+        # ...and never smaller than it...
+        conn._rs_max_allowed_packet = 4 * 1024 * 1024
+        self.assertEqual(mover.make_batcher(cursor).size_limit, 2 * 1024 * 1024)
+        # ...bigger when the server allows it...
+        conn._rs_max_allowed_packet = 32 * 1024 * 1024
+        self.assertEqual(mover.make_batcher(cursor).size_limit, 8 * 1024 * 1024)
+        # ...up to a point.
+        conn._rs_max_allowed_packet = 1024 * 1024 * 1024
+        self.assertEqual(mover.make_batcher(cursor).size_limit,
+                         MySQLRowBatcher.bulk_size_limit)
+
+        self.assertEqual(mover.make_batcher(cursor, 100).row_limit, 100)
+        # Another connection has its own value.
+        self.assertEqual(mover.make_batcher(MockCursor(MockConnection())).size_limit,
+                         2 * 1024 * 1024)
+
+    def test_store_temps_one_statement(self):
+        mover = self._makeOne()
+        cursor = MockCursor()
+        # Bigger than the drivers would put in one executemany statement.
+        data = b'x' * 100000
+        mover.store_temps(cursor, [(data, 1, 0), (data, 2, 5), (b'abc', 3, 0)])
+
+        self.assertEqual(len(cursor.executed), 1)
+        stmt, params = cursor.executed[0]
+        self.assertTrue(stmt.startswith('INSERT INTO temp_store'), stmt)
+        self.assertIn('ON DUPLICATE KEY UPDATE', stmt)
+        self.assertEqual(params, (
+            1, 0, None, data,
+            2, 5, None, data,
+            3, 0, None, b'abc',
+        ))
+
+    def test_store_temps_splits_on_size(self):
+        mover = self._makeOne()
+        cursor = MockCursor()
+        data = b'x' * (1024 * 1024)
+        mover.store_temps(cursor, [(data, oid, 0) for oid in range(1, 6)])
+        # Each pair of rows reaches the default 2MB limit.
+        self.assertEqual(len(cursor.executed), 3)
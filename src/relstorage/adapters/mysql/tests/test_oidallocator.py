@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for oidallocator.py
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from relstorage.tests import TestCase
+from relstorage.tests import MockCursor
+from relstorage.tests import MockDriver
+
+
+class TestMySQLOIDAllocator(TestCase):
+
+    def _makeOne(self):
+        from ..oidallocator import MySQLOIDAllocator
+        return MySQLOIDAllocator(MockDriver())
+
+    def _new_oids(self, range_count, lastrowid, auto_increment_increment):
+        inst = self._makeOne()
+        cursor = MockCursor()
+        cursor.lastrowid = lastrowid
+        cursor.results = [(auto_increment_increment,)]
+        return inst.new_oids(cursor, range_count), cursor
+
+    def test_new_oids_consecutive(self):
+        oids, cursor = self._new_oids(3, 2, 1)
+        self.assertEqual(oids, list(range(64, 16, -1)))
+        self.assertEqual(cursor.executed[0][0],
+                         'INSERT INTO new_oid VALUES (), (), ()')
+
+    def test_new_oids_auto_increment_increment(self):
+        # With Galera, the rows get 2, 5 and 8; the values in between
+        # belong to other servers.
+        oids, _ = self._new_oids(3, 2, 3)
+        self.assertEqual(
+            oids,
+            list(range(128, 112, -1)) + list(range(80, 64, -1)) + list(range(32, 16, -1)))
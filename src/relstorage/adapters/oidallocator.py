@@ -51,7 +51,7 @@ class AbstractOIDAllocator(ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def new_oids(self, cursor):
+    def new_oids(self, cursor, range_count=1):
         raise NotImplementedError
 
 # All of these allocators allocate 16 OIDs at a time. In the sequence
@@ -87,10 +87,13 @@ class AbstractRangedOIDAllocator(AbstractOIDAllocator):
     __slots__ = ()
 
     def set_min_oid(self, cursor, oid_int):
+        self._set_min_oid_from_range(cursor, self.oid_range_for(oid_int))
+
+    @staticmethod
+    def oid_range_for(oid_int):
         # This takes a user-space OID and turns it into the internal
         # range number.
-        n = (oid_int + 15) // 16
-        self._set_min_oid_from_range(cursor, n)
+        return (oid_int + 15) // 16
 
     @abc.abstractmethod
     def _set_min_oid_from_range(self, cursor, n):
@@ -102,6 +105,19 @@ class AbstractRangedOIDAllocator(AbstractOIDAllocator):
     else:
         _oid_range_around = staticmethod(_oid_range_around_iterable)
 
+    @classmethod
+    def _oid_ranges_around(cls, ns):
+        """
+        Like ``_oid_range_around``, but for each of the range numbers in
+        the sequence *ns*. The result is still sorted largest to smallest.
+        """
+        if len(ns) == 1:
+            return cls._oid_range_around(ns[0])
+        result = []
+        for n in sorted(ns, reverse=True):
+            result.extend(_oid_range_around_assume_list(n))
+        return result
+
 
 class AbstractTableOIDAllocator(AbstractRangedOIDAllocator):
     """
@@ -140,17 +156,39 @@ class AbstractTableOIDAllocator(AbstractRangedOIDAllocator):
     _insert_stmt = Schema.new_oid.insert()
 
     @metricmethod
-    def new_oids(self, cursor):
+    def new_oids(self, cursor, range_count=1):
         """Return a sequence of new, unused OIDs."""
-        self._insert_stmt.execute(cursor)
+        if range_count == 1:
+            self._insert_stmt.execute(cursor)
+        else:
+            # A multi-row INSERT with a known number of rows is a
+            # "simple insert," and (unless the same statement also
+            # supplies some values itself) always gets evenly spaced
+            # values, whatever the auto-increment lock mode.
+            cursor.execute('INSERT INTO new_oid VALUES ' + ', '.join(['()'] * range_count))
 
         # This is a DB-API extension. Fortunately, all
-        # supported drivers implement it.
-        n = cursor.lastrowid
-
-        if self.garbage_collect_interval and n % self.garbage_collect_interval == 0:
+        # supported drivers implement it. For a multi-row INSERT,
+        # it's the value of the first row.
+        first_n = cursor.lastrowid
+        if range_count == 1:
+            ns = range(first_n, first_n + 1)
+        else:
+            step = self._auto_increment_step(cursor)
+            ns = range(first_n, first_n + range_count * step, step)
+        n = ns[-1]
+
+        interval = self.garbage_collect_interval
+        if interval and n // interval != (first_n - 1) // interval:
             self.garbage_collect_oids(cursor, n)
-        return self._oid_range_around(n)
+        return self._oid_ranges_around(ns)
+
+    def _auto_increment_step(self, cursor): # pylint:disable=unused-argument
+        """
+        Return how far apart the values generated for the rows of one
+        multi-row ``INSERT`` are.
+        """
+        return 1
 
     @contextmanager
     def _timeout(self, cursor, batch_timeout):
@@ -94,6 +94,54 @@ class OracleObjectMover(OracleRowBatcherStoreTemps,
             assert len(rows) == 1
             return rows[0][0]
 
+    # Oracle doesn't allow outer joining to a scalar subquery
+    # (ORA-01799), so find the earlier tid in a derived table.
+    _load_before_with_next_queries = (
+        """
+        SELECT prior.state, prior.tid, (
+            SELECT MIN(later.tid)
+            FROM object_state later
+            WHERE later.zoid = cur.zoid
+            AND later.tid > prior.tid
+        )
+        FROM current_object cur
+        LEFT JOIN (
+            SELECT zoid, MAX(tid) AS tid
+            FROM object_state
+            WHERE zoid = :oid
+            AND tid < :tid
+            GROUP BY zoid
+        ) earlier ON earlier.zoid = cur.zoid
+        LEFT JOIN object_state prior
+            ON prior.zoid = earlier.zoid
+            AND prior.tid = earlier.tid
+        WHERE cur.zoid = :oid
+        """,
+        """
+        SELECT prior.state, prior.tid, NULL
+        FROM object_state cur
+        LEFT JOIN object_state prior
+            ON prior.zoid = cur.zoid
+            AND prior.tid < :tid
+        WHERE cur.zoid = :oid
+        """
+    )
+
+    @metricmethod_sampled
+    def load_before_with_next(self, cursor, oid, tid):
+        """
+        Returns ``(state, start_tid, end_tid)``; see
+        :meth:`.IObjectMover.load_before_with_next`.
+        """
+        cursor.execute(self._load_before_with_next_query, {'oid': oid, 'tid': tid})
+        row = cursor.fetchone()
+        if not row:
+            return None
+        state, start_tid, end_tid = row
+        if start_tid is None:
+            return None, None, None
+        return self.driver.binary_column_as_state_type(state), start_tid, end_tid
+
     # no store connection initialization needed for Oracle
     def on_store_opened(self, cursor, restart=False):
         pass
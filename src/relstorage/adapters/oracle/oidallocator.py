@@ -55,12 +55,17 @@ class OracleOIDAllocator(AbstractRangedOIDAllocator):
                 self.connmanager.close(conn2, cursor2)
 
     @metricmethod
-    def new_oids(self, cursor):
+    def new_oids(self, cursor, range_count=1):
         """Return a sequence of new, unused OIDs."""
-        stmt = "SELECT zoid_seq.nextval FROM DUAL"
-        cursor.execute(stmt)
-        n = cursor.fetchone()[0]
-        return self._oid_range_around(n)
+        if range_count == 1:
+            stmt = "SELECT zoid_seq.nextval FROM DUAL"
+            cursor.execute(stmt)
+            n = cursor.fetchone()[0]
+            return self._oid_range_around(n)
+
+        stmt = "SELECT zoid_seq.nextval FROM DUAL CONNECT BY LEVEL <= :1"
+        cursor.execute(stmt, (range_count,))
+        return self._oid_ranges_around([row[0] for row in cursor.fetchall()])
 
     def reset_oid(self, cursor):
         raise NotImplementedError
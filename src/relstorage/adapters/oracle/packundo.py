@@ -91,6 +91,9 @@ class OracleHistoryFreePackUndo(HistoryFreePackUndo):
 
     _fetchmany = _oracle_fetchmany
     _traverse_graph_optimizer_hint = _oracle_traverse_graph_optimizer_hint
+    # Oracle's recursive WITH only allows UNION ALL, which won't stop
+    # at cycles.
+    _traverse_graph_in_database_script = None
 
 
 def _check_limit(c):
@@ -60,6 +60,8 @@ class OracleScriptRunner(ScriptRunner):
         'self_tid':     ':self_tid',
         'min_tid':      ':min_tid',
         'max_tid':      ':max_tid',
+        'min_oid':      ':min_oid',
+        'max_oid':      ':max_oid',
         # Oracle won't accept ORDER BY clauses inside
         # the subquery of an IN
         'INNER_ORDER_BY': ''
@@ -17,7 +17,9 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import division
 
+import collections
 import logging
+import multiprocessing
 from contextlib import contextmanager
 
 from ZODB.POSException import UndoError
@@ -32,7 +34,7 @@ from .._util import get_memory_usage
 from .._util import get_duration_from_environ
 from .._util import get_positive_integer_from_environ
 
-from ..treemark import TreeMarker
+from ..treemark import CSRMarker
 
 from .schema import Schema
 from .connections import LoadConnection
@@ -76,6 +78,10 @@ class PackUndo(DatabaseHelpersMixin):
     # This is a variable here for testing.
     fill_object_refs_commit_frequency = get_duration_from_environ('RS_PACK_COMMIT_FREQUENCY', 120)
 
+    # How often, in seconds, to check that the processes finding
+    # references are still alive while waiting for one.
+    reference_process_check_frequency = 1
+
     # How many object states to find references in at any one time.
     # This is a control on the amount of memory used by the Python
     # process during packing, especially if the database driver
@@ -83,6 +89,11 @@ class PackUndo(DatabaseHelpersMixin):
     fill_object_refs_batch_size = get_positive_integer_from_environ('RS_PACK_DOWNLOAD_BATCH_SIZE',
                                                                     1024)
 
+    # Whether to use the pack_progress table. It doesn't exist in
+    # databases whose schema hasn't been prepared since it was added;
+    # the pack sets this before starting.
+    track_pack_progress = True
+
     def __init__(self, database_driver, connmanager, runner, locker, options):
         self.driver = database_driver
         self.connmanager = connmanager
@@ -127,6 +138,63 @@ class PackUndo(DatabaseHelpersMixin):
         finally:
             self.connmanager.close(conn, cursor)
 
+    def get_pack_progress(self):
+        """
+        Return ``(pack_tid, deleted_zoid)`` if a pre-pack finished but
+        the pack that follows it hasn't; otherwise return None.
+
+        Garbage with OIDs up to and including ``deleted_zoid`` has
+        already been deleted (history-free only).
+        """
+        conn, cursor = self.connmanager.open_for_pre_pack()
+        try:
+            return self._read_pack_progress(cursor)
+        finally:
+            self.connmanager.close(conn, cursor)
+
+    def _read_pack_progress(self, cursor):
+        if not self.track_pack_progress:
+            return None
+        stmt = """
+        SELECT pack_tid, deleted_zoid
+        FROM pack_progress
+        """
+        self.runner.run_script_stmt(cursor, stmt)
+        rows = cursor.fetchall()
+        return tuple(rows[0]) if rows else None
+
+    def _clear_pack_progress(self, cursor):
+        if self.track_pack_progress:
+            self.runner.run_script_stmt(cursor, 'DELETE FROM pack_progress')
+
+    def _record_pre_pack_finished(self, cursor, pack_tid):
+        """
+        Note that pre-packing to *pack_tid* is finished, and nothing
+        has been deleted yet. The caller commits.
+        """
+        if not self.track_pack_progress:
+            return
+        self._clear_pack_progress(cursor)
+        stmt = """
+        INSERT INTO pack_progress (pack_tid, deleted_zoid)
+        VALUES (%(pack_tid)s, 0)
+        """
+        self.runner.run_script_stmt(cursor, stmt, {'pack_tid': pack_tid})
+
+    def _record_deleted_zoid(self, cursor, oid):
+        """
+        Note that all the garbage with OIDs up to and including *oid*
+        has been deleted. This must be committed in the same
+        transaction as the deletions.
+        """
+        if not self.track_pack_progress:
+            return
+        stmt = """
+        UPDATE pack_progress
+        SET deleted_zoid = %(oid)s
+        """
+        self.runner.run_script_stmt(cursor, stmt, {'oid': oid})
+
     @contextmanager
     def _make_ss_load_cursor(self, load_connection):
         # server_side_cursor() is a generator function. If we just call it and don't
@@ -169,6 +237,52 @@ class PackUndo(DatabaseHelpersMixin):
     # PostgreSQL doesn't have hints, so this is a no-op there.
     _traverse_graph_optimizer_hint = ''
 
+    # A script that does everything that _traverse_graph does without
+    # leaving the database, when ``pack_traverse_in_database`` is set.
+    # The objects already kept are the roots; the recursive part
+    # follows the same references that _traverse_graph downloads.
+    # ``UNION`` discards the objects already found, so cycles end.
+    #
+    # Subclasses for databases that can't do this set it to None.
+    _traverse_graph_in_database_script = """
+    WITH RECURSIVE reachable (zoid) AS (
+        SELECT zoid
+        FROM pack_object
+        WHERE keep = %(TRUE)s
+      UNION
+        SELECT object_ref.to_zoid
+        FROM object_ref
+            INNER JOIN reachable ON (object_ref.zoid = reachable.zoid)
+            INNER JOIN pack_object ON (object_ref.zoid = pack_object.zoid)
+        WHERE object_ref.tid >= pack_object.keep_tid
+    )
+    UPDATE pack_object
+    SET keep = %(TRUE)s, visited = %(TRUE)s
+    WHERE zoid IN (
+        SELECT zoid
+        FROM reachable
+    );
+    """
+
+    def _can_traverse_graph_in_database(self, cursor): # pylint:disable=unused-argument
+        return bool(self._traverse_graph_in_database_script)
+
+    def _traverse_graph_in_database(self, store_connection):
+        logger.info("pre_pack: traversing the object graph in the database "
+                    "to find reachable objects.")
+        cursor = store_connection.cursor
+        self.runner.run_script(cursor, self._traverse_graph_in_database_script)
+        store_connection.commit()
+
+        self.runner.run_script_stmt(cursor, """
+        SELECT COUNT(*)
+        FROM pack_object
+        WHERE keep = %(TRUE)s
+        """)
+        logger.info(
+            "pre_pack: marked objects reachable: %d",
+            cursor.fetchone()[0])
+
     def _traverse_graph(self, load_connection, store_connection):
         """
         Visit the entire object graph to find out what should be
@@ -176,12 +290,24 @@ class PackUndo(DatabaseHelpersMixin):
 
         Sets the pack_object.keep flags.
 
+        If the ``pack_traverse_in_database`` option is set, and the
+        database supports it, this happens entirely in the database.
+        Otherwise, the references are downloaded and followed here.
+
         Must not read from the ``object_state`` table or any other table that
         could be inconsistent with the original snapshot view of references
         established by :meth:`pre_pack`.
 
         *cursor* is a writable store connection cursor.
         """
+        if self.options.pack_traverse_in_database:
+            if self._can_traverse_graph_in_database(store_connection.cursor):
+                self._traverse_graph_in_database(store_connection)
+                return
+            logger.info(
+                "pre_pack: this database can't traverse the object graph itself; "
+                "ignoring pack-traverse-in-database.")
+
         logger.info("pre_pack: downloading pack_object and object_ref.")
         # Ensure we're up-to-date and can view the data in pack_object.
         # Note that we don't just use restart() here: if we haven't actually
@@ -191,9 +317,10 @@ class PackUndo(DatabaseHelpersMixin):
         #   OperationalError: 1412, 'Table definition has changed, please retry transaction'
         load_connection.rollback_quietly()
 
-        marker = TreeMarker()
+        marker = CSRMarker()
 
-        # Download the graph of object references into the TreeMarker.
+        # Download the graph of object references into the marker.
+        # They arrive ordered by zoid, which is what the marker expects.
         # TODO: We can probably do much or most of this in SQL, at least
         # in recent databases that support recursive WITH queries?
 
@@ -221,7 +348,7 @@ class PackUndo(DatabaseHelpersMixin):
                     break
                 marker.add_refs(rows)
 
-        # Use the TreeMarker to find all reachable objects, starting
+        # Use the marker to find all reachable objects, starting
         # with the ones that are known reachable. These are the roots:
         #
         # - ZOID 0 which is explicitly marked as such
@@ -237,7 +364,7 @@ class PackUndo(DatabaseHelpersMixin):
         #
         # - In history free *with* gc, this is all objects that have
         #   been modified after the pack time.
-        # XXX: It seems like a lot of what TreeMarker does could actually
+        # XXX: It seems like a lot of what the marker does could actually
         # be done in the database, especially if we have support for
         # recursive common table expressions; if we don't, we can still do more of it
         # in the DB, it will just take more queries and some temp tables.
@@ -256,7 +383,7 @@ class PackUndo(DatabaseHelpersMixin):
 
         marker.free_refs()
 
-        # Upload the TreeMarker results to the database.
+        # Upload the marker results to the database.
         # TODO: It probably makes more sense to mark *unreachable* objects?
         # There should generally be fewer of them than reachable objects
         # if the database is regularly GC'd.
@@ -370,6 +497,11 @@ class HistoryPreservingPackUndo(PackUndo):
 
     keep_history = True
 
+    # Here, object_ref's primary key is (tid, zoid, to_zoid), and
+    # there's no other index on zoid, so each level of the recursive
+    # query would scan the whole table.
+    _traverse_graph_in_database_script = None
+
     _choose_pack_transaction_query = Schema.transaction.select(
         it.c.tid
     ).where(
@@ -746,6 +878,9 @@ class HistoryPreservingPackUndo(PackUndo):
             # ``pack_object`` should be populated,
             # essentially with the distinct list of all objects and their
             # maximum (newest) transaction ids.
+            #
+            # Any previous pack can no longer be resumed.
+            self._clear_pack_progress(store_connection.cursor)
             if self.options.pack_gc:
                 logger.info("pre_pack: start with gc enabled")
                 self._pre_pack_with_gc(
@@ -828,6 +963,7 @@ class HistoryPreservingPackUndo(PackUndo):
             logger.info("pre_pack: will remove %d object state(s)",
                         to_remove)
 
+            self._record_pre_pack_finished(cursor, pack_tid)
             logger.info("pre_pack: finished successfully")
             store_connection.commit()
         except:
@@ -1147,6 +1283,7 @@ class HistoryPreservingPackUndo(PackUndo):
         for _table in ('pack_object', 'pack_state', 'pack_state_tid'):
             stmt = '%(TRUNCATE)s ' + _table
             self.runner.run_script_stmt(store_connection.cursor, stmt)
+        self._clear_pack_progress(store_connection.cursor)
         store_connection.commit()
 
 
@@ -1290,40 +1427,11 @@ class HistoryFreePackUndo(PackUndo):
         logger.info(
             "pre_pack: analyzing references from %d object(s) (memory delta: %s)",
             oid_count, byte_display(get_memory_usage() - mem_begin))
-        while oids_done < oid_count:
-            # Previously, we iterated like this:
-            #
-            # while oids:
-            #    batch = oids[:batch_size]
-            #    oids =  oids[batch_size:]
-            #
-            # However, that turns into O(n^2) operations with a large
-            # overhead, especially on CPython. Each slice operation
-            # allocates a new list, and copies into it (including
-            # INCREF). Even with the O(n^2) algorithm,
-            # array.array('Q') benchmarks ~5x faster for these two
-            # operations, probably because it's just memory movements,
-            # not loops that have to INCREF/DECREF.
-            #
-            # A simple profile while this is running with 30 MM rows
-            # shows at least 37% of the time spent in the C
-            # ``list_slice`` function and 31% in ``list_dealloc``,
-            # averaging about 15,000 objects per minute.
-            #
-            # Switching just to array.array and leaving the slicing, I
-            # was getting 44,000 objects per minute, but 99% time
-            # spent in memmove().
-            #
-            # Using manual indexing of arrays, CPU usage of less than
-            # 35%; for the first time, 35% of profile time is spent in
-            # talking to MySQL (over gigabit switch); clearly parallel
-            # pre-fetching would be useful.
-
-            batch = oids[oids_done:oids_done + self.fill_object_refs_batch_size]
+        for batch, refs in self._find_refs_for_oid_batches(load_batcher, oids,
+                                                           get_references):
             oids_done += len(batch)
 
-            refs_found = self._add_refs_for_oids(load_batcher, store_batcher,
-                                                 batch, get_references)
+            refs_found = self._add_refs_for_oids(store_batcher, refs)
             num_refs_found += refs_found
             self.on_fill_object_ref_batch(oid_batch=batch, num_refs_found=refs_found)
 
@@ -1342,16 +1450,152 @@ class HistoryFreePackUndo(PackUndo):
         logger.info(
             "pre_pack: objects analyzed: %d/%d", oids_done, oid_count)
 
-    def _add_refs_for_oids(self, load_batcher, store_batcher,
-                           oids, get_references):
+    def _iter_oid_batches(self, oids):
+        # Previously, we iterated like this:
+        #
+        # while oids:
+        #    batch = oids[:batch_size]
+        #    oids =  oids[batch_size:]
+        #
+        # However, that turns into O(n^2) operations with a large
+        # overhead, especially on CPython. Each slice operation
+        # allocates a new list, and copies into it (including
+        # INCREF). Even with the O(n^2) algorithm,
+        # array.array('Q') benchmarks ~5x faster for these two
+        # operations, probably because it's just memory movements,
+        # not loops that have to INCREF/DECREF.
+        #
+        # A simple profile while this is running with 30 MM rows
+        # shows at least 37% of the time spent in the C
+        # ``list_slice`` function and 31% in ``list_dealloc``,
+        # averaging about 15,000 objects per minute.
+        #
+        # Switching just to array.array and leaving the slicing, I
+        # was getting 44,000 objects per minute, but 99% time
+        # spent in memmove().
+        #
+        # Using manual indexing of arrays, CPU usage of less than
+        # 35%; for the first time, 35% of profile time is spent in
+        # talking to MySQL (over gigabit switch); clearly parallel
+        # pre-fetching would be useful.
+        oids_done = 0
+        oid_count = len(oids)
+        while oids_done < oid_count:
+            batch = oids[oids_done:oids_done + self.fill_object_refs_batch_size]
+            oids_done += len(batch)
+            yield batch
+
+    def _find_refs_for_oid_batches(self, load_batcher, oids, get_references):
         """
-        Fill object_refs with the states for some objects.
+        Download the states of *oids* in batches, and iterate
+        ``(oid_batch, refs)`` for each one, in order, where *refs* is
+        as returned by :func:`_find_references`.
 
-        Returns the number of references added.
+        If the ``pack_reference_processes`` option is more than one,
+        that many processes find the references while the following
+        batches are downloaded.
+        """
+        batches = self._iter_oid_batches(oids)
+        pool = None
+        process_count = self.options.pack_reference_processes
+        if process_count > 1:
+            try:
+                other_children = multiprocessing.active_children()
+                pool = multiprocessing.Pool(
+                    process_count,
+                    _init_reference_process,
+                    (get_references,))
+                workers = set(multiprocessing.active_children()) - set(other_children)
+            except Exception: # pylint:disable=broad-except
+                # Probably the processes are spawned, not forked, and
+                # get_references can't be pickled.
+                logger.exception(
+                    "pre_pack: can't start processes to find references; "
+                    "finding them in this process.")
+
+        if pool is None:
+            for batch in batches:
+                rows = self._load_states_for_oids(load_batcher, batch)
+                yield batch, _find_references(get_references, rows)
+            return
+
+        # (batch, rows, AsyncResult); keep every process busy, and
+        # one more batch for each waiting to be stored.
+        pending = collections.deque()
+        def finish_one():
+            batch, rows, result = pending[0]
+            # The pool replaces a worker that dies, but the task it
+            # was running is lost and will never be ready.
+            while not result.ready():
+                result.wait(self.reference_process_check_frequency)
+                if not result.ready() and any(p.exitcode is not None for p in workers):
+                    raise _ReferenceProcessDied
+            pending.popleft()
+            try:
+                refs = result.get()
+            except Exception: # pylint:disable=broad-except
+                # Do it again here so the error is logged and raised
+                # just like it would be without processes.
+                refs = _find_references(get_references, rows)
+            return batch, refs
+
+        try:
+            try:
+                for batch in batches:
+                    rows = self._load_states_for_oids(load_batcher, batch)
+                    pending.append((
+                        batch,
+                        rows,
+                        pool.apply_async(_find_references_in_process, (rows,))
+                    ))
+                    if len(pending) >= process_count * 2:
+                        yield finish_one()
+                while pending:
+                    yield finish_one()
+            except _ReferenceProcessDied:
+                logger.error(
+                    "pre_pack: a process finding references exited; "
+                    "finding the remaining references in this process.")
+                pool.terminate()
+                for batch, rows, _ in pending:
+                    yield batch, _find_references(get_references, rows)
+                for batch in batches:
+                    rows = self._load_states_for_oids(load_batcher, batch)
+                    yield batch, _find_references(get_references, rows)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _load_states_for_oids(self, load_batcher, oids):
+        """
+        Download ``(zoid, tid, state)`` for some objects.
         """
         # oids should be a slice of an ``OidList``, which may be an
         # ``array.array``; those are relatively slow to iterate.
 
+        # Use the batcher to get efficient ``= ANY()``
+        # queries, but go ahead and collect into a list at once.
+        # States must be bytes to be sent to another process.
+        binary_column_as_state_type = self.driver.binary_column_as_state_type
+        return [
+            (from_oid, tid, binary_column_as_state_type(state))
+            for from_oid, tid, state
+            in load_batcher.select_from(
+                ('zoid', 'tid', 'state'),
+                'object_state',
+                suffix=' ORDER BY zoid ',
+                zoid=oids
+            )
+        ]
+
+    def _add_refs_for_oids(self, store_batcher, refs):
+        """
+        Fill object_refs with the references found for some objects.
+
+        *refs* is as returned by :func:`_find_references`.
+
+        Returns the number of references added.
+        """
         # The batcher always does deletes before inserts, which is
         # exactly what we want.
         # In the past, we performed all deletes and then all inserts;
@@ -1364,19 +1608,9 @@ class HistoryFreePackUndo(PackUndo):
         object_ref_schema = store_batcher.row_schema_of_length(3)
         object_refs_added_schema = store_batcher.row_schema_of_length(2)
 
-        # Use the batcher to get efficient ``= ANY()``
-        # queries, but go ahead and collect into a list at once
-        rows = list(load_batcher.select_from(
-            ('zoid', 'tid', 'state'),
-            'object_state',
-            suffix=' ORDER BY zoid ',
-            zoid=oids
-        ))
-
         num_refs_found = 0
 
-        for from_oid, tid, state in rows:
-            state = self.driver.binary_column_as_state_type(state)
+        for from_oid, tid, to_oids in refs:
             row = (from_oid, tid)
 
             store_batcher.insert_into(
@@ -1395,28 +1629,16 @@ class HistoryFreePackUndo(PackUndo):
                 zoid=from_oid
             )
 
-            if state:
-                try:
-                    to_oids = get_references(state)
-                except:
-                    print(repr(state))
-                    logger.exception(
-                        "pre_pack: can't unpickle "
-                        "object %d in transaction %d; state length = %d",
-                        from_oid, tid, len(state)
-                    )
-                    raise
-
-                for to_oid in to_oids:
-                    row = (from_oid, tid, to_oid)
-                    num_refs_found += 1
-                    store_batcher.insert_into(
-                        'object_ref (zoid, tid, to_zoid)',
-                        object_ref_schema,
-                        row,
-                        row,
-                        size=3
-                    )
+            for to_oid in to_oids:
+                row = (from_oid, tid, to_oid)
+                num_refs_found += 1
+                store_batcher.insert_into(
+                    'object_ref (zoid, tid, to_zoid)',
+                    object_ref_schema,
+                    row,
+                    row,
+                    size=3
+                )
 
         return num_refs_found
 
@@ -1450,6 +1672,7 @@ class HistoryFreePackUndo(PackUndo):
                 store_connection.rollback_quietly()
                 raise
             else:
+                self._record_pre_pack_finished(store_connection.cursor, pack_tid)
                 store_connection.commit()
                 logger.info("pre_pack: finished successfully")
         finally:
@@ -1504,6 +1727,8 @@ class HistoryFreePackUndo(PackUndo):
         # On PostgreSQL we could use unlogged tables; this is somewhat faster
         # in some tests (15 minutes vs 12?)
         logger.info("pre_pack: filling the pack_object table")
+        # Any previous pack can no longer be resumed.
+        self._clear_pack_progress(store_connection.cursor)
         stmt = """
         %(TRUNCATE)s pack_object;
 
@@ -1539,10 +1764,17 @@ class HistoryFreePackUndo(PackUndo):
         it.c.zoid
     ).where(
         it.c.keep == False # pylint:disable=singleton-comparison
+    ).and_(
+        it.c.zoid > it.bindparam('oid')
     ).order_by(
         it.c.zoid
     )
 
+    # How many OIDs each pair of statements covers when
+    # ``pack_delete_in_database`` is set.
+    pack_delete_range_size = get_positive_integer_from_environ('RS_PACK_DELETE_RANGE_SIZE',
+                                                               100000)
+
     # This query is used to feed ``packed_func``, which is used
     # to normalize the local cache.
     __find_zoid_tid_to_delete_query = Schema.pack_object.select(
@@ -1564,87 +1796,17 @@ class HistoryFreePackUndo(PackUndo):
         store_connection = StoreConnection(self.connmanager)
         try: # pylint:disable=too-many-nested-blocks
             try:
-                # On PostgreSQL, this uses the index
-                # ``pack_object_keep_false`` So if there's lots of
-                # garbage, this only touches a small part of the table
-                # and is surprisingly fast (it doesn't even need to
-                # sort); between 40s (cached) and 2 minutes (uncached)
-                # on a pack_object containing 60MM rows.
-                #
-                # Attempting to join these results against the
-                # object_state table and do the delete in one shot
-                # (60MM rows, half garbage) took more than 24 hours
-                # against a remote PostgreSQL database (before I killed it), the
-                # same one that ran the above query in 40s. It appears
-                # to spend a lot of time checkpointing (each
-                # checkpoint takes an hour!) Even on a faster
-                # database, that's unlikely to be suitable for production.
-                #
-                # Breaking it into chunks, as below, took about an hour.
-                logger.debug("pack: Fetching objects to remove.")
-                with self._make_ss_load_cursor(store_connection) as cursor:
-                    with _Progress('execute') as progress:
-                        self.__find_zoid_to_delete_query.execute(cursor)
-                        progress.mark('download')
-                        to_remove = OidList(row[0] for row in cursor)
-                        # On postgres, with a regular cursor, fetching 32,502,545 objects to remove
-                        # took 56.7s (execute: 50.8s; download 5.8s; memory delta 1474.82 MB);
-                        # The second time took half of that.
-                        # Switching to a server side cursor brought that to
-                        # fetched 32,502,545 objects to remove in
-                        # 41.74s (execute: 0.00s; download 41.74s; memory delta 257.21 MB)
-
-                total = len(to_remove)
-                logger.debug(
-                    "pack: fetched %d objects to remove in %.2fs "
-                    "(execute: %.2fs; download %.2fs; memory delta %s)",
-                    total,
-                    progress.duration,
-                    progress.phase_duration('execute'),
-                    progress.phase_duration('download'),
-                    progress.total_memory_delta_display,
-                )
-
-                logger.info("pack: will remove %d object(s)", total)
-
-                # We used to hold the commit lock and do this in small batches,
-                # but that's not important any longer since RelStorage 3.0
-                start = perf_counter()
-
-                store_batcher = self.locker.make_batcher(store_connection.cursor)
-                store_batcher.row_limit = max(store_batcher.row_limit, 4096)
-                removed = 0
-
-                def maybe_commit_and_report(force=False):
-                    """Returns the time of the last log."""
-                    now = perf_counter()
-                    if force or now >= start + self.options.pack_batch_timeout:
-                        store_connection.commit()
-                        if removed and total:
-                            # XXX: storage.copy has a progress logger that could
-                            # easily be generalized to this, and do a better job.
-                            logger.info("pack: removed %d (%.1f%%) state(s)",
-                                        removed, removed / total * 100)
-                        else:
-                            logger.info("pack: No objects to remove")
-                        return now
-                    return start
-
-                # In the 60mm/30mm garbage postgresql database, removing took about 2.8 hours.
-                # Most of that times seems to have been from removing blobs.
-                for oid in to_remove:
-                    # In the past, we used to include the TID in the delete statement,
-                    # but that shouldn't be necessary in a history-free database. It might have been
-                    # there to protect against object resurrection, but that's an application bug.
-                    # This way is faster and lets us take advantage of fast ANY row batching.
-                    removed += store_batcher.delete_from('object_state', zoid=oid)
-
-                    start = maybe_commit_and_report()
-
-                removed += store_batcher.flush()
-                maybe_commit_and_report(True)
-
-                to_remove = None # Drop memory usage
+                # If an earlier pack was interrupted, skip what it
+                # already deleted.
+                progress = self._read_pack_progress(store_connection.cursor)
+                deleted_zoid = progress[1] if progress else 0
+                if deleted_zoid:
+                    logger.info("pack: resuming after OID %d", deleted_zoid)
+
+                if self.options.pack_delete_in_database:
+                    total = self._delete_garbage_in_database(store_connection, deleted_zoid)
+                else:
+                    total = self._delete_garbage_by_oid(store_connection, deleted_zoid)
 
                 if packed_func is not None:
                     logger.debug("pack: Passing removed objects and tids to %s.", packed_func)
@@ -1680,6 +1842,186 @@ class HistoryFreePackUndo(PackUndo):
         finally:
             store_connection.drop()
 
+    def _delete_garbage_by_oid(self, store_connection, deleted_zoid):
+        """
+        Delete the objects that aren't kept and have OIDs greater than
+        *deleted_zoid*, one OID at a time (in batches).
+
+        Returns the number of objects deleted.
+        """
+        # On PostgreSQL, this uses the index
+        # ``pack_object_keep_false`` So if there's lots of
+        # garbage, this only touches a small part of the table
+        # and is surprisingly fast (it doesn't even need to
+        # sort); between 40s (cached) and 2 minutes (uncached)
+        # on a pack_object containing 60MM rows.
+        #
+        # Attempting to join these results against the
+        # object_state table and do the delete in one shot
+        # (60MM rows, half garbage) took more than 24 hours
+        # against a remote PostgreSQL database (before I killed it), the
+        # same one that ran the above query in 40s. It appears
+        # to spend a lot of time checkpointing (each
+        # checkpoint takes an hour!) Even on a faster
+        # database, that's unlikely to be suitable for production.
+        #
+        # Breaking it into chunks, as below, took about an hour.
+        logger.debug("pack: Fetching objects to remove.")
+        with self._make_ss_load_cursor(store_connection) as cursor:
+            with _Progress('execute') as progress:
+                self.__find_zoid_to_delete_query.execute(cursor, {'oid': deleted_zoid})
+                progress.mark('download')
+                to_remove = OidList(row[0] for row in cursor)
+                # On postgres, with a regular cursor, fetching 32,502,545 objects to remove
+                # took 56.7s (execute: 50.8s; download 5.8s; memory delta 1474.82 MB);
+                # The second time took half of that.
+                # Switching to a server side cursor brought that to
+                # fetched 32,502,545 objects to remove in
+                # 41.74s (execute: 0.00s; download 41.74s; memory delta 257.21 MB)
+
+        total = len(to_remove)
+        logger.debug(
+            "pack: fetched %d objects to remove in %.2fs "
+            "(execute: %.2fs; download %.2fs; memory delta %s)",
+            total,
+            progress.duration,
+            progress.phase_duration('execute'),
+            progress.phase_duration('download'),
+            progress.total_memory_delta_display,
+        )
+
+        logger.info("pack: will remove %d object(s)", total)
+
+        # We used to hold the commit lock and do this in small batches,
+        # but that's not important any longer since RelStorage 3.0
+        start = perf_counter()
+
+        store_batcher = self.locker.make_batcher(store_connection.cursor)
+        store_batcher.row_limit = max(store_batcher.row_limit, 4096)
+        removed = 0
+
+        def commit_and_report(oid):
+            """Returns the time of the last log."""
+            if oid is not None:
+                self._record_deleted_zoid(store_connection.cursor, oid)
+            store_connection.commit()
+            if removed and total:
+                # XXX: storage.copy has a progress logger that could
+                # easily be generalized to this, and do a better job.
+                logger.info("pack: removed %d (%.1f%%) state(s)",
+                            removed, removed / total * 100)
+            else:
+                logger.info("pack: No objects to remove")
+            return perf_counter()
+
+        # In the 60mm/30mm garbage postgresql database, removing took about 2.8 hours.
+        # Most of that times seems to have been from removing blobs.
+        oid = None
+        for oid in to_remove:
+            # In the past, we used to include the TID in the delete statement,
+            # but that shouldn't be necessary in a history-free database. It might have been
+            # there to protect against object resurrection, but that's an application bug.
+            # This way is faster and lets us take advantage of fast ANY row batching.
+            removed += store_batcher.delete_from('object_state', zoid=oid)
+
+            if perf_counter() >= start + self.options.pack_batch_timeout:
+                # Everything through this OID must be in the database
+                # before we say so.
+                removed += store_batcher.flush()
+                start = commit_and_report(oid)
+
+        removed += store_batcher.flush()
+        commit_and_report(oid)
+
+        return total
+
+    def _delete_garbage_in_database(self, store_connection, deleted_zoid):
+        """
+        Delete the objects that aren't kept and have OIDs greater than
+        *deleted_zoid*, and their blob chunks, by joining against
+        ``pack_object`` in the database, one range of OIDs at a time.
+        Each range is committed.
+
+        Returns the number of objects deleted.
+        """
+        cursor = store_connection.cursor
+        self.runner.run_script_stmt(cursor, """
+        SELECT MIN(zoid), MAX(zoid), COUNT(*)
+        FROM pack_object
+        WHERE keep = %(FALSE)s
+        AND zoid > %(oid)s
+        """, {'oid': deleted_zoid})
+        min_oid, max_oid, total = cursor.fetchone()
+        logger.info("pack: will remove %d object(s)", total)
+        if not total:
+            return total
+
+        # Deleting from object_state would delete the blob chunks too,
+        # but deleting them first keeps each statement smaller, and
+        # lets us report on them. The ranges are also applied to the
+        # table being deleted from so that databases that don't use
+        # the subquery to find the rows (MySQL) can use its primary key.
+        delete_blob_chunks_stmt = """
+        DELETE FROM blob_chunk
+        WHERE zoid IN (
+            SELECT zoid
+            FROM pack_object
+            WHERE keep = %(FALSE)s
+            AND zoid BETWEEN %(min_oid)s AND %(max_oid)s
+        )
+        AND zoid BETWEEN %(min_oid)s AND %(max_oid)s
+        """
+        delete_states_stmt = """
+        DELETE FROM object_state
+        WHERE zoid IN (
+            SELECT zoid
+            FROM pack_object
+            WHERE keep = %(FALSE)s
+            AND zoid BETWEEN %(min_oid)s AND %(max_oid)s
+        )
+        AND zoid BETWEEN %(min_oid)s AND %(max_oid)s
+        """
+
+        removed = 0
+        removed_chunks = 0
+        log_at = perf_counter() + self.options.pack_batch_timeout
+        range_size = self.pack_delete_range_size
+        range_min = min_oid
+        while range_min is not None:
+            params = {
+                'min_oid': range_min,
+                'max_oid': range_min + range_size - 1,
+            }
+            self.runner.run_script_stmt(cursor, delete_blob_chunks_stmt, params)
+            removed_chunks += max(cursor.rowcount, 0)
+            self.runner.run_script_stmt(cursor, delete_states_stmt, params)
+            removed += max(cursor.rowcount, 0)
+            self._record_deleted_zoid(cursor, params['max_oid'])
+            store_connection.commit()
+
+            # Skip ranges that have no garbage.
+            self.runner.run_script_stmt(cursor, """
+            SELECT MIN(zoid)
+            FROM pack_object
+            WHERE keep = %(FALSE)s
+            AND zoid > %(max_oid)s
+            """, params)
+            range_min = cursor.fetchone()[0]
+
+            now = perf_counter()
+            if now >= log_at:
+                log_at = now + self.options.pack_batch_timeout
+                logger.info(
+                    "pack: removed %d (%.1f%%) state(s) and %d blob chunk(s) "
+                    "(through OID %d of %d)",
+                    removed, removed / total * 100, removed_chunks,
+                    min(params['max_oid'], max_oid), max_oid)
+
+        logger.info(
+            "pack: removed %d state(s) and %d blob chunk(s)",
+            removed, removed_chunks)
+        return total
+
     def _pack_cleanup(self, store_connection):
         # The work done so far must already be committed
         logger.info("pack: cleaning up")
@@ -1707,6 +2049,46 @@ class HistoryFreePackUndo(PackUndo):
         %(TRUNCATE)s pack_object
         """
         self.runner.run_script(store_connection.cursor, stmt)
+        self._clear_pack_progress(store_connection.cursor)
+
+
+def _find_references(get_references, rows):
+    """
+    Given ``(zoid, tid, state)`` *rows*, return a list of ``(zoid,
+    tid, to_oids)``.
+    """
+    refs = []
+    for from_oid, tid, state in rows:
+        to_oids = ()
+        if state:
+            try:
+                to_oids = list(get_references(state))
+            except:
+                logger.exception(
+                    "pre_pack: can't unpickle "
+                    "object %d in transaction %d; state length = %d",
+                    from_oid, tid, len(state)
+                )
+                raise
+        refs.append((from_oid, tid, to_oids))
+    return refs
+
+class _ReferenceProcessDied(Exception):
+    """
+    Raised when a process started by _find_refs_for_oid_batches
+    exits.
+    """
+
+# The get_references function in a process started by
+# _find_refs_for_oid_batches.
+_process_get_references = None
+
+def _init_reference_process(get_references):
+    global _process_get_references # pylint:disable=global-statement
+    _process_get_references = get_references
+
+def _find_references_in_process(rows):
+    return _find_references(_process_get_references, rows)
 
 
 class _Progress(object):
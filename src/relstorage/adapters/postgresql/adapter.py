@@ -34,6 +34,9 @@ from .batch import PostgreSQLRowBatcher
 from .connmanager import Psycopg2ConnectionManager
 from .locker import PostgreSQLLocker
 from .mover import PostgreSQLObjectMover
+from .notify import CHANNEL
+from .notify import CommitListener
+from .notify import notify_commit
 
 from .oidallocator import PostgreSQLOIDAllocator
 from .schema import PostgreSQLSchemaInstaller
@@ -47,6 +50,9 @@ log = logging.getLogger(__name__)
 # TODO: Move to own file
 class PGPoller(Poller):
 
+    #: A :class:`.notify.CommitListener`, if we're listening for commits.
+    commit_listener = None
+
     _poll_newest_tid_query = Schema.all_transaction.select(
         Schema.all_transaction.c.tid
     ).order_by(
@@ -55,6 +61,14 @@ class PGPoller(Poller):
         1
     ).prepared()
 
+    def poll_invalidations(self, conn, cursor, prev_polled_tid):
+        listener = self.commit_listener
+        if listener is not None and listener.unchanged_since(prev_polled_tid):
+            # Nothing has committed since we last looked; don't bother
+            # the database.
+            return (), prev_polled_tid
+        return super(PGPoller, self).poll_invalidations(conn, cursor, prev_polled_tid)
+
 
 @implementer(IRelStorageAdapter)
 class PostgreSQLAdapter(AbstractAdapter):
@@ -66,7 +80,8 @@ class PostgreSQLAdapter(AbstractAdapter):
     def __init__(self, dsn='', options=None, oidallocator=None,
                  locker=None,
                  mover=None,
-                 connmanager=None
+                 connmanager=None,
+                 commit_listener=None,
                  ):
         # options is a relstorage.options.Options or None
         self._dsn = dsn
@@ -74,6 +89,7 @@ class PostgreSQLAdapter(AbstractAdapter):
         self.locker = locker
         self.mover = mover
         self.connmanager = connmanager
+        self.commit_listener = commit_listener
         super(PostgreSQLAdapter, self).__init__(options)
 
     def _create(self):
@@ -123,12 +139,23 @@ class PostgreSQLAdapter(AbstractAdapter):
                 or self.connmanager.ro_replica_selector is not None
             )
         )
+        # Notifications are only delivered by the primary, so they can't
+        # tell us what a replica has seen.
+        if (
+                self.commit_listener is None
+                and options.commit_notify
+                and driver.supports_notify
+                and not self.poller.transactions_may_go_backwards
+        ):
+            self.commit_listener = CommitListener(self.connmanager, self.poller)
+        self.poller.commit_listener = self.commit_listener
 
         self.txncontrol = PostgreSQLTransactionControl(
             connmanager=self.connmanager,
             poller=self.poller,
             keep_history=self.keep_history,
             Binary=driver.Binary,
+            notify_commits=options.commit_notify,
         )
 
         if self.keep_history:
@@ -169,9 +196,15 @@ class PostgreSQLAdapter(AbstractAdapter):
             locker=self.locker,
             mover=self.mover,
             connmanager=self.connmanager,
+            commit_listener=self.commit_listener,
         )
         return inst
 
+    def close(self):
+        super(PostgreSQLAdapter, self).close()
+        if self.commit_listener is not None:
+            self.commit_listener.stop()
+
     def __str__(self):
         parts = []
         if self.keep_history:
@@ -265,8 +298,15 @@ class PostgreSQLAdapter(AbstractAdapter):
             # the actual state of the transaction on the server so we must still
             # execute connection.commit() to bring them back in sync. This results
             # in a warning on the server about no transaction being in progress.
+            #
+            # If we're notifying listeners about commits, that has to happen
+            # in the same transaction, before the COMMIT.
+            notify = ''
+            if self.options.commit_notify:
+                notify = "SELECT pg_notify('" + CHANNEL + "', current_setting('rs.tid')); "
             proc = (
                 "SELECT SET_CONFIG('rs.tid', " + proc + "::text, FALSE); "
+                + notify +
                 "COMMIT; "
                 "SELECT current_setting('rs.tid')"
             )
@@ -282,11 +322,16 @@ class PostgreSQLAdapter(AbstractAdapter):
 
         tid_int, = cursor.fetchone()
         tid_int = int(tid_int)
+        if self.options.commit_notify and not (
+                commit and self.driver.supports_multiple_statement_execute):
+            notify_commit(cursor, tid_int)
         if commit:
             if self.driver.supports_multiple_statement_execute:
                 self.driver.sync_status_after_hidden_commit(store_connection.connection)
             else:
                 self.txncontrol.commit_phase2(store_connection, "-", load_connection)
+            if self.commit_listener is not None:
+                self.commit_listener.note_tid(tid_int)
         after_selecting_tid(tid_int)
         return tid_int, "-"
 
@@ -41,6 +41,10 @@ class AbstractPostgreSQLDriver(AbstractModuleDriver):
     # Can we use the COPY command (copy_export)?
     supports_copy = True
 
+    # Can we wait for LISTEN/NOTIFY notifications on a connection?
+    # (See ``notify.py``)
+    supports_notify = False
+
     # PostgreSQL is the database most likey to generate
     # server-sent messages. Log those using a logger that
     # includes that name.
@@ -57,6 +57,8 @@ class Psycopg2Driver(MemoryViewBlobDriverMixin,
     PRIORITY = 1
     PRIORITY_PYPY = 2
 
+    supports_notify = True
+
     def __init__(self):
         super(Psycopg2Driver, self).__init__()
 
@@ -39,6 +39,9 @@ class PostgreSQLRowBatcherStoreTemps(RowBatcherStoreTemps):
 @implementer(IObjectMover)
 class PostgreSQLObjectMover(AbstractObjectMover):
 
+    # COPY writes the states into a bytearray.
+    store_temps_accepts_buffers = True
+
     def __init__(self, *args, **kwargs):
         super(PostgreSQLObjectMover, self).__init__(*args, **kwargs)
         if not self.driver.supports_copy:
@@ -221,7 +224,7 @@ class PostgreSQLObjectMover(AbstractObjectMover):
         # md5; that's fast on PostgreSQL.
         if state_oid_tid_iter:
             buf = TempStoreCopyBuffer(table_name,
-                                      state_oid_tid_iter,
+                                      self._temp_states(state_oid_tid_iter),
                                       self._compute_md5sum if self.keep_history else None)
             cursor.copy_expert(buf.COPY_COMMAND, buf)
 
@@ -247,6 +250,9 @@ class PostgreSQLObjectMover(AbstractObjectMover):
             WHERE temp_store.zoid = r.zoid
             """
         )
+        # The rows only go away on commit, but the same objects may
+        # be replaced again before then.
+        cursor.execute('DELETE FROM temp_store_replacements')
 
 
 class TempStoreCopyBuffer(io.BufferedIOBase):
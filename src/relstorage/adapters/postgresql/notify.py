@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Commit notifications using PostgreSQL's LISTEN/NOTIFY.
+
+Committers send the TID they committed on :data:`CHANNEL`. A process
+runs one :class:`CommitListener` that keeps track of the newest TID it
+has heard about, which lets the poller skip querying the database
+when nothing has been committed since the last poll.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import logging
+import select
+import threading
+import time
+
+from relstorage._util import thread_spawn
+
+logger = logging.getLogger(__name__)
+
+#: The channel committed TIDs are sent on.
+CHANNEL = 'relstorage_commits'
+
+
+def notify_commit(cursor, tid_int):
+    """
+    Queue a notification that *tid_int* committed.
+
+    PostgreSQL only delivers the notification when (and if) the
+    transaction *cursor* belongs to commits.
+    """
+    cursor.execute('SELECT pg_notify(%s, %s)', (CHANNEL, str(tid_int)))
+
+
+class CommitListener(object):
+    """
+    Listens for commit notifications in a daemon thread, using its own
+    autocommit connection.
+
+    The newest committed TID is only known while the feed is healthy.
+    Until the listener has connected, after any error, and whenever the
+    server has been silent for longer than it should be, it is unknown
+    and :meth:`unchanged_since` is false, so callers go back to polling
+    the database. Reconnecting resets the newest TID from the database
+    after issuing ``LISTEN``, so nothing committed in the gap is missed.
+    """
+
+    #: How long to wait for a notification before checking if we've been
+    #: stopped.
+    wait_timeout = 1.0
+    #: How often to check that an otherwise quiet connection is still alive.
+    heartbeat_interval = 5.0
+    #: How long to wait before reconnecting after an error.
+    reconnect_delay = 1.0
+
+    def __init__(self, connmanager, poller):
+        self._connmanager = connmanager
+        self._poller = poller
+        self._lock = threading.Lock()
+        self._latest_tid = None
+        self._last_heard = 0
+        self._stopped = threading.Event()
+        self._thread = thread_spawn(self.run, daemon=True)
+
+    @property
+    def latest_tid(self):
+        """
+        The newest committed TID, or None if the feed isn't trustworthy
+        right now.
+        """
+        if time.time() - self._last_heard > self.heartbeat_interval * 2:
+            return None
+        return self._latest_tid
+
+    def unchanged_since(self, tid):
+        """
+        Is it known that nothing has been committed after *tid*?
+        """
+        latest = self.latest_tid
+        return latest is not None and tid is not None and latest <= tid
+
+    def note_tid(self, tid_int):
+        """
+        Record that *tid_int* has been committed.
+
+        Committers in this process call this so their own commits are
+        visible to the next poll without waiting for the notification
+        to arrive.
+        """
+        with self._lock:
+            if self._latest_tid is not None and tid_int > self._latest_tid:
+                self._latest_tid = tid_int
+
+    def run(self):
+        while not self._stopped.is_set():
+            conn = cursor = None
+            try:
+                conn, cursor = self._connmanager.open(application_name='RS: Notify')
+                conn.autocommit = True
+                cursor.execute('LISTEN ' + CHANNEL)
+                # Anything committed from now on will be delivered to us,
+                # so this is a safe baseline.
+                latest_tid = self._poller.get_current_tid(cursor)
+                with self._lock:
+                    self._latest_tid = latest_tid
+                    self._last_heard = time.time()
+                self._listen(conn, cursor)
+            except Exception: # pylint:disable=broad-except
+                if not self._stopped.is_set():
+                    logger.exception(
+                        "Lost the commit notification connection; "
+                        "polling the database until it is re-established."
+                    )
+            finally:
+                with self._lock:
+                    self._latest_tid = None
+                self._connmanager.close(conn, cursor)
+            self._stopped.wait(self.reconnect_delay)
+
+    def _listen(self, conn, cursor):
+        while not self._stopped.is_set():
+            readable, _, _ = select.select([conn], (), (), self.wait_timeout)
+            if readable:
+                conn.poll()
+            elif time.time() - self._last_heard >= self.heartbeat_interval:
+                cursor.execute('SELECT 1')
+                cursor.fetchall()
+            else:
+                continue
+
+            notifies = conn.notifies
+            tids = [int(notify.payload) for notify in notifies if notify.channel == CHANNEL]
+            del notifies[:]
+            with self._lock:
+                self._last_heard = time.time()
+            if tids:
+                self.note_tid(max(tids))
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
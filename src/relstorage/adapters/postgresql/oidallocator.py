@@ -44,12 +44,17 @@ class PostgreSQLOIDAllocator(AbstractRangedOIDAllocator):
         """, (n, n))
 
     @metricmethod
-    def new_oids(self, cursor):
+    def new_oids(self, cursor, range_count=1):
         """Return a sequence of new, unused OIDs."""
-        stmt = "SELECT NEXTVAL('zoid_seq')"
-        cursor.execute(stmt)
-        n = cursor.fetchone()[0]
-        return self._oid_range_around(n)
+        if range_count == 1:
+            stmt = "SELECT NEXTVAL('zoid_seq')"
+            cursor.execute(stmt)
+            n = cursor.fetchone()[0]
+            return self._oid_range_around(n)
+
+        stmt = "SELECT NEXTVAL('zoid_seq') FROM generate_series(1, %s)"
+        cursor.execute(stmt, (range_count,))
+        return self._oid_ranges_around([row[0] for row in cursor.fetchall()])
 
     def reset_oid(self, cursor):
         raise NotImplementedError
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import socket
+import time
+
+from relstorage.tests import TestCase
+from relstorage.tests import MockConnection
+from relstorage.tests import MockCursor
+from relstorage.tests import MockDriver
+from relstorage.tests import MockPoller
+
+from .. import notify
+from ..adapter import PGPoller
+
+Notify = collections.namedtuple('Notify', ('pid', 'channel', 'payload'))
+
+
+class MockNotifyConnection(object):
+    autocommit = False
+
+    def __init__(self):
+        self.notifies = []
+        self._sock, self.sender = socket.socketpair()
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def poll(self):
+        for payload in self._sock.recv(1024).decode('ascii').split():
+            self.notifies.append(Notify(1, notify.CHANNEL, payload))
+
+    def close(self):
+        self._sock.close()
+        self.sender.close()
+
+
+class MockNotifyConnectionManager(object):
+
+    def __init__(self):
+        self.conn = MockNotifyConnection()
+        self.cursor = MockCursor(self.conn)
+        self.closed = False
+
+    def open(self, **_kwargs):
+        return self.conn, self.cursor
+
+    def close(self, conn=None, cursor=None):
+        self.closed = True
+        if conn is not None:
+            conn.close()
+
+
+class TestCommitListener(TestCase):
+
+    def _makeOne(self):
+        connmanager = MockNotifyConnectionManager()
+        poller = MockPoller()
+        poller.poll_tid = 5
+        listener = notify.CommitListener(connmanager, poller)
+        self.addCleanup(listener.stop)
+        return listener, connmanager
+
+    def _wait_for(self, func):
+        for _ in range(500):
+            if func():
+                return
+            time.sleep(0.01)
+        self.fail("Timed out")
+
+    def test_listen(self):
+        listener, connmanager = self._makeOne()
+        self._wait_for(lambda: listener.latest_tid == 5)
+        self.assertTrue(connmanager.conn.autocommit)
+        self.assertEqual(connmanager.cursor.executed[0],
+                         ('LISTEN ' + notify.CHANNEL, None))
+        self.assertTrue(listener.unchanged_since(5))
+        self.assertFalse(listener.unchanged_since(4))
+        self.assertFalse(listener.unchanged_since(None))
+
+        connmanager.conn.sender.sendall(b'7 6 ')
+        self._wait_for(lambda: listener.latest_tid == 7)
+        self.assertFalse(listener.unchanged_since(5))
+
+        # Our own commits are noted immediately, but never go
+        # backwards.
+        listener.note_tid(9)
+        self.assertEqual(listener.latest_tid, 9)
+        listener.note_tid(8)
+        self.assertEqual(listener.latest_tid, 9)
+
+        listener.stop()
+        self.assertTrue(connmanager.closed)
+        self.assertIsNone(listener.latest_tid)
+        # Once we know nothing, noting our commits doesn't help.
+        listener.note_tid(10)
+        self.assertIsNone(listener.latest_tid)
+
+    def test_silent_server_not_trusted(self):
+        listener, _ = self._makeOne()
+        self._wait_for(lambda: listener.latest_tid == 5)
+        listener._last_heard = 0
+        self.assertIsNone(listener.latest_tid)
+        self.assertFalse(listener.unchanged_since(5))
+
+
+class TestPGPoller(TestCase):
+
+    def _makeOne(self):
+        return PGPoller(MockDriver(), True, None, False, False)
+
+    def test_skips_query_when_unchanged(self):
+        class Listener(object):
+            def unchanged_since(self, tid):
+                return tid == 5
+
+        poller = self._makeOne()
+        poller.commit_listener = Listener()
+        cursor = MockCursor(MockConnection())
+        self.assertEqual(poller.poll_invalidations(None, cursor, 5), ((), 5))
+        self.assertEqual(cursor.executed, [])
+
+        cursor.results = [(1, 6)]
+        changes, tid = poller.poll_invalidations(None, cursor, 4)
+        self.assertEqual(tid, 6)
+        self.assertEqual(list(changes), [(1, 6)])
+        self.assertTrue(cursor.executed)
@@ -29,3 +29,16 @@ class TestPostgreSQLTransactionControl(test_txncontrol.TestTransactionControl):
         return 'EXECUTE get_latest_tid'
 
     _get_hp_tid_query = _get_hf_tid_query
+
+    def test_commit_phase1_notify(self):
+        from relstorage.tests import MockCursor
+        from ..notify import CHANNEL
+        inst = self._makeOne()
+        inst.notify_commits = True
+        cur = MockCursor()
+
+        class StoreConnection(object):
+            cursor = cur
+
+        self.assertEqual(inst.commit_phase1(StoreConnection, 42), '-')
+        self.assertEqual(cur.executed, [('SELECT pg_notify(%s, %s)', (CHANNEL, '42'))])
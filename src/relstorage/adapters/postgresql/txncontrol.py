@@ -16,6 +16,17 @@
 from __future__ import absolute_import
 
 from ..txncontrol import GenericTransactionControl
+from .notify import notify_commit
 
 class PostgreSQLTransactionControl(GenericTransactionControl):
-    pass
+
+    def __init__(self, connmanager, poller, keep_history, Binary,
+                 notify_commits=False):
+        super(PostgreSQLTransactionControl, self).__init__(
+            connmanager, poller, keep_history, Binary)
+        self.notify_commits = notify_commits
+
+    def commit_phase1(self, store_connection, tid):
+        if self.notify_commits:
+            notify_commit(store_connection.cursor, tid)
+        return super(PostgreSQLTransactionControl, self).commit_phase1(store_connection, tid)
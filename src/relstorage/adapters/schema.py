@@ -166,6 +166,12 @@ class Schema(object):
         Column('visited', Boolean, nullable=False, default=False)
     )
 
+    pack_progress = Table(
+        'pack_progress',
+        Column('pack_tid', TID, primary_key=True),
+        Column('deleted_zoid', OID, nullable=False),
+    )
+
 
 class AbstractSchemaInstaller(DatabaseHelpersMixin,
                               ABC):
@@ -196,6 +202,7 @@ class AbstractSchemaInstaller(DatabaseHelpersMixin,
         'pack_object',
         'pack_state',
         'pack_state_tid',
+        'pack_progress',
         'temp_store',
         'temp_blob_chunk',
         'temp_pack_visit',
@@ -611,6 +618,18 @@ class AbstractSchemaInstaller(DatabaseHelpersMixin,
         """
         self.runner.run_script(cursor, self.CREATE_PACK_STATE_TID_TMPL)
 
+    _create_pack_progress_query = Schema.pack_progress.create()
+
+    def _create_pack_progress(self, cursor):
+        """
+        pack_progress records how far an interrupted pack got: It has
+        a row only once pre-packing has finished, holding the TID
+        being packed to and the largest OID whose garbage has been
+        deleted and committed (history-free only). Packing removes
+        the row when it finishes.
+        """
+        self._create_pack_progress_query.execute(cursor)
+
 
     # Most databases handle temp tables on a session-by-session
     # basis.
@@ -745,6 +764,13 @@ class AbstractSchemaInstaller(DatabaseHelpersMixin,
         tables = self.list_tables(cursor)
         self.check_compatibility(cursor, tables)
 
+    def has_table(self, table_name):
+        @connection_callback(read_only=True, application_name='RS: CheckTable')
+        def check(_conn, cursor):
+            tables = self._normalize_schema_object_names(self.list_tables(cursor))
+            return table_name in tables
+        return self.connmanager.open_and_call(check)
+
     def check_compatibility(self, cursor, tables): # pylint:disable=unused-argument
         tables = self._normalize_schema_object_names(tables)
         if self.keep_history:
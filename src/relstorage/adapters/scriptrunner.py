@@ -47,6 +47,8 @@ class ScriptRunner(object):
         'self_tid':     '%(self_tid)s',
         'min_tid':      '%(min_tid)s',
         'max_tid':      '%(max_tid)s',
+        'min_oid':      '%(min_oid)s',
+        'max_oid':      '%(max_oid)s',
         'INNER_ORDER_BY': 'ORDER BY zoid',
     }
 
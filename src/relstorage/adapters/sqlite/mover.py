@@ -97,6 +97,9 @@ class Sqlite3ObjectMover(AbstractObjectMover):
 
     _upload_blob_uses_chunks = False
 
+    # sqlite3 binds memoryview objects as BLOBs.
+    store_temps_accepts_buffers = True
+
     @metricmethod_sampled
     def restore(self, cursor, batcher, oid, tid, data):
         self._generic_restore(batcher, oid, tid, data,
@@ -102,17 +102,17 @@ class Sqlite3OIDAllocator(AbstractRangedOIDAllocator):
                     'UPDATE new_oid SET zoid = :new WHERE zoid < :new',
                     {'new': n}))
 
-    def new_oids(self, cursor=None):
-        return self.new_oids_no_cursor()
+    def new_oids(self, cursor=None, range_count=1):
+        return self.new_oids_no_cursor(range_count)
 
-    def new_oids_no_cursor(self):
+    def new_oids_no_cursor(self, range_count=1):
         with self.lock:
             conn = self._connect()
             consume(conn.execute('BEGIN IMMEDIATE TRANSACTION'))
             row, = conn.execute('SELECT zoid FROM new_oid')
-            conn.execute('UPDATE new_oid SET zoid = zoid + 1')
+            conn.execute('UPDATE new_oid SET zoid = zoid + ?', (range_count,))
             conn.commit()
-        return self._oid_range_around(row[0] + 1)
+        return self._oid_ranges_around(range(row[0] + 1, row[0] + range_count + 1))
 
     def reset_oid(self, cursor=None):
         with self.lock:
@@ -16,7 +16,7 @@ class MockOIDAllocator(AbstractRangedOIDAllocator):
     def _set_min_oid_from_range(self, cursor, n):
         raise NotImplementedError
 
-    def new_oids(self, cursor):
+    def new_oids(self, cursor, range_count=1):
         raise NotImplementedError
 
 class TestOIDAllocator(TestCase):
@@ -41,3 +41,9 @@ class TestOIDAllocator(TestCase):
     def test_range_around1_iterable(self):
         from ..oidallocator import _oid_range_around_iterable
         self.test_range_around1(_oid_range_around_iterable)
+
+    def test_ranges_around(self):
+        oids = self.alloc._oid_ranges_around([3, 1])
+        self.assertEqual(oids, list(range(48, 32, -1)) + list(range(16, 0, -1)))
+        self.assertEqual(self.alloc._oid_ranges_around(range(1, 2)),
+                         list(range(16, 0, -1)))
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Cache compression using optional third-party libraries.
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import threading
+
+try:
+    import lz4.block as lz4_block
+except ImportError:
+    lz4_block = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from relstorage._util import get_positive_integer_from_environ
+
+logger = __import__('logging').getLogger(__name__)
+
+
+def lz4_compress(data):
+    return lz4_block.compress(data)
+
+def lz4_decompress(data):
+    return lz4_block.decompress(data)
+
+
+class _ThreadCodecs(threading.local):
+    # zstandard compressors and decompressors may not be used by
+    # more than one thread at a time.
+    compressor = None
+    compressor_dict_id = None
+    decompressors = None
+
+class ZstdCodec(object):
+    """
+    Compresses and decompresses with Zstandard.
+
+    Decompression handles data compressed without a dictionary, or
+    with any dictionary passed to :meth:`add_dictionary`; each
+    compressed frame records the ID of the dictionary it needs.
+
+    If *train* is true, the first states we compress are kept as
+    samples until there are ``sample_bytes`` of them. Those are
+    used to train a dictionary of ``dictionary_size`` bytes, which
+    is used for everything compressed afterwards. Pickles of the same
+    classes share a lot of structure, so this works much better on
+    small states than compressing each state on its own. If a
+    dictionary is added with ``use=True`` before then (for example,
+    one read from a persistent cache file), no training happens.
+    """
+
+    #: How many bytes of samples to collect before training.
+    sample_bytes = get_positive_integer_from_environ('RS_CACHE_ZSTD_SAMPLE_BYTES',
+                                                     1024 * 1024)
+    #: The size of a trained dictionary.
+    dictionary_size = get_positive_integer_from_environ('RS_CACHE_ZSTD_DICT_BYTES',
+                                                        64 * 1024)
+    #: The zstd compression level.
+    level = 3
+
+    def __init__(self, train=False):
+        if zstandard is None:
+            raise ValueError("The zstandard package is required to use zstd compression")
+        self._dictionaries = {} # {dict_id: ZstdCompressionDict}
+        self._dictionary = None # The one we compress with
+        self._codecs = _ThreadCodecs()
+        self._lock = threading.Lock()
+        self._samples = [] if train else None
+        self._sampled_bytes = 0
+
+    @property
+    def dictionaries(self):
+        """
+        A list of ``(dict_id, dictionary_bytes)`` for each dictionary
+        known, with the one used for compression (if any) last.
+        """
+        current = self._dictionary
+        result = [
+            (dict_id, d.as_bytes())
+            for dict_id, d in self._dictionaries.items()
+            if d is not current
+        ]
+        if current is not None:
+            result.append((current.dict_id(), current.as_bytes()))
+        return result
+
+    def add_dictionary(self, dictionary_bytes, use=False):
+        """
+        Make a dictionary available for decompression, and, if *use*
+        is true, use it for compression.
+        """
+        dictionary = zstandard.ZstdCompressionDict(dictionary_bytes)
+        self._dictionaries[dictionary.dict_id()] = dictionary
+        if use:
+            self._dictionary = dictionary
+            self._samples = None
+        return dictionary.dict_id()
+
+    def can_decompress(self, data):
+        try:
+            dict_id = zstandard.get_frame_parameters(data).dict_id
+        except zstandard.ZstdError:
+            return False
+        return not dict_id or dict_id in self._dictionaries
+
+    def compress(self, data):
+        if self._samples is not None:
+            self._sample(data)
+
+        codecs = self._codecs
+        dictionary = self._dictionary
+        dict_id = dictionary.dict_id() if dictionary is not None else None
+        if codecs.compressor is None or codecs.compressor_dict_id != dict_id:
+            codecs.compressor = zstandard.ZstdCompressor(level=self.level,
+                                                         dict_data=dictionary)
+            codecs.compressor_dict_id = dict_id
+        return codecs.compressor.compress(data)
+
+    def decompress(self, data):
+        dict_id = zstandard.get_frame_parameters(data).dict_id if self._dictionaries else 0
+        codecs = self._codecs
+        decompressors = codecs.decompressors
+        if decompressors is None:
+            decompressors = codecs.decompressors = {}
+        try:
+            decompressor = decompressors[dict_id]
+        except KeyError:
+            decompressor = decompressors[dict_id] = zstandard.ZstdDecompressor(
+                dict_data=self._dictionaries[dict_id] if dict_id else None
+            )
+        return decompressor.decompress(data)
+
+    def _sample(self, data):
+        with self._lock:
+            samples = self._samples
+            if samples is None:
+                return
+            samples.append(bytes(data))
+            self._sampled_bytes += len(data)
+            if self._sampled_bytes < self.sample_bytes:
+                return
+            self._samples = None
+
+        try:
+            dictionary = zstandard.train_dictionary(self.dictionary_size, samples)
+        except zstandard.ZstdError:
+            logger.exception("Failed to train a compression dictionary from %d samples",
+                             len(samples))
+            return
+        logger.info("Trained compression dictionary %s from %d samples",
+                    dictionary.dict_id(), len(samples))
+        self._dictionaries[dictionary.dict_id()] = dictionary
+        self._dictionary = dictionary
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+A generational cache split into independent shards by OID.
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import threading
+from itertools import chain
+
+from relstorage._compat import iteroiditems
+
+from relstorage.cache import cache
+
+logger = __import__('logging').getLogger(__name__)
+
+
+class ShardedCache(object):
+    """
+    Implements the parts of :class:`relstorage.cache.cache.PyCache`
+    that :class:`relstorage.cache.local_client.LocalClient` uses by
+    dividing OIDs among *shard_count* separate ``PyCache`` objects.
+
+    Each shard has its own generations, sized to an equal part of
+    the total limits, and its own lock. Operations on a single OID
+    lock only the shard that holds it, and bulk operations (storing,
+    invalidating, freezing, aging) lock and process one shard at a
+    time, so no single operation holds up other threads for as long as
+    the same operation on one large cache.
+
+    Statistics and iteration cover all the shards.
+    """
+
+    __slots__ = (
+        '_shards',
+        '_locks',
+        '_shard_count',
+    )
+
+    def __init__(self, shard_count, eden, protected, probation):
+        self._shard_count = shard_count
+        self._shards = [
+            cache.PyCache(eden / shard_count,
+                          protected / shard_count,
+                          probation / shard_count)
+            for _ in range(shard_count)
+        ]
+        self._locks = [threading.Lock() for _ in range(shard_count)]
+
+    def _shard_index(self, oid):
+        return oid % self._shard_count
+
+    def _partition(self, items, key=lambda item: item[0]):
+        # Split *items* into one list per shard, preserving order.
+        shard_count = self._shard_count
+        partitions = [[] for _ in range(shard_count)]
+        for item in items:
+            partitions[key(item) % shard_count].append(item)
+        return partitions
+
+    def _each_shard(self, partitions):
+        # Yield ``(shard, partition)`` for non-empty partitions,
+        # holding the lock for the shard while the caller uses it.
+        for shard, lock, partition in zip(self._shards, self._locks, partitions):
+            if partition:
+                with lock:
+                    yield shard, partition
+
+    @property
+    def shards(self):
+        return list(self._shards)
+
+    # Stats
+
+    @property
+    def hits(self):
+        return sum(shard.hits for shard in self._shards)
+
+    @property
+    def misses(self):
+        return sum(shard.misses for shard in self._shards)
+
+    @property
+    def sets(self):
+        return sum(shard.sets for shard in self._shards)
+
+    @property
+    def limit(self):
+        return sum(shard.limit for shard in self._shards)
+
+    @property
+    def weight(self):
+        return sum(shard.weight for shard in self._shards)
+
+    def reset_stats(self):
+        for shard in self._shards:
+            shard.reset_stats()
+
+    # Mapping operations
+
+    def __bool__(self):
+        return any(self._shards)
+
+    __nonzero__ = __bool__
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def __contains__(self, oid):
+        return oid in self._shards[self._shard_index(oid)]
+
+    def get(self, oid):
+        return self._shards[self._shard_index(oid)].get(oid)
+
+    __getitem__ = peek = get
+
+    def __iter__(self):
+        return chain.from_iterable(self._shards)
+
+    def keys(self):
+        return chain.from_iterable(shard.keys() for shard in self._shards)
+
+    def iteritems(self):
+        return chain.from_iterable(shard.iteritems() for shard in self._shards)
+
+    def values(self):
+        return chain.from_iterable(shard.values() for shard in self._shards)
+
+    # Cache specific operations
+
+    def get_item_with_tid(self, oid, tid):
+        index = self._shard_index(oid)
+        with self._locks[index]:
+            return self._shards[index].get_item_with_tid(oid, tid)
+
+    def peek_item_with_tid(self, oid, tid):
+        index = self._shard_index(oid)
+        with self._locks[index]:
+            return self._shards[index].peek_item_with_tid(oid, tid)
+
+    def contains_oid_with_tid(self, oid, tid):
+        return self._shards[self._shard_index(oid)].contains_oid_with_tid(oid, tid)
+
+    def get_items_with_tids(self, oid_tids):
+        result = {}
+        for shard, partition in self._each_shard(self._partition(oid_tids)):
+            result.update(shard.get_items_with_tids(partition))
+        return result
+
+    def set_all_for_tid(self, tid_int, state_oid_iter, compress, value_limit):
+        partitions = self._partition(state_oid_iter, key=lambda item: item[1])
+        for shard, partition in self._each_shard(partitions):
+            shard.set_all_for_tid(tid_int, partition, compress, value_limit)
+
+    def add_MRUs(self, ordered_keys, return_count_only=False):
+        partitions = self._partition(ordered_keys)
+        del ordered_keys
+        results = [
+            shard.add_MRUs(partition, return_count_only)
+            for shard, partition in self._each_shard(partitions)
+        ]
+        if return_count_only:
+            return sum(results)
+        return list(chain.from_iterable(results))
+
+    def age_frequencies(self):
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.age_frequencies()
+
+    def delitems(self, oids_tids):
+        partitions = self._partition(iteroiditems(oids_tids))
+        for shard, partition in self._each_shard(partitions):
+            shard.delitems(dict(partition))
+
+    def del_oids(self, oids):
+        partitions = self._partition(oids, key=int)
+        for shard, partition in self._each_shard(partitions):
+            shard.del_oids(partition)
+
+    def freeze(self, oids_tids):
+        partitions = self._partition(iteroiditems(oids_tids))
+        for shard, partition in self._each_shard(partitions):
+            shard.freeze(dict(partition))
+
+    def __repr__(self):
+        return '<%s at 0x%x shards=%d len=%d>' % (
+            type(self).__name__, id(self), self._shard_count, len(self)
+        )
@@ -0,0 +1,514 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+A local cache kept in a memory-mapped file shared by all the processes
+on a host.
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import mmap
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError: # pragma: no cover
+    # Windows
+    fcntl = None
+
+from relstorage._compat import iteroiditems
+from relstorage._compat import OID_TID_MAP_TYPE as OidTMap
+
+logger = __import__('logging').getLogger(__name__)
+
+
+class SharedMemoryCache(object):
+    """
+    Implements the parts of :class:`relstorage.cache.cache.PyCache`
+    that :class:`relstorage.cache.local_client.LocalClient` uses by
+    storing states in a file at *path* that every process using the
+    same path maps into memory.
+
+    The file holds a fixed-size hash index of ``(oid, tid)`` keys
+    followed by a ring buffer of state data. New states are appended
+    to the ring, overwriting the oldest data when it wraps; the index
+    entries for overwritten data simply stop matching. Writers (in any
+    thread or process) are serialized with a lock on the file. Readers
+    take no lock: each index slot is protected by a sequence number
+    that is odd while the slot is being written (a seqlock), and the
+    state data is checked against a CRC stored in the slot, so a
+    reader that races a writer sees a miss rather than a torn value.
+
+    The state for a given ``(oid, tid)`` never changes, so the shared
+    data can be used by every process no matter what transactions it
+    is viewing. Whether a state is *frozen* (can be found with a TID
+    of None), on the other hand, depends on what the viewers in a
+    process can see, so frozen TIDs are kept for each process in
+    memory, and follow the rules documented for ``ICachedValue``.
+    Checkpoints written by :meth:`save_checkpoints` let a new process
+    treat the newest state of each object in the file as frozen once
+    the database has confirmed it (see :meth:`restore`).
+
+    Hit, miss and set statistics count this process only; the length
+    and weight describe the whole file. Entries are evicted in the
+    order they were written, so there is nothing to age.
+    """
+
+    # pylint:disable=too-many-instance-attributes,too-many-public-methods
+
+    MAGIC = b'RSSHMC01'
+
+    # magic, slot count, data size, head, count, weight,
+    # checkpoint (highest visible tid, complete since tid)
+    _header = struct.Struct('<8sQQQQQqq')
+    HEADER_SIZE = 128
+    _HEAD_OFFSET = 24
+    _COUNT_OFFSET = 32
+    _WEIGHT_OFFSET = 40
+    _CHECKPOINT_OFFSET = 48
+
+    # seq, oid, tid, pos, length, crc, flags
+    _slot = struct.Struct('<QqqQIII4x')
+    _u64 = struct.Struct('<Q')
+    _checkpoint = struct.Struct('<qq')
+
+    _FLAG_OCCUPIED = 1
+
+    #: How many slots, starting at the one an OID hashes to, may hold
+    #: states for that OID.
+    PROBES = 8
+
+    #: The index has one slot for each this many bytes of data.
+    BYTES_PER_SLOT = 256
+
+    __slots__ = (
+        'path',
+        'hits',
+        'misses',
+        'sets',
+        '_fd',
+        '_map',
+        '_lock',
+        '_slot_count',
+        '_data_size',
+        '_data_offset',
+        '_frozen',
+    )
+
+    def __init__(self, path, limit):
+        if fcntl is None: # pragma: no cover
+            raise NotImplementedError("Shared memory caches require POSIX file locking")
+        self.path = path
+        self.hits = self.misses = self.sets = 0
+        self._lock = threading.Lock()
+        self._frozen = OidTMap() # {oid: tid}, this process only.
+        self._map = None
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            with self._locked():
+                self._open(max(int(limit), mmap.PAGESIZE))
+        except:
+            os.close(self._fd)
+            raise
+
+    def _open(self, data_size):
+        fd = self._fd
+        file_size = os.fstat(fd).st_size
+        header = None
+        if file_size >= self.HEADER_SIZE:
+            os.lseek(fd, 0, os.SEEK_SET)
+            header = self._header.unpack(os.read(fd, self._header.size))
+            if header[0] != self.MAGIC:
+                header = None
+
+        if header is not None:
+            # Someone already laid out this file; use their sizes,
+            # even if we were configured differently.
+            _, slot_count, data_size = header[:3]
+        else:
+            slot_count = max(data_size // self.BYTES_PER_SLOT, self.PROBES)
+            logger.info("Creating shared memory cache at %s with %d bytes of data",
+                        self.path, data_size)
+
+        self._slot_count = slot_count
+        self._data_size = data_size
+        self._data_offset = self.HEADER_SIZE + slot_count * self._slot.size
+        total_size = self._data_offset + data_size
+
+        if header is None:
+            # New, empty, or not ours. Truncating first zeroes it.
+            os.ftruncate(fd, 0)
+            os.ftruncate(fd, total_size)
+        elif file_size < total_size:
+            raise ValueError("Shared memory cache %s is truncated" % (self.path,))
+
+        self._map = mmap.mmap(fd, total_size)
+        if header is None:
+            self._header.pack_into(self._map, 0, self.MAGIC, slot_count, data_size,
+                                   0, 0, 0, 0, 0)
+
+    @contextmanager
+    def _locked(self):
+        # flock() excludes other processes, but not other threads using
+        # the same file descriptor.
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            os.close(self._fd)
+
+    # Header fields
+
+    def _read_u64(self, offset):
+        return self._u64.unpack_from(self._map, offset)[0]
+
+    def _add_u64(self, offset, delta):
+        # Only while locked.
+        self._u64.pack_into(self._map, offset, self._read_u64(offset) + delta)
+
+    # Stats
+
+    @property
+    def limit(self):
+        return self._data_size
+
+    @property
+    def weight(self):
+        # Slots whose data has been overwritten still count until they
+        # are reused, so this can only be approximate.
+        return min(self._read_u64(self._WEIGHT_OFFSET), self._data_size)
+
+    def reset_stats(self):
+        self.hits = self.misses = self.sets = 0
+
+    # Slots
+
+    def _slot_offsets(self, oid):
+        slot_count = self._slot_count
+        start = oid % slot_count
+        slot_size = self._slot.size
+        base = self.HEADER_SIZE
+        for i in range(min(self.PROBES, slot_count)):
+            yield base + ((start + i) % slot_count) * slot_size
+
+    def _slots_for_oid(self, oid):
+        """
+        Yield ``(offset, tid, pos, length)`` for the stable slots
+        holding states for *oid* whose data hasn't been overwritten.
+        """
+        unpack = self._slot.unpack_from
+        mm = self._map
+        oldest_pos = self._read_u64(self._HEAD_OFFSET) - self._data_size
+        for offset in self._slot_offsets(oid):
+            seq, slot_oid, tid, pos, length, _, flags = unpack(mm, offset)
+            if (not seq & 1 and flags & self._FLAG_OCCUPIED
+                    and slot_oid == oid and pos >= oldest_pos):
+                yield offset, tid, pos, length
+
+    def _read(self, oid, tid):
+        """
+        Return the state stored for exactly *oid* and *tid*, or None.
+        """
+        mm = self._map
+        unpack = self._slot.unpack_from
+        for offset in self._slot_offsets(oid):
+            seq, slot_oid, slot_tid, pos, length, crc, flags = unpack(mm, offset)
+            if (seq & 1 or not flags & self._FLAG_OCCUPIED
+                    or slot_oid != oid or slot_tid != tid):
+                continue
+            start = self._data_offset + pos % self._data_size
+            state = mm[start:start + length]
+            if (self._read_u64(offset) != seq
+                    # The writer that reserves this space moves the head first.
+                    or self._read_u64(self._HEAD_OFFSET) > pos + self._data_size
+                    or zlib.crc32(state) & 0xffffffff != crc):
+                # Changed or overwritten while we looked.
+                return None
+            return state
+        return None
+
+    def _write_slot(self, offset, oid, tid, pos, length, crc, flags):
+        # Only while locked.
+        mm = self._map
+        seq = self._read_u64(offset)
+        self._u64.pack_into(mm, offset, seq + 1)
+        self._slot.pack_into(mm, offset, seq + 1, oid, tid, pos, length, crc, flags)
+        self._u64.pack_into(mm, offset, seq + 2)
+
+    def _clear_slot(self, offset, length):
+        # Only while locked.
+        self._write_slot(offset, 0, 0, 0, 0, 0, 0)
+        self._add_u64(self._COUNT_OFFSET, -1)
+        self._add_u64(self._WEIGHT_OFFSET, -length)
+
+    def _store(self, oid, tid, state):
+        # Only while locked. Returns whether the state is now stored.
+        data_size = self._data_size
+        length = len(state)
+        if length > data_size:
+            return False
+
+        head = self._read_u64(self._HEAD_OFFSET)
+        unpack = self._slot.unpack_from
+        mm = self._map
+        empty = None
+        oldest = None
+        oldest_pos = oldest_length = 0
+        for offset in self._slot_offsets(oid):
+            _, slot_oid, slot_tid, pos, slot_length, slot_crc, flags = unpack(mm, offset)
+            if not flags & self._FLAG_OCCUPIED:
+                if empty is None:
+                    empty = offset
+                continue
+            if slot_oid == oid and slot_tid == tid and head <= pos + data_size:
+                # Already here, and states never change. Other
+                # processes may compress differently, so different
+                # bytes don't mean a different state; keep theirs.
+                return True
+            if oldest is None or pos < oldest_pos:
+                oldest, oldest_pos, oldest_length = offset, pos, slot_length
+
+        if empty is None:
+            # Replace the slot whose data was written first.
+            self._clear_slot(oldest, oldest_length)
+            empty = oldest
+
+        # Reserve space in the ring. Each state is contiguous, so skip
+        # to the beginning if it doesn't fit at the end.
+        start = head % data_size
+        if start + length > data_size:
+            head += data_size - start
+            start = 0
+        self._u64.pack_into(mm, self._HEAD_OFFSET, head + length)
+
+        data_start = self._data_offset + start
+        mm[data_start:data_start + length] = state
+        self._write_slot(empty, oid, tid, head, length,
+                         zlib.crc32(state) & 0xffffffff, self._FLAG_OCCUPIED)
+        self._add_u64(self._COUNT_OFFSET, 1)
+        self._add_u64(self._WEIGHT_OFFSET, length)
+        return True
+
+    def _discard(self, oid, predicate):
+        # Only while locked.
+        for offset, tid, _, length in list(self._slots_for_oid(oid)):
+            if predicate(tid):
+                self._clear_slot(offset, length)
+
+    # Mapping operations
+
+    def __bool__(self):
+        return len(self) > 0
+
+    __nonzero__ = __bool__
+
+    def __len__(self):
+        return self._read_u64(self._COUNT_OFFSET)
+
+    def __contains__(self, oid):
+        return oid in self._frozen or any(True for _ in self._slots_for_oid(oid))
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        unpack = self._slot.unpack_from
+        mm = self._map
+        oldest_pos = self._read_u64(self._HEAD_OFFSET) - self._data_size
+        oids = set()
+        for i in range(self._slot_count):
+            _, oid, _, pos, _, _, flags = unpack(mm, self.HEADER_SIZE + i * self._slot.size)
+            if flags & self._FLAG_OCCUPIED and pos >= oldest_pos:
+                oids.add(oid)
+        return oids
+
+    def peek(self, oid):
+        """
+        Return the newest ``(state, tid)`` stored for *oid*, or None.
+        """
+        tids = sorted((slot[1] for slot in self._slots_for_oid(oid)), reverse=True)
+        for tid in tids:
+            state = self._read(oid, tid)
+            if state is not None:
+                return state, tid
+        return None
+
+    get = peek
+
+    # Cache specific operations
+
+    def peek_item_with_tid(self, oid, tid):
+        if tid is None:
+            tid = self._frozen.get(oid)
+            if tid is None:
+                return None
+        state = self._read(oid, tid)
+        if state is None:
+            return None
+        return state, tid
+
+    def get_item_with_tid(self, oid, tid):
+        result = self.peek_item_with_tid(oid, tid)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def contains_oid_with_tid(self, oid, tid):
+        if tid is None:
+            return oid in self._frozen
+        return any(slot[1] == tid for slot in self._slots_for_oid(oid))
+
+    def get_items_with_tids(self, oid_tids):
+        result = {}
+        for oid, tid in oid_tids:
+            value = self.get_item_with_tid(oid, tid)
+            if value is not None:
+                result[oid] = value
+        return result
+
+    def set_all_for_tid(self, tid_int, state_oid_iter, compress, value_limit):
+        with self._locked():
+            for state_bytes, oid_int, _ in state_oid_iter:
+                state_bytes = compress(state_bytes) if compress is not None else state_bytes
+                state_bytes = bytes(state_bytes) if state_bytes is not None else b''
+                if len(state_bytes) >= value_limit:
+                    # This value is too big, so don't cache it.
+                    continue
+                if self._store(oid_int, tid_int, state_bytes):
+                    self.sets += 1
+
+    def add_MRUs(self, ordered_keys, return_count_only=False):
+        added = []
+        with self._locked():
+            for oid, (state, tid, frozen, _) in ordered_keys:
+                if self._store(oid, tid, bytes(state or b'')):
+                    added.append(oid)
+                    if frozen:
+                        self._frozen[oid] = tid
+        if return_count_only:
+            return len(added)
+        return added
+
+    def age_frequencies(self):
+        "Does nothing; entries are evicted in the order they were written."
+
+    def delitems(self, oids_tids):
+        frozen = self._frozen
+        with self._locked():
+            for oid, tid in iteroiditems(oids_tids):
+                self._discard(oid, lambda slot_tid, tid=tid: slot_tid <= tid)
+                if frozen.get(oid, tid + 1) <= tid:
+                    del frozen[oid]
+
+    def del_oids(self, oids):
+        frozen = self._frozen
+        with self._locked():
+            for oid in oids:
+                self._discard(oid, lambda _: True)
+                frozen.pop(oid, None)
+
+    def freeze(self, oids_tids):
+        frozen = self._frozen
+        with self._locked():
+            for oid, tid in iteroiditems(oids_tids):
+                self._discard(oid, lambda slot_tid, tid=tid: slot_tid < tid)
+                if self.contains_oid_with_tid(oid, tid):
+                    frozen[oid] = tid
+                else:
+                    frozen.pop(oid, None)
+
+    def unfreeze(self, oids):
+        """
+        Stop treating any state of the *oids* as frozen in this
+        process, leaving the shared data alone.
+        """
+        for oid in oids:
+            self._frozen.pop(oid, None)
+
+    # Whole cache operations
+
+    def forget(self):
+        """
+        Discard what this process knows about the cache (its frozen
+        TIDs and statistics), leaving the shared data alone. Because
+        those states never change, they are still correct.
+        """
+        self._frozen.clear()
+        self.reset_stats()
+
+    def clear(self):
+        """
+        Remove all the data, for every process.
+        """
+        with self._locked():
+            for i in range(self._slot_count):
+                offset = self.HEADER_SIZE + i * self._slot.size
+                if self._slot.unpack_from(self._map, offset)[-1]:
+                    self._write_slot(offset, 0, 0, 0, 0, 0, 0)
+            # Anything written before now counts as overwritten.
+            self._add_u64(self._HEAD_OFFSET, self._data_size)
+            self._u64.pack_into(self._map, self._COUNT_OFFSET, 0)
+            self._u64.pack_into(self._map, self._WEIGHT_OFFSET, 0)
+            self._checkpoint.pack_into(self._map, self._CHECKPOINT_OFFSET, 0, 0)
+        self.forget()
+
+    def save_checkpoints(self, checkpoints):
+        """
+        Record the ``(highest_visible_tid, complete_since_tid)`` that
+        the process saving its cache had polled to.
+        """
+        with self._locked():
+            self._checkpoint.pack_into(self._map, self._CHECKPOINT_OFFSET, *checkpoints)
+
+    def restore(self):
+        """
+        Treat the newest state of every object in the file as
+        frozen, and return the last saved checkpoints.
+
+        As with the persistent cache files, the caller must then
+        check each of those against the database and
+        :meth:`unfreeze` those that are no longer current. If no
+        checkpoints were ever saved, nothing is frozen and None is
+        returned.
+        """
+        checkpoints = self._checkpoint.unpack_from(self._map, self._CHECKPOINT_OFFSET)
+        if not checkpoints[0]:
+            return None
+        frozen = self._frozen
+        for oid in self.keys():
+            tids = [slot[1] for slot in self._slots_for_oid(oid)]
+            if tids:
+                frozen[oid] = max(tids)
+        return checkpoints
+
+    def __repr__(self):
+        return '<%s at 0x%x path=%r len=%d>' % (
+            type(self).__name__, id(self), self.path, len(self) if self._map is not None else -1
+        )
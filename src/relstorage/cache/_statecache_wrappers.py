@@ -20,6 +20,7 @@ from __future__ import print_function
 
 from zope import interface
 
+from relstorage._compat import iteritems
 from relstorage.cache.interfaces import IStateCache
 
 @interface.implementer(IStateCache)
@@ -82,6 +83,17 @@ class MultiStateCache(object):
                 self.l[key] = result
         return result
 
+    def get_many(self, keys):
+        keys = list(keys)
+        result = self.l.get_many(keys)
+        if len(result) < len(keys):
+            missing = [key for key in keys if key[0] not in result]
+            from_global = self.g.get_many(missing)
+            for oid, value in iteritems(from_global):
+                self.l[(oid, value[1])] = value
+            result.update(from_global)
+        return result
+
     def __setitem__(self, key, value):
         self.l[key] = value
         self.g[key] = value
@@ -156,6 +168,18 @@ class TracingStateCache(object):
 
     get = __getitem__
 
+    def get_many(self, keys):
+        keys = list(keys)
+        result = self.cache.get_many(keys)
+        trace = self._trace
+        for oid_int, tid_int in keys:
+            cache_data = result.get(oid_int)
+            if cache_data:
+                trace(0x22, oid_int, tid_int, dlen=len(cache_data[0]))
+            else:
+                trace(0x20, oid_int)
+        return result
+
     def __setitem__(self, key, value):
         oid_int, _ = key
         state, tid_int = value
@@ -27,8 +27,15 @@
  * will copy in and out of it as necessary on access.
  *
  * The vast majority of the work will be done in cython cdef functions
- * operating only on C++ data structures. They must hold the GIL and they
- * must appear to be atomic; this allows the Python level to avoid extra locks.
+ * operating only on C++ data structures. The Cache is not itself
+ * thread safe; callers must serialize access to it. Anything that
+ * can create, copy out, or free a cached state (which, on CPython, is
+ * a PyObject*), or allocate or free an entry (which uses the Python
+ * allocator), must hold the GIL. That includes hits, because a hit in
+ * eden can cause other entries to be evicted. Operations that touch
+ * only C++ data, such as aging frequencies, may be called without the
+ * GIL. The Cython PyCache wrapper keeps other threads from using the
+ * Cache while it does that.
  *
  * All data will be owned by the Cache object, and when it is evicted
  * it may be removed from memory. If it is currently being used from
@@ -225,6 +232,12 @@ namespace cache {
 
             return static_cast<size_t>(s);
         }
+        /** Return the internal storage, which must not be modified. */
+        static inline const char* data(const PyObject*const & pickle)
+        {
+            assert(pickle);
+            return PyBytes_AS_STRING(const_cast<PyObject*&>(pickle));
+        }
         static inline bool eq(const PyObject*const& lhs,
                               const PyObject*const& rhs)
         {
@@ -271,6 +284,7 @@ namespace cache {
             return o;
         }
         static inline size_t size(const std::string& p) { return p.size(); }
+        static inline const char* data(const std::string& p) { return p.data(); }
         static inline bool eq(const std::string& lhs, const std::string& rhs) {
             return lhs == rhs;
         }
@@ -689,6 +703,15 @@ namespace cache {
             return _StateOperations::size(this->_pickle);
         }
 
+        /**
+         * The bytes of the state, valid (without copying) for as long
+         * as this object is.
+         */
+        const char* state_data() const
+        {
+            return _StateOperations::data(this->_pickle);
+        }
+
         bool state_eq(const Pickle_t& other) const
         {
             return _StateOperations::eq(this->_pickle, other);
@@ -43,6 +43,7 @@ cdef extern from "c_cache.h" namespace "relstorage::cache":
         # Using -1 for None
         object as_object()
         size_t size()
+        const char* state_data()
         bint operator==(SVCacheEntry&)
 
 
@@ -99,7 +100,7 @@ cdef extern from "c_cache.h" namespace "relstorage::cache":
         void delitem(OID_t key, TID_t tid) except +
         void freeze(OID_t key, TID_t tid) except +
         bool contains(OID_t key)
-        void age_frequencies()
+        void age_frequencies() nogil
         ICacheEntry* get(OID_t key)
         SVCacheEntry* get(OID_t, TID_t)
         SVCacheEntry* peek(OID_t, TID_t)
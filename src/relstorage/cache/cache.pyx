@@ -17,6 +17,12 @@ from cython.operator cimport dereference as deref
 from cython.operator cimport preincrement as preincr
 from cpython.buffer cimport PyBuffer_FillInfo
 from cpython.bytes cimport PyBytes_AsString # Does NOT copy
+from cpython.pythread cimport PyThread_type_lock
+from cpython.pythread cimport PyThread_allocate_lock
+from cpython.pythread cimport PyThread_free_lock
+from cpython.pythread cimport PyThread_acquire_lock
+from cpython.pythread cimport PyThread_release_lock
+from cpython.pythread cimport WAIT_LOCK
 
 from libcpp.pair cimport pair
 from libcpp.cast cimport static_cast
@@ -185,6 +191,16 @@ cdef class SingleValue(CachedValue):
             return len(other) == 2 and self.tid == other[1] and self.value == other[0]
         return NotImplemented
 
+    def __getbuffer__(self, Py_buffer* view, int flags):
+        # Expose the state without copying it. The view keeps us, and
+        # thus the entry and its state, alive.
+        PyBuffer_FillInfo(view, self,
+                          <void*>self.entry.state_data(), self.entry.size(),
+                          1, flags)
+
+    def __releasebuffer__(self, Py_buffer* view):
+        pass
+
     def __getitem__(self, int i):
         if i == 0:
             return self.state()
@@ -287,15 +303,54 @@ cdef class PyGeneration:
 
 @cython.final
 cdef class PyCache:
+    """
+    The Python interface to a :class:`Cache`.
+
+    Most operations must run with the GIL held: states are Python
+    objects, and both hits and stores can evict entries, releasing
+    those objects. The GIL is what keeps them from interfering with
+    each other.
+
+    Operations that work only with C++ data and can take a long time,
+    such as :meth:`age_frequencies`, release the GIL. While they run,
+    :attr:`_busy_without_gil` is true. Everything else checks it,
+    while holding the GIL, before touching the C++ cache, and if it is
+    set, waits for :attr:`_lock` (without the GIL). On the common path
+    this costs a single comparison.
+    """
     cdef Cache cache
+    cdef PyThread_type_lock _lock
+    cdef bint _busy_without_gil
+    cdef int _waiting
     cdef readonly size_t sets
     cdef readonly size_t hits
     cdef readonly size_t misses
 
     def __cinit__(self, eden, protected, probation):
+        self._lock = PyThread_allocate_lock()
+        if not self._lock:
+            raise MemoryError()
+        self._busy_without_gil = False
+        self._waiting = 0
         self.cache.resize(eden, protected, probation)
         self.sets = self.hits = self.misses = 0
 
+    def __dealloc__(self):
+        if self._lock:
+            PyThread_free_lock(self._lock)
+            self._lock = NULL
+
+    cdef void _wait_while_busy(self):
+        # Call this only if ``_busy_without_gil`` is set. When this
+        # returns, the caller holds the GIL and the cache is free;
+        # it stays free until the caller next runs Python code.
+        self._waiting += 1
+        while self._busy_without_gil:
+            with nogil:
+                PyThread_acquire_lock(self._lock, WAIT_LOCK)
+                PyThread_release_lock(self._lock)
+        self._waiting -= 1
+
     cpdef reset_stats(self):
         self.hits = self.sets = self.misses = 0
 
@@ -335,12 +390,16 @@ cdef class PyCache:
         return self.cache.size() > 0
 
     def __contains__(self, OID_t key):
+        if self._busy_without_gil:
+            self._wait_while_busy()
         return self.cache.contains(key)
 
     def __len__(self):
         return self.cache.size()
 
     cpdef CachedValue get(self, OID_t key):
+        if self._busy_without_gil:
+            self._wait_while_busy()
         entry = self.cache.get(key)
         if not entry:
             return None
@@ -350,6 +409,8 @@ cdef class PyCache:
         return self.get(key)
 
     cpdef object peek_item_with_tid(self, OID_t key, TID_t tid):
+        if self._busy_without_gil:
+            self._wait_while_busy()
         value = self.cache.peek(key, tid)
         if value:
             return python_from_entry_p(value)
@@ -361,6 +422,8 @@ cdef class PyCache:
         to do this will lead to memory leaks.
         """
         cdef TID_t native_tid = -1 if tid is None else tid
+        if self._busy_without_gil:
+            self._wait_while_busy()
         cdef SVCacheEntry* entry = self.cache.peek(key, native_tid)
         if not entry:
             return False
@@ -374,6 +437,8 @@ cdef class PyCache:
 
     cpdef get_item_with_tid(self, OID_t key, tid):
         cdef TID_t native_tid = -1 if tid is None else tid
+        if self._busy_without_gil:
+            self._wait_while_busy()
         cdef SVCacheEntry* cvalue = self.cache.get(key, native_tid)
 
         if cvalue:
@@ -382,6 +447,32 @@ cdef class PyCache:
 
         self.misses += 1
 
+    cpdef dict get_items_with_tids(self, oid_tids):
+        """
+        Look up each ``(oid, tid)`` pair in *oid_tids*.
+
+        Returns a dictionary ``{oid: SingleValue}`` for the keys
+        that were found. Keys that were not found are absent. Each key
+        counts as a hit or miss, just as with
+        :meth:`get_item_with_tid`.
+        """
+        cdef OID_t key
+        cdef TID_t native_tid
+        cdef SVCacheEntry* cvalue
+        cdef dict result = {}
+
+        for key, tid in oid_tids:
+            native_tid = -1 if tid is None else tid
+            if self._busy_without_gil:
+                self._wait_while_busy()
+            cvalue = self.cache.get(key, native_tid)
+            if cvalue:
+                self.hits += 1
+                result[key] = SingleValue.from_entry(cvalue)
+            else:
+                self.misses += 1
+        return result
+
     def __setitem__(self, OID_t key, tuple value):
         self._do_set(key, value[0], value[1])
 
@@ -389,6 +480,8 @@ cdef class PyCache:
         # Do all this down here so we don't give up the GIL.
         cdef object b_state = state if state is not None else b''
         cdef ProposedCacheEntry proposed = ProposedCacheEntry(key, tid, b_state)
+        if self._busy_without_gil:
+            self._wait_while_busy()
         if not self.cache.contains(key): # the long way to avoid type conversion
             self.cache.add_to_eden(proposed)
         else:
@@ -401,6 +494,8 @@ cdef class PyCache:
         self.sets += 1
 
     def __delitem__(self, OID_t key):
+        if self._busy_without_gil:
+            self._wait_while_busy()
         self.cache.delitem(key)
 
     def __iter__(self):
@@ -412,6 +507,8 @@ cdef class PyCache:
 
         This is not thread safe.
         """
+        if self._busy_without_gil:
+            self._wait_while_busy()
         it = self.cache.begin()
         end = self.cache.end()
 
@@ -431,6 +528,8 @@ cdef class PyCache:
 
         Not thread safe.
         """
+        if self._busy_without_gil:
+            self._wait_while_busy()
         it = self.cache.begin()
         end = self.cache.end()
 
@@ -444,6 +543,8 @@ cdef class PyCache:
 
         Not thread safe.
         """
+        if self._busy_without_gil:
+            self._wait_while_busy()
         it = self.cache.begin()
         end = self.cache.end()
 
@@ -457,6 +558,8 @@ cdef class PyCache:
 
         Not thread safe.
         """
+        if self._busy_without_gil:
+            self._wait_while_busy()
         it = self.cache.begin()
         end = self.cache.end()
 
@@ -498,6 +601,8 @@ cdef class PyCache:
         # We're done with ordered_keys, free its memory
         ordered_keys = None
 
+        if self._busy_without_gil:
+            self._wait_while_busy()
         added_oids = self.cache.add_many(filler)
 
         # Things that didn't get added have -1 for their generation.
@@ -509,7 +614,20 @@ cdef class PyCache:
         return result
 
     def age_frequencies(self):
-        self.cache.age_frequencies()
+        # This visits every entry, but touches no Python objects,
+        # so let other threads run Python code while it does.
+        while self._busy_without_gil or self._waiting:
+            # Let anyone that was waiting for the last time we did
+            # this go first.
+            with nogil:
+                PyThread_acquire_lock(self._lock, WAIT_LOCK)
+                PyThread_release_lock(self._lock)
+        self._busy_without_gil = True
+        with nogil:
+            PyThread_acquire_lock(self._lock, WAIT_LOCK)
+            self.cache.age_frequencies()
+            PyThread_release_lock(self._lock)
+        self._busy_without_gil = False
 
     def delitems(self, oids_tids):
         """
@@ -520,6 +638,8 @@ cdef class PyCache:
         cdef TID_t tid
 
         for oid, tid in iteroiditems(oids_tids):
+            if self._busy_without_gil:
+                self._wait_while_busy()
             self.cache.delitem(oid, tid)
 
     def del_oids(self, oids):
@@ -527,6 +647,8 @@ cdef class PyCache:
         For each oid in OIDs, remove it.
         """
         for oid in oids:
+            if self._busy_without_gil:
+                self._wait_while_busy()
             self.cache.delitem(oid)
 
     def freeze(self, oids_tids):
@@ -536,6 +658,8 @@ cdef class PyCache:
         cdef TID_t tid
 
         for oid, tid in iteroiditems(oids_tids):
+            if self._busy_without_gil:
+                self._wait_while_busy()
             self.cache.freeze(oid, tid)
 
     @property
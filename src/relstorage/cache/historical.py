@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Support for caching historical (``loadBefore``) loads.
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import threading
+from collections import OrderedDict
+
+from relstorage._util import get_positive_integer_from_environ
+
+logger = __import__('logging').getLogger(__name__)
+
+class RevisionRangeIndex(object):
+    """
+    Remembers the range of transactions during which each loaded
+    historical revision of an object was current.
+
+    A revision that was current from *start_tid* up to (but not
+    including) *end_tid* is the answer to ``loadBefore(oid, tid)`` for
+    every *tid* in ``(start_tid, end_tid]``. Once a later revision
+    exists, that range can never change, so these ranges can be used
+    to find the state for such a load in the cache (where it is kept
+    under ``(oid, start_tid)``) without asking the database. Ranges
+    that are still open (the revision is current) are not kept.
+
+    One instance is shared by the whole process. It holds the ranges
+    of at most ``max_oids`` objects, and at most ``max_ranges_per_oid``
+    for each of those; the objects least recently updated are
+    discarded first.
+    """
+
+    #: The maximum number of OIDs we will remember ranges for.
+    max_oids = get_positive_integer_from_environ('RS_CACHE_MAX_REVISION_RANGE_OIDS', 100000)
+
+    #: The maximum number of ranges we will remember for each OID.
+    max_ranges_per_oid = 8
+
+    __slots__ = (
+        '_ranges',
+        '_lock',
+    )
+
+    def __init__(self):
+        # {oid: ((start_tid, end_tid),...)}. The tuples are replaced,
+        # never changed, so they can be read without the lock.
+        self._ranges = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ranges)
+
+    def range_before(self, oid, tid):
+        """
+        If we know which revision of *oid* was current just before
+        *tid*, return ``(start_tid, end_tid)`` for it. Otherwise, return
+        None.
+        """
+        with self._lock:
+            ranges = self._ranges.get(oid, ())
+        for start_tid, end_tid in ranges:
+            if start_tid < tid <= end_tid:
+                return start_tid, end_tid
+        return None
+
+    def add(self, oid, start_tid, end_tid):
+        """
+        Record that the revision of *oid* written in *start_tid* was
+        replaced in *end_tid*.
+        """
+        ranges = self._ranges
+        with self._lock:
+            existing = ranges.pop(oid, ())
+            if (start_tid, end_tid) not in existing:
+                existing = (existing + ((start_tid, end_tid),))[-self.max_ranges_per_oid:]
+            ranges[oid] = existing
+
+            while len(ranges) > self.max_oids:
+                ranges.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._ranges.clear()
+
+    def stats(self):
+        return {
+            'tracked OIDs': len(self._ranges),
+            'max OIDs': self.max_oids,
+        }
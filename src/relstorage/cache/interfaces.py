@@ -124,6 +124,19 @@ class IStateCache(Interface):
         such as statistics or most/least recently used lists.
         """
 
+    def get_many(oid_tids):
+        """
+        Look up each of the ``(oid, tid)`` pairs in the iterable *oid_tids*.
+
+        Return a dictionary ``{oid: (state_bytes, tid_int)}`` for the
+        pairs that are in the cache; pairs that are not in the cache
+        are omitted. The same rules about a tid of None apply as for
+        :meth:`__getitem__`.
+
+        Implementations should make this a single bulk operation
+        where possible.
+        """
+
     def __setitem__(oid_tid, state_bytes_tid):
         """
         Store the *state_bytes_tid* (``(state_bytes, tid_int)``) for
@@ -16,6 +16,7 @@ from __future__ import division
 from __future__ import print_function
 
 import bz2
+import threading
 import time
 import zlib
 
@@ -29,7 +30,10 @@ from relstorage._util import byte_display
 from relstorage._util import timer as _timer
 from relstorage._util import log_timed as _log_timed
 from relstorage._util import consume
+from relstorage._util import thread_spawn
 from relstorage._compat import OID_TID_MAP_TYPE as OidTMap
+from relstorage._compat import OID_SET_TYPE as OidSet
+from relstorage._compat import iteritems
 from relstorage.interfaces import Int
 
 from relstorage.cache.interfaces import IStateCache
@@ -45,6 +49,13 @@ from relstorage.cache.persistence import FAILURE_TO_OPEN_DB_EXCEPTIONS
 from relstorage.cache.local_database import Database
 
 from relstorage.cache import cache
+from relstorage.cache._sharded import ShardedCache
+from relstorage.cache._shared_memory import SharedMemoryCache
+from relstorage.cache._compression import lz4_block
+from relstorage.cache._compression import lz4_compress
+from relstorage.cache._compression import lz4_decompress
+from relstorage.cache._compression import zstandard
+from relstorage.cache._compression import ZstdCodec
 
 logger = __import__('logging').getLogger(__name__)
 
@@ -148,6 +159,31 @@ interface.classImplements(cache.PyCache, IGenerationalLRUCache)
 interface.classImplements(cache.PyGeneration, IGeneration)
 
 
+class _BackgroundCheckpointer(object):
+    """
+    Calls :meth:`LocalClient.checkpoint` every *interval* seconds in
+    a daemon thread until stopped.
+    """
+
+    def __init__(self, local_client, interval, get_checkpoints):
+        self._local_client = local_client
+        self._interval = interval
+        self._get_checkpoints = get_checkpoints
+        self._stopped = threading.Event()
+        self._thread = thread_spawn(self.run, daemon=True)
+
+    def run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                self._local_client.checkpoint(self._get_checkpoints())
+            except Exception: # pylint:disable=broad-except
+                logger.exception("Failed to write the persistent cache in the background")
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+
 @interface.implementer(IStateCache,
                        IPersistentCache)
 class LocalClient(object):
@@ -171,12 +207,21 @@ class LocalClient(object):
     _compression_markers = {
         'zlib': (b'.z', zlib.compress),
         'bz2': (b'.b', bz2.compress),
+        'lz4': (b'.l', lz4_compress),
+        # Zstandard compressors belong to each instance; with zstd-dict,
+        # they train a dictionary. Both produce the same frames.
+        'zstd': (b'.s', None),
+        'zstd-dict': (b'.s', None),
         'none': (None, None)
     }
     _decompression_functions = {
         b'.z': zlib.decompress,
         b'.b': bz2.decompress
     }
+    if lz4_block is not None:
+        _decompression_functions[b'.l'] = lz4_decompress
+
+    _zstd = None
 
     # What multiplier of the number of items in the cache do we apply
     # to determine when to age the frequencies?
@@ -191,6 +236,17 @@ class LocalClient(object):
     # Things copied from self._cache
     _peek = None
 
+    # The OIDs stored since the last checkpoint, when we write
+    # checkpoints; otherwise None. Guarded by _dirty_lock.
+    _dirty_oids = None
+    _checkpointer = None
+
+    # When we read the persistent cache on demand, the open Database
+    # and the OIDs whose rows we've offered to be checked.
+    # Guarded by _lazy_lock.
+    _lazy_db = None
+    _lazy_checked = None
+
     def __init__(self, options,
                  prefix=None):
         self.options = options
@@ -209,6 +265,14 @@ class LocalClient(object):
         self._cache = None
 
         self.flush_all()
+        if (options.cache_local_dir and options.cache_local_checkpoint_interval
+                and not self._shared):
+            self._dirty_oids = set()
+            self._dirty_lock = threading.Lock()
+            # Only one write to the persistent cache at a time.
+            self._checkpoint_lock = threading.Lock()
+        if options.cache_local_dir and options.cache_local_dir_lazy and not self._shared:
+            self._lazy_lock = threading.Lock()
         self.__initial_weight = self._cache.weight
 
         compression_module = options.cache_local_compression
@@ -217,8 +281,28 @@ class LocalClient(object):
         except KeyError:
             raise ValueError("Unknown compression module")
         else:
+            if compression_module == 'lz4' and lz4_block is None:
+                raise ValueError("The lz4 package is required to use lz4 compression")
+            if compression_module.startswith('zstd') or zstandard is not None:
+                # Even if we don't compress with it, we may need to
+                # decompress persistent data.
+                train = compression_module == 'zstd-dict'
+                if train and self._shared:
+                    # A dictionary trained by one process can't be used
+                    # by the others to read what it wrote.
+                    logger.warning(
+                        "Not training a zstd dictionary for the shared memory "
+                        "cache at %s; using zstd without one.",
+                        options.cache_local_shared_path)
+                    train = False
+                self._zstd = ZstdCodec(train=train)
+                self._decompression_functions = dict(self._decompression_functions)
+                self._decompression_functions[b'.s'] = self._zstd.decompress
+
             self.__compression_marker = compression_markers[0]
             self.__compress = compression_markers[1]
+            if compression_module.startswith('zstd'):
+                self.__compress = self._zstd.compress
             if self.__compress is None:
                 self._compress = None
 
@@ -244,6 +328,17 @@ class LocalClient(object):
             return data
         return self._decompression_functions[pfx](data[2:])
 
+    def _can_decompress(self, data):
+        # Whether we have what we need to decompress data (e.g., in a
+        # persistent cache file) that may have been compressed by another
+        # process with a different configuration.
+        pfx = data[:2]
+        if pfx == b'.s':
+            return self._zstd is not None and self._zstd.can_decompress(data[2:])
+        if pfx == b'.l':
+            return lz4_block is not None
+        return True
+
     def _compress(self, data): # pylint:disable=method-hidden
         # We override this if we're disabling compression
         # altogether.
@@ -259,6 +354,16 @@ class LocalClient(object):
     @_log_timed
     def save(self, object_index=None, checkpoints=None, **sqlite_args):
         options = self.options
+        if self._shared:
+            # The file is already persistent. Let the next process
+            # know how far to trust it.
+            if checkpoints:
+                self._cache.save_checkpoints(checkpoints)
+                return 1
+            return 0
+        if self._dirty_oids is not None:
+            # Everything else is already written.
+            return 1 if self.checkpoint(checkpoints, **sqlite_args) is not None else 0
         if options.cache_local_dir and self.size > self.__initial_weight:
             try:
                 conn = sqlite_connect(options, self.prefix,
@@ -273,20 +378,84 @@ class LocalClient(object):
             # something.
             return 1
 
+    def start_checkpoints(self, get_checkpoints):
+        """
+        If ``cache-local-checkpoint-interval`` is set, begin calling
+        :meth:`checkpoint` that often in a background thread, until
+        :meth:`close`. *get_checkpoints* is called each time to find
+        the checkpoints to record.
+        """
+        if self._dirty_oids is None or self._checkpointer is not None:
+            return
+        self._checkpointer = _BackgroundCheckpointer(
+            self,
+            self.options.cache_local_checkpoint_interval,
+            get_checkpoints)
+
+    def stop_checkpoints(self):
+        checkpointer = self._checkpointer
+        self._checkpointer = None
+        if checkpointer is not None:
+            checkpointer.stop()
+
+    @_log_timed
+    def checkpoint(self, checkpoints=None, **sqlite_args):
+        """
+        Write the newest states of the objects stored since the last
+        checkpoint to the persistent cache, and record *checkpoints*.
+
+        This is only possible when ``cache-local-checkpoint-interval``
+        is set. Returns the number of states written, or None if
+        nothing could be written.
+        """
+        if self._dirty_oids is None:
+            return None
+        with self._checkpoint_lock:
+            with self._dirty_lock:
+                oids = self._dirty_oids
+                self._dirty_oids = set()
+            if not oids and not checkpoints:
+                return 0
+            try:
+                conn = sqlite_connect(self.options, self.prefix,
+                                      **sqlite_args)
+            except FAILURE_TO_OPEN_DB_EXCEPTIONS:
+                logger.exception("Failed to open sqlite to write")
+                self.__mark_dirty(oids)
+                return None
+
+            with closing(conn):
+                try:
+                    return self.write_to_sqlite(conn, checkpoints, oids=oids)
+                except:
+                    self.__mark_dirty(oids)
+                    raise
+
+    def __mark_dirty(self, oids):
+        with self._dirty_lock:
+            self._dirty_oids.update(oids)
+
     def restore(self):
         """
         Load the data from the persistent database.
 
         Returns the checkpoint data last saved, which may be None if
         there was no data.
+
+        With ``cache-local-dir-lazy``, no data is loaded; instead,
+        the database is kept open to be read on demand.
         """
         options = self.options
+        if self._shared:
+            return self._cache.restore()
         if options.cache_local_dir:
             try:
                 conn = sqlite_connect(options, self.prefix)
             except FAILURE_TO_OPEN_DB_EXCEPTIONS:
                 logger.exception("Failed to read data from sqlite")
                 return
+            if options.cache_local_dir_lazy:
+                return self._open_persisted(conn)
             with closing(conn):
                 return self.read_from_sqlite(conn)
 
@@ -296,6 +465,10 @@ class LocalClient(object):
         Remove data from the persistent cache for the given oids.
         """
         options = self.options
+        if self._shared:
+            # Older states of these objects are still correct.
+            self._cache.unfreeze(bad_oids)
+            return
         if not options.cache_local_dir:
             return
 
@@ -311,26 +484,45 @@ class LocalClient(object):
         logger.debug("Removed %d invalid OIDs from %s", count_removed, conn)
 
     def zap_all(self):
+        self._close_persisted()
         _, destroy = sqlite_files(self.options, self.prefix)
         destroy()
+        if self._shared:
+            self._cache.clear()
         # zapping happens frequently during test runs,
         # and during zodbconvert when the process will exist
         # only for a short time.
         self.flush_all()
 
+    @property
+    def _shared(self):
+        return isinstance(self._cache, SharedMemoryCache)
+
     def flush_all(self):
-        if self._cache or self._cache is None:
+        if self._shared:
+            # Other processes are still using the data, and it can't be
+            # out of date; just forget what we know about it.
+            self._cache.forget()
+        elif self._cache or self._cache is None:
             # Only actually abandon the cache object
             # if it has data. Otherwise let it keep the
             # preallocated CFFI objects it may have
             # (those are expensive to create and tests call
             # this a LOT)
             byte_limit = self.limit
-            self._cache = cache.PyCache(
+            generation_limits = (
                 byte_limit * self._gen_eden_pct,
                 byte_limit * self._gen_protected_pct,
                 byte_limit * self._gen_probation_pct
             )
+            shared_path = self.options.cache_local_shared_path
+            shard_count = self.options.cache_local_shards
+            if shared_path and byte_limit:
+                self._cache = SharedMemoryCache(shared_path, byte_limit)
+            elif shard_count and shard_count > 1:
+                self._cache = ShardedCache(shard_count, *generation_limits)
+            else:
+                self._cache = cache.PyCache(*generation_limits)
         self._peek = self._cache.peek
         self.reset_stats()
 
@@ -364,17 +556,142 @@ class LocalClient(object):
             value = self._cache.peek_item_with_tid(oid, tid)
         else:
             value = self._cache.get_item_with_tid(oid, tid)
+        if value is None and self._lazy_db is not None:
+            value = self._get_persisted(oid, tid)
 
         # Finally, decompress if needed.
         # Recall that for deleted objects, `state` can be None.
-        # TODO: This is making a copy of the string from C++ even if we
-        # don't need to decompress.
+        # On PyPy, this makes a copy of the string from C++ even if we
+        # don't need to decompress; get_view() doesn't.
         if value is not None:
             state, tid = value
+            if state and self._shared and not self._can_decompress(state):
+                # Another process stored it with a compression we
+                # can't read.
+                return None
             return ((decompress(state) if state else state), tid)
 
     __getitem__ = get
 
+    def get_view(self, oid_tid, peek=False):
+        """
+        Like :meth:`get`, but the state is returned as a read-only
+        :class:`memoryview`.
+
+        When the state isn't compressed, the view refers directly to
+        the memory the cache holds it in, avoiding a copy (on
+        PyPy, :meth:`get` must copy it); holding the view keeps that
+        memory alive even if the entry is evicted. Callers must be
+        able to use any bytes-like object.
+        """
+        oid, tid = oid_tid
+        assert tid is None or tid >= 0
+        if peek:
+            value = self._cache.peek_item_with_tid(oid, tid)
+        else:
+            value = self._cache.get_item_with_tid(oid, tid)
+        if value is None and self._lazy_db is not None:
+            value = self._get_persisted(oid, tid)
+        if value is None:
+            return None
+
+        if isinstance(value, tuple):
+            # The backing storage has already made a copy.
+            state, tid = value
+            if state and self._shared and not self._can_decompress(state):
+                return None
+            state = memoryview(state)
+        else:
+            state = memoryview(value)
+            tid = value.tid
+
+        pfx = state[:2].tobytes()
+        if pfx in self._decompression_functions:
+            state = memoryview(self._decompression_functions[pfx](state[2:].tobytes()))
+        return state, tid
+
+    def get_many(self, oid_tids):
+        # One trip into the native cache for all the keys.
+        decompress = self._decompress
+        if self._lazy_db is not None:
+            oid_tids = list(oid_tids)
+        values = self._cache.get_items_with_tids(oid_tids)
+        if self._lazy_db is not None:
+            for oid, tid in oid_tids:
+                if oid not in values:
+                    value = self._get_persisted(oid, tid)
+                    if value is not None:
+                        values[oid] = value
+        if self._shared:
+            can_decompress = self._can_decompress
+            values = {
+                oid: value
+                for oid, value in iteritems(values)
+                if not value[0] or can_decompress(value[0])
+            }
+        return {
+            oid: ((decompress(state) if state else state), tid)
+            for oid, (state, tid) in iteritems(values)
+        }
+
+    def _get_persisted(self, oid, tid):
+        """
+        Look for exactly the state of *oid* at *tid* in the
+        persistent cache, and if it's there, store it in memory.
+
+        Returns the ``(state, tid)`` pair, with the state as stored
+        (compressed), or None.
+        """
+        if tid is None:
+            # Whether the row is current is unknown; see persisted_tids().
+            return None
+        with self._lazy_lock:
+            if self._lazy_db is None:
+                return None
+            row = self._lazy_db.fetch_row(oid)
+        if row is None or row[1] != tid or not self._can_decompress(row[0]):
+            return None
+        # The row is already compressed, and it is already persistent.
+        self._cache.set_all_for_tid(tid, [(row[0], oid, None)], None, self._value_limit)
+        return row
+
+    def persisted_tids(self, oids):
+        """
+        When reading the persistent cache on demand, return the ``{oid:
+        tid}`` of the states stored in it for the *oids* not already
+        returned by this method.
+
+        A state is only used (by :meth:`get`) when asked for
+        by its exact TID, so only if the caller has confirmed it's
+        current. Otherwise, returns an empty dictionary.
+        """
+        result = {}
+        if self._lazy_db is None:
+            return result
+        with self._lazy_lock:
+            db = self._lazy_db
+            if db is None:
+                return result
+            checked = self._lazy_checked
+            for oid in oids:
+                if oid in checked:
+                    continue
+                checked.add(oid)
+                tid = db.fetch_tid(oid)
+                if tid is not None:
+                    result[oid] = tid
+        return result
+
+    def _close_persisted(self):
+        if self._lazy_db is None:
+            return
+        with self._lazy_lock:
+            db = self._lazy_db
+            self._lazy_db = None
+            self._lazy_checked = None
+        if db is not None:
+            db.close()
+
     def _age(self):
         # Age only when we're full and would thus need to evict; this
         # makes initial population faster. It's cheaper to calculate this
@@ -389,7 +706,8 @@ class LocalClient(object):
         # cache entries.
         #
         # We don't take a lock to do this; it's fine if two threads
-        # attempt it at the same time.
+        # attempt it at the same time. The aging itself releases the GIL,
+        # so other threads can keep running (but not using the cache).
         age_period = self._age_factor * len(self._cache)
         operations = self._cache.hits + self._cache.sets
         if operations - self._aged_at < age_period:
@@ -425,6 +743,9 @@ class LocalClient(object):
 
     def set_all_for_tid(self, tid_int, state_oid_iter):
         if self.limit:
+            if self._dirty_oids is not None:
+                state_oid_iter = list(state_oid_iter)
+                self.__mark_dirty([oid for _, oid, _ in state_oid_iter])
             self._cache.set_all_for_tid(tid_int, state_oid_iter, self._compress, self._value_limit)
             # Inline some of the logic about whether to age or not; avoiding the
             # call helps speed
@@ -448,10 +769,16 @@ class LocalClient(object):
         self._cache.freeze(oids_tids)
 
     def close(self):
+        self.stop_checkpoints()
+        self._close_persisted()
+        if self._shared:
+            # The data stays in the file for other processes; release
+            # our descriptor and mapping of it.
+            self._cache.close()
+
+    def release(self):
         pass
 
-    release = close
-
     def new_instance(self):
         return self
 
@@ -498,6 +825,24 @@ class LocalClient(object):
         return log_count, stored
 
 
+    def _read_compression_dictionaries(self, db):
+        if self._zstd is not None:
+            # Oldest first, so that we compress with the newest.
+            use = self.options.cache_local_compression == 'zstd-dict'
+            for _, dictionary in db.compression_dictionaries:
+                self._zstd.add_dictionary(dictionary, use=use)
+
+    def _open_persisted(self, connection):
+        db = Database.from_connection(connection)
+        self._read_compression_dictionaries(db)
+        checkpoints = db.checkpoints
+        self._close_persisted()
+        with self._lazy_lock:
+            self._lazy_db = db
+            self._lazy_checked = OidSet()
+        logger.info("Reading %s on demand", connection)
+        return checkpoints
+
     @_log_timed
     def read_from_sqlite(self, connection):
         import gc
@@ -506,6 +851,7 @@ class LocalClient(object):
 
         db = Database.from_connection(connection)
         checkpoints = db.checkpoints
+        self._read_compression_dictionaries(db)
 
         @_log_timed
         def fetch_and_filter_rows():
@@ -526,8 +872,11 @@ class LocalClient(object):
             size = 0
             limit = self.limit
             items = []
+            can_decompress = self._can_decompress
             rows = db.fetch_rows_by_priority()
             for oid, frozen, state, actual_tid, frequency in rows:
+                if not can_decompress(state):
+                    continue
                 size += len(state)
                 if size > limit:
                     break
@@ -544,9 +893,17 @@ class LocalClient(object):
                           mem_usage_before=mem_before)
         return checkpoints
 
-    def _items_to_write(self, stored_oid_tid):
+    def _items_to_write(self, stored_oid_tid, oids=None):
         # pylint:disable=too-many-locals
         all_entries_len = len(self._cache)
+        if oids is None:
+            entries = self._cache.iteritems()
+        else:
+            # Just these, if they're still cached.
+            peek = self._peek
+            entries = ((oid, peek(oid)) for oid in oids)
+            entries = ((oid, entry) for oid, entry in entries if entry is not None)
+            all_entries_len = len(oids)
 
         # Only write the newest entry for each OID.
 
@@ -591,7 +948,7 @@ class LocalClient(object):
         # this function shows as about 3% of the total time to save
         # in a very large database.
         with _timer() as t:
-            for oid, lru_entry in self._cache.iteritems():
+            for oid, lru_entry in entries:
                 newest_value = lru_entry.newest_value
                 # We must have something at least this fresh
                 # to consider writing it out
@@ -626,7 +983,15 @@ class LocalClient(object):
             t.duration)
 
     @_log_timed
-    def write_to_sqlite(self, connection, checkpoints, object_index=None):
+    def write_to_sqlite(self, connection, checkpoints, object_index=None, oids=None):
+        """
+        Write the newest states of our objects that aren't already in
+        the database.
+
+        If *oids* is given, only those objects are considered. The
+        states in the database aren't fetched to compare; rows already
+        there for the same or a newer TID are kept instead.
+        """
         # pylint:disable=too-many-locals
         mem_before = get_memory_usage()
         object_index = object_index or OidTMap()
@@ -646,9 +1011,9 @@ class LocalClient(object):
         # 3.7.11, 2012-03-20.
         with _timer() as batch_timer:
             cur.execute('BEGIN')
-            stored_oid_tid = db.oid_to_tid
+            stored_oid_tid = db.oid_to_tid if oids is None else OidTMap()
             fetch_current = time.time()
-            count_written, _ = db.store_temp(self._items_to_write(stored_oid_tid))
+            count_written, _ = db.store_temp(self._items_to_write(stored_oid_tid, oids))
             cur.execute("COMMIT")
 
 
@@ -707,6 +1072,8 @@ class LocalClient(object):
             rows_inserted = db.move_from_temp()
             if checkpoints:
                 db.update_checkpoints(*checkpoints)
+            if self._zstd is not None and self._zstd.dictionaries:
+                db.store_compression_dictionaries(self._zstd.dictionaries)
 
             cur.execute('COMMIT')
         # TODO: Maybe use BTrees.family.intersection to get the common keys?
@@ -121,8 +121,17 @@ class Database(ABC):
 
     CREATE INDEX IF NOT EXISTS IX_object_state_f_tid
     ON object_state (frequency DESC, tid DESC);
+
+    CREATE TABLE IF NOT EXISTS compression_dictionaries (
+        id INTEGER PRIMARY KEY,
+        dict_id INTEGER NOT NULL UNIQUE,
+        dictionary BLOB NOT NULL
+    );
     """
 
+    #: How many compression dictionaries to keep.
+    max_compression_dictionaries = 4
+
     # Without the CAST AS BLOB, if a value went in with text affinity,
     # (which happens essentially always under Python 2 but if we've done
     # things right never under Python 3) LENGTH will stop at an embedded
@@ -151,6 +160,62 @@ class Database(ABC):
         all the data in the database.
         """)
 
+    @property
+    def compression_dictionaries(self):
+        """
+        A list of ``(dict_id, dictionary)`` for the stored compression
+        dictionaries, least recently stored first.
+        """
+        cur = self.connection.execute(
+            'SELECT dict_id, dictionary FROM compression_dictionaries ORDER BY id'
+        )
+        with closing(cur):
+            return [(dict_id, bytes(d)) for dict_id, d in cur.fetchall()]
+
+    def store_compression_dictionaries(self, dictionaries):
+        """
+        Store the ``(dict_id, dictionary)`` pairs, in order, as the most
+        recently stored, discarding the oldest dictionaries if there are
+        too many. States compressed with a discarded dictionary can
+        no longer be read.
+        """
+        cur = self.cursor
+        cur.executemany(
+            'INSERT OR REPLACE INTO compression_dictionaries (dict_id, dictionary) '
+            'VALUES (?, ?)',
+            [(dict_id, sqlite3.Binary(d)) for dict_id, d in dictionaries]
+        )
+        cur.execute("""
+        DELETE FROM compression_dictionaries
+        WHERE id NOT IN (
+            SELECT id FROM compression_dictionaries ORDER BY id DESC LIMIT ?
+        )
+        """, (self.max_compression_dictionaries,))
+
+    def fetch_row(self, oid):
+        """
+        Return the ``(state, tid)`` stored for *oid*, or None.
+        """
+        cur = self.connection.execute(
+            'SELECT CAST(state AS BLOB), tid FROM object_state WHERE zoid = ?',
+            (oid,)
+        )
+        with closing(cur):
+            row = cur.fetchone()
+        return (bytes(row[0]), row[1]) if row is not None else None
+
+    def fetch_tid(self, oid):
+        """
+        Return the tid stored for *oid*, or None.
+        """
+        cur = self.connection.execute(
+            'SELECT tid FROM object_state WHERE zoid = ?',
+            (oid,)
+        )
+        with closing(cur):
+            row = cur.fetchone()
+        return row[0] if row is not None else None
+
     @property
     def checkpoints(self):
         """
@@ -86,6 +86,22 @@ class MemcacheStateCache(object):
 
     get = __getitem__
 
+    def get_many(self, oid_tids):
+        # We don't support frozen keys, only those in the index
+        cachekeys = {
+            self.__oid_tid_to_key(oid, tid): oid
+            for oid, tid in oid_tids
+            if tid is not None
+        }
+        if not cachekeys:
+            return {}
+        response = self.client.get_multi(list(cachekeys)) or {}
+        result = {}
+        for key, data in iteritems(response):
+            if data and len(data) >= 8:
+                result[cachekeys[key]] = (data[8:], u64(data[:8]))
+        return result
+
     def __contains__(self, oid_tid):
         return self[oid_tid] is not None
 
@@ -20,6 +20,7 @@ from __future__ import division
 from __future__ import print_function
 
 import os
+import threading
 from logging import DEBUG as LDEBUG
 
 from zope.interface import implementer
@@ -366,6 +367,24 @@ class _ObjectIndex(object):
     def keys(self):
         return OidTMap_multiunion(self.maps)
 
+    def newest_items(self, oids=None):
+        """
+        Return a new map from each OID in this index to the newest TID
+        indexed for it. If *oids* is given, only those OIDs are
+        included.
+
+        The maps are sorted, so rather than looking up each OID in
+        turn, we combine whole maps with set operations, newest first,
+        adding only the OIDs we haven't already seen.
+        """
+        result = OidTMap()
+        for mapping in self.maps:
+            unseen = OidTMap_difference(mapping, result)
+            if oids is not None:
+                unseen = OidTMap_difference(unseen, OidTMap_difference(unseen, oids))
+            result.update(unseen)
+        return result
+
     def __getitem__(self, oid):
         for mapping in self.maps:
             try:
@@ -526,6 +545,25 @@ class _ObjectIndex(object):
         return other
 
 
+class _InFlightPoll(object):
+    """
+    A poll one viewer is making on behalf of all viewers, when
+    ``cache-poll-single-flight`` is enabled.
+
+    Once *done* is set, *object_index* is the index the leading viewer
+    was given, or None if its poll didn't produce one.
+    """
+
+    __slots__ = (
+        'done',
+        'object_index',
+    )
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.object_index = None
+
+
 class _AlreadyClosedLock(object):
 
     def __enter__(self):
@@ -579,6 +617,10 @@ class MVCCDatabaseCoordinator(DetachableMVCCDatabaseCoordinator):
         # each new one will drop more old viewers, though, and it will start to be reclaimed.
         # Also, lots of it is shared across the connections.
         self.max_allowed_index_size = options.cache_delta_size_limit * 2
+        # If true, only one viewer at a time polls the database; viewers that
+        # want to poll while that's happening wait for it and share its result.
+        self.single_flight = options.cache_poll_single_flight
+        self._in_flight_poll = None
         self.log = logger.log
 
     def stats(self):
@@ -598,12 +640,61 @@ class MVCCDatabaseCoordinator(DetachableMVCCDatabaseCoordinator):
         self.change(cache, None)
 
     def poll(self, cache, conn, cursor):
+        in_flight = None
+        leading = False
         with self._lock:
             cur_ix = self.object_index
             # this can mutate without changing the object identity!
             cur_ix_hvt = cur_ix.highest_visible_tid if cur_ix else None
+            if self.single_flight and cur_ix is not None:
+                in_flight = self._in_flight_poll
+                if in_flight is None:
+                    in_flight = self._in_flight_poll = _InFlightPoll()
+                    leading = True
+
+        if in_flight is None:
+            return self._poll(cache, conn, cursor, cur_ix, cur_ix_hvt)
+        if leading:
+            return self._lead_poll(cache, conn, cursor, cur_ix, cur_ix_hvt, in_flight)
+        return self._follow_poll(cache, conn, cursor, in_flight)
+
+    def _lead_poll(self, cache, conn, cursor, cur_ix, cur_ix_hvt, in_flight):
+        try:
+            return self._poll(cache, conn, cursor, cur_ix, cur_ix_hvt)
+        finally:
+            with self._lock:
+                in_flight.object_index = cache.object_index
+                self._in_flight_poll = None
+            in_flight.done.set()
 
-        return self._poll(cache, conn, cursor, cur_ix, cur_ix_hvt)
+    def _follow_poll(self, cache, conn, cursor, in_flight):
+        """
+        Wait for the poll another viewer is making and adopt its
+        index, instead of querying the database ourself.
+
+        Because this viewer's connection hasn't queried anything, its
+        snapshot of the database will begin when it first loads, and
+        may include changes newer than the adopted index. Loading such
+        an object raises a ``ReadConflictError``, exactly as if it had
+        been committed while we were polling.
+        """
+        in_flight.done.wait()
+        change_index = in_flight.object_index
+        if (
+                change_index is None
+                or (cache.highest_visible_tid or 0) > change_index.highest_visible_tid
+        ):
+            # The leader failed or was flushed, or we have our own
+            # index that's newer. Do it ourself.
+            return self.poll(cache, conn, cursor)
+
+        change_iter = self._find_changes_for_viewer(cache, change_index)
+        with self._lock:
+            if self.object_index is None:
+                self.__set_viewer_state_locked(cache, None)
+                return None
+            self.__set_viewer_state_locked(cache, change_index)
+        return change_iter
 
     def __set_viewer_state_locked(self, cache, index):
         cache.object_index = index
@@ -784,18 +875,11 @@ class MVCCDatabaseCoordinator(DetachableMVCCDatabaseCoordinator):
         # Note there could be no changes.
         last_poll_time = viewer.highest_visible_tid
         changes = OidTMap()
-        change_dicts = []
         for m in object_index.maps:
             if m.highest_visible_tid == last_poll_time:
                 break
-            change_dicts.append(m)
-
-        while change_dicts:
-            # In reverse order, capturing only the most recent change.
-            # TODO: Except for that 'ignore_tid' passed to the viewer's
-            # poll method, we could very efficiently do this with
-            # OidTMap_multiunion with one call to C.
-            changes.update(change_dicts.pop())
+            # Newest first, capturing only the most recent change.
+            changes.update(OidTMap_difference(m, changes))
 
         return iteroiditems(changes)
 
@@ -893,9 +977,11 @@ class MVCCDatabaseCoordinator(DetachableMVCCDatabaseCoordinator):
                 len(in_both)
             )
 
-            for oid in in_both:
+            # Find the newest TID for all of them at once, instead of
+            # searching through each map for each OID.
+            newer_tids = object_index.newest_items(in_both) if in_both else OidTMap()
+            for oid, newer_tid in iteroiditems(newer_tids):
                 old_tid = obsolete_bucket[oid]
-                newer_tid = object_index[oid]
                 # We intersected, we're sure that they're both not None.
                 if newer_tid != old_tid:
                     # Note that even though we're removing data from
@@ -957,16 +1043,30 @@ class MVCCDatabaseCoordinator(DetachableMVCCDatabaseCoordinator):
         # We give that last map to the local client so it knows to write only
         # known-valid data and to dispose of anything invalid.
 
-        checkpoints = None
-        max_hvt = self.object_index.maximum_highest_visible_tid
-        checkpoints = (
-            max_hvt,
-            self.complete_since_tid or max_hvt
-        )
+        checkpoints = self.current_checkpoints()
         local_client = cache.local_client
         return local_client.save(object_index=self.object_index.maps[0],
                                  checkpoints=checkpoints, **save_args)
 
+    def current_checkpoints(self):
+        """
+        Return the checkpoints to record in a persistent cache written
+        now, or None if we have never polled.
+
+        States in a persistent cache are all checked against the
+        database when they're read, so this doesn't require
+        the cache to hold nothing newer.
+        """
+        with self._lock:
+            object_index = self.object_index
+            if not object_index or not object_index.maximum_highest_visible_tid:
+                return None
+            max_hvt = object_index.maximum_highest_visible_tid
+            return (
+                max_hvt,
+                self.complete_since_tid or max_hvt
+            )
+
     def restore(self, adapter, local_client, timeout=None):
         # This method is not thread safe
 
@@ -994,6 +1094,9 @@ class MVCCDatabaseCoordinator(DetachableMVCCDatabaseCoordinator):
         from relstorage.adapters.interfaces import AggregateOperationTimeoutError
 
         cached_oids = OidSet(local_client.keys())
+        if not cached_oids:
+            # For example, we read the persistent cache on demand.
+            return
         # In local tests, this function executes against PostgreSQL 11 in .78s
         # for 133,002 older OIDs; or, .35s for 57,002 OIDs against MySQL 5.7.
         # In one production environment of 800,000 OIDs with a 98% survival rate,
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Access-pattern driven prefetching for the storage cache.
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import threading
+from collections import deque
+from collections import OrderedDict
+
+from relstorage._util import get_positive_integer_from_environ
+
+logger = __import__('logging').getLogger(__name__)
+
+class AccessPatternPrefetcher(object):
+    """
+    Learns which objects tend to be loaded shortly after a given
+    object, so that they can be fetched from the database in the same
+    query as that object.
+
+    The table of learned patterns, ``{oid: [follower_oid, ...]}``, is
+    shared by all instances in a tree (created with
+    :meth:`new_instance`) and so by the whole process. It holds at
+    most ``max_oids`` entries; the entries least recently updated are
+    discarded first.
+
+    Each instance keeps its own short window of the most recently
+    missed OIDs. Only cache misses are observed. Hits don't need to be
+    prefetched, and keeping them out of the window keeps the cost of a
+    cache hit unchanged.
+
+    Instances are not thread safe, but the shared table is.
+    """
+
+    #: The maximum number of OIDs we will remember followers for.
+    max_oids = get_positive_integer_from_environ('RS_CACHE_PREFETCH_MAX_OIDS', 100000)
+
+    __slots__ = (
+        'follower_count',
+        '_table',
+        '_lock',
+        '_recent',
+    )
+
+    @classmethod
+    def from_options(cls, options):
+        """
+        Create and return a prefetcher if the *options* enable
+        one, otherwise return None.
+        """
+        if options.cache_prefetch_followers and options.cache_prefetch_followers > 0:
+            return cls(options.cache_prefetch_followers)
+        return None
+
+    def __init__(self, follower_count, _table=None, _lock=None):
+        self.follower_count = follower_count
+        self._table = _table if _table is not None else OrderedDict()
+        self._lock = _lock if _lock is not None else threading.Lock()
+        # "Shortly after" means within the next *follower_count* misses.
+        self._recent = deque(maxlen=follower_count)
+
+    def new_instance(self):
+        return type(self)(self.follower_count, self._table, self._lock)
+
+    def __len__(self):
+        return len(self._table)
+
+    def followers_of(self, oid):
+        """
+        Return the list of OIDs that have recently been loaded
+        shortly after *oid*, most recent first.
+        """
+        return list(self._table.get(oid, ()))
+
+    def missed(self, oid):
+        """
+        Record that *oid* could not be found in the cache and is about
+        to be loaded from the database.
+
+        Returns the OIDs that are predicted to be loaded soon after it.
+        """
+        recent = self._recent
+        if recent:
+            self._record(recent, oid)
+        recent.append(oid)
+        return self.followers_of(oid)
+
+    def _record(self, leaders, oid):
+        table = self._table
+        follower_count = self.follower_count
+        with self._lock:
+            for leader in leaders:
+                if leader == oid:
+                    continue
+                followers = table.pop(leader, None)
+                if followers is None:
+                    followers = deque(maxlen=follower_count)
+                elif oid in followers:
+                    followers.remove(oid)
+                followers.appendleft(oid)
+                # Re-inserting makes this the most recently updated entry.
+                table[leader] = followers
+
+            while len(table) > self.max_oids:
+                table.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._table.clear()
+        self._recent.clear()
+
+    def stats(self):
+        return {
+            'follower_count': self.follower_count,
+            'tracked OIDs': len(self._table),
+            'max OIDs': self.max_oids,
+        }
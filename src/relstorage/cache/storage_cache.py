@@ -27,6 +27,7 @@ from ZODB.utils import p64
 from zope import interface
 
 from relstorage._compat import IN_TESTRUNNER
+from relstorage._compat import iteritems
 from relstorage._compat import OID_SET_TYPE as OIDSet
 from relstorage._compat import OID_TID_MAP_TYPE as OidTMap
 from relstorage._util import bytes8_to_int64
@@ -42,6 +43,8 @@ from relstorage.cache.trace import ZEOTracer
 from relstorage.cache._statecache_wrappers import MultiStateCache
 from relstorage.cache._statecache_wrappers import TracingStateCache
 from relstorage.cache.mvcc import MVCCDatabaseCoordinator
+from relstorage.cache.prefetcher import AccessPatternPrefetcher
+from relstorage.cache.historical import RevisionRangeIndex
 
 logger = log = logging.getLogger(__name__)
 
@@ -51,7 +54,7 @@ class _UsedAfterRelease(object):
         return 0
     def __call__(self):
         raise NotImplementedError
-    close = reset_stats = release = unregister = lambda self, *args: None
+    close = reset_stats = release = unregister = stop_checkpoints = lambda self, *args: None
     stats = lambda s: {}
     new_instance = lambda s: s
 _UsedAfterRelease = _UsedAfterRelease()
@@ -76,6 +79,8 @@ class StorageCache(DetachableMVCCDatabaseViewer):
         'local_client',
         'cache',
         'object_index',
+        'prefetcher',
+        'revision_ranges',
     )
 
 
@@ -100,7 +105,8 @@ class StorageCache(DetachableMVCCDatabaseViewer):
             # polling.
             self.polling_state = MVCCDatabaseCoordinator(self.options)
             self.local_client = LocalClient(options, self.prefix)
-
+            self.prefetcher = AccessPatternPrefetcher.from_options(options)
+            self.revision_ranges = RevisionRangeIndex()
 
             shared_cache = MemcacheStateCache.from_options(options, self.prefix)
             if shared_cache is not None:
@@ -117,6 +123,12 @@ class StorageCache(DetachableMVCCDatabaseViewer):
             self.polling_state = _parent.polling_state # type: MVCCDatabaseCoordinator
             self.local_client = _parent.local_client.new_instance()
             self.cache = _parent.cache.new_instance()
+            self.revision_ranges = _parent.revision_ranges
+            self.prefetcher = (
+                _parent.prefetcher.new_instance()
+                if _parent.prefetcher is not None
+                else None
+            )
 
         # Once we have registered with the MVCCDatabaseCoordinator,
         # we cannot make any changes to our own mvcc state without
@@ -135,6 +147,7 @@ class StorageCache(DetachableMVCCDatabaseViewer):
 
         if _parent is None:
             self.restore()
+            self.local_client.start_checkpoints(self.polling_state.current_checkpoints)
 
 
     @property
@@ -166,6 +179,8 @@ class StorageCache(DetachableMVCCDatabaseViewer):
         stats = self.local_client.stats()
         stats['local_index_stats'] = self.object_index.stats() if self.object_index else None
         stats['global_index_stats'] = self.polling_state.stats()
+        stats['prefetch_stats'] = self.prefetcher.stats() if self.prefetcher else None
+        stats['revision_range_stats'] = self.revision_ranges.stats()
         return stats
 
     def __repr__(self):
@@ -210,6 +225,7 @@ class StorageCache(DetachableMVCCDatabaseViewer):
         # Release our clients. If we had a non-shared local cache,
         # this will also allow it to release any memory it's holding.
         self.local_client = self.cache = _UsedAfterRelease
+        self.prefetcher = None
         self.polling_state.unregister(self)
         self.polling_state = _UsedAfterRelease
         self.object_index = None
@@ -226,6 +242,9 @@ class StorageCache(DetachableMVCCDatabaseViewer):
         # grab things that will be reset in release()
         cache = self.cache
         polling_state = self.polling_state
+        # No more background writes; what's left is written
+        # by save().
+        self.local_client.stop_checkpoints()
 
         # Go ahead and release our polling_state now, in case
         # it helps to vacuum for save.
@@ -239,7 +258,9 @@ class StorageCache(DetachableMVCCDatabaseViewer):
         """
         Store any persistent client data.
         """
-        if self.options.cache_local_dir and len(self) > 0: # pylint:disable=len-as-condition
+        options = self.options
+        persistent = options.cache_local_dir or options.cache_local_shared_path
+        if persistent and len(self) > 0: # pylint:disable=len-as-condition
             # (our __bool__ is not consistent with our len)
             stats = self.local_client.stats()
             if stats['hits'] or stats['sets']:
@@ -252,9 +273,11 @@ class StorageCache(DetachableMVCCDatabaseViewer):
             logger.debug("Cannot justify writing cache file, no hits or misses")
 
     def restore(self):
-        # We must only restore into an empty cache.
+        # We must only restore into an empty cache. (A shared memory
+        # cache is never empty, but restoring it changes only what
+        # this process knows about it.)
         state = self.polling_state
-        assert not self.local_client
+        assert not self.local_client or self.options.cache_local_shared_path
         state.restore(self.adapter, self.local_client)
 
     def _reset(self, message=None):
@@ -290,6 +313,7 @@ class StorageCache(DetachableMVCCDatabaseViewer):
         self._reset()
         self.polling_state.flush_all()
         self.cache.flush_all()
+        self.revision_ranges.clear()
 
         if load_persistent:
             self.restore()
@@ -452,7 +476,18 @@ class StorageCache(DetachableMVCCDatabaseViewer):
             # Cache hit, non-wildcard or wildcard matched.
             return cache_data
 
+        if indexed_tid_int is None and self._confirm_persisted(cursor, (oid_int,)):
+            cache_data = cache[(oid_int, index[oid_int])] # pylint:disable=unsubscriptable-object
+            if cache_data:
+                return cache_data
+
         # Cache miss.
+        prefetcher = self.prefetcher
+        if prefetcher is not None:
+            followers = prefetcher.missed(oid_int)
+            if followers:
+                return self._load_with_followers(cursor, oid_int, indexed_tid_int, followers)
+
         state, actual_tid_int = self.adapter.mover.load_current(
             cursor, oid_int)
         if actual_tid_int:
@@ -468,6 +503,164 @@ class StorageCache(DetachableMVCCDatabaseViewer):
         # This is in the bytecode as a LOAD_CONST
         return None, None
 
+    def load_many(self, cursor, oid_ints):
+        """
+        Load all the given objects, using the cache where possible.
+
+        All the objects not found in the cache are loaded from the
+        database with a single bulk query, and the results are added to
+        the object index and the cache.
+
+        Returns a dictionary ``{oid_int: (state_bytes, tid_int)}``.
+        Objects that do not exist are not included.
+        """
+        if not self.object_index:
+            # No poll has occurred yet. For safety, don't use the cache.
+            return {
+                oid_int: (state, tid_int)
+                for oid_int, state, tid_int
+                in self.adapter.mover.load_currents(cursor, oid_ints)
+            }
+
+        cache = self.cache
+        index = self.object_index
+        # Just as in load(), any entry in the index must be used;
+        # without one, we look for a frozen (wildcard) value.
+        indexed_tids = {
+            oid_int: index[oid_int] # pylint:disable=unsubscriptable-object
+            for oid_int in oid_ints
+        }
+        result = cache.get_many(iteritems(indexed_tids))
+
+        highest_visible_tid = self.highest_visible_tid
+        to_fetch = {}
+        for oid_int, indexed_tid_int in iteritems(indexed_tids):
+            cache_data = result.get(oid_int)
+            if cache_data and indexed_tid_int is None and cache_data[1] > highest_visible_tid:
+                # A wildcard we couldn't verify; see load().
+                del result[oid_int]
+                cache_data = None
+            if not cache_data:
+                to_fetch[oid_int] = indexed_tid_int
+
+        confirmed = self._confirm_persisted(
+            cursor,
+            [oid_int for oid_int, tid_int in iteritems(to_fetch) if tid_int is None]
+        )
+        if confirmed:
+            found = cache.get_many([
+                (oid_int, index[oid_int]) # pylint:disable=unsubscriptable-object
+                for oid_int in confirmed
+            ])
+            for oid_int in found:
+                del to_fetch[oid_int]
+            result.update(found)
+
+        if to_fetch:
+            self._load_and_cache_many(cursor, to_fetch, result)
+        return result
+
+    def _confirm_persisted(self, cursor, oid_ints):
+        """
+        For objects we don't have an index entry for, check whatever
+        the local client has for them in a persistent cache that it
+        reads on demand against the database. Those that are current
+        are added to the object index, so they can be loaded from the
+        cache by their exact TID.
+
+        Returns the OIDs added to the index.
+        """
+        persisted = self.local_client.persisted_tids(oid_ints) if oid_ints else None
+        if not persisted:
+            return ()
+
+        current_tids = self.adapter.mover.current_object_tids(cursor, list(persisted))
+        highest_visible_tid = self.highest_visible_tid
+        index = self.object_index
+        confirmed = []
+        for oid_int, tid_int in iteritems(persisted):
+            if current_tids.get(oid_int) == tid_int and tid_int <= highest_visible_tid:
+                index[oid_int] = tid_int # pylint:disable=unsupported-assignment-operation
+                confirmed.append(oid_int)
+        return confirmed
+
+    def _load_and_cache_many(self, cursor, indexed_tids, result):
+        """
+        Load the current state of each OID in the ``{oid_int:
+        indexed_tid_int}`` dictionary *indexed_tids* with a single
+        query, verifying it against the indexed tid and adding it to
+        the object index, the cache, and the *result* dictionary.
+        """
+        cache = self.cache
+        index = self.object_index
+        # Group the states by tid so that they can
+        # be stored in the cache in bulk.
+        states_by_tid = {}
+        for oid_int, state, actual_tid_int in self.adapter.mover.load_currents(cursor,
+                                                                                indexed_tids):
+            self._check_tid_after_load(oid_int, actual_tid_int,
+                                       indexed_tids[oid_int], cursor)
+            index[oid_int] = actual_tid_int # pylint:disable=unsupported-assignment-operation
+            states_by_tid.setdefault(actual_tid_int, []).append((state or b'', oid_int, None))
+            result[oid_int] = (state, actual_tid_int)
+
+        for actual_tid_int, state_oid_list in iteritems(states_by_tid):
+            cache.set_all_for_tid(actual_tid_int, state_oid_list)
+
+    def _load_with_followers(self, cursor, oid_int, indexed_tid_int, follower_oids):
+        # Load the missing object, plus any of the objects predicted to
+        # be loaded next that we don't have cached, in one query.
+        cache = self.cache
+        index = self.object_index
+        to_fetch = {oid_int: indexed_tid_int}
+        for follower in follower_oids:
+            # As for prefetch(), use ``in`` so as not to disturb the
+            # statistics or the LRU order.
+            follower_tid = index[follower] # pylint:disable=unsubscriptable-object
+            if (follower, follower_tid) not in cache:
+                to_fetch[follower] = follower_tid
+
+        result = {}
+        self._load_and_cache_many(cursor, to_fetch, result)
+        return result.get(oid_int, (None, None))
+
+    def load_before(self, cursor, oid_int, before_tid_int):
+        """
+        Load the revision of the object *oid_int* that was current
+        just before the transaction *before_tid_int*.
+
+        Returns the same thing as
+        :meth:`relstorage.adapters.interfaces.IObjectMover.load_before_with_next`:
+        ``(state, start_tid, end_tid)``, ``(None, None, None)`` if there
+        is no earlier revision, or None if the object doesn't exist.
+
+        Revisions that have already been replaced by a later revision
+        can't change, so once loaded, they are found in the local
+        cache. Otherwise, they are loaded from the database with a
+        single query and added to the local cache.
+
+        Like :meth:`loadSerial`, this is independent of the current
+        transaction and polling state. A cached answer doesn't
+        check that the object still exists.
+        """
+        # As for loadSerial(), use only the local client.
+        cache = self.local_client
+        known_range = self.revision_ranges.range_before(oid_int, before_tid_int)
+        if known_range is not None:
+            start_tid_int, end_tid_int = known_range
+            cache_data = cache[(oid_int, start_tid_int)]
+            if cache_data and cache_data[1] == start_tid_int:
+                return cache_data[0], start_tid_int, end_tid_int
+
+        result = self.adapter.mover.load_before_with_next(cursor, oid_int, before_tid_int)
+        if result is not None:
+            state, start_tid_int, end_tid_int = result
+            if start_tid_int is not None:
+                cache[(oid_int, start_tid_int)] = (state, start_tid_int)
+                if end_tid_int is not None:
+                    self.revision_ranges.add(oid_int, start_tid_int, end_tid_int)
+        return result
+
     def prefetch(self, cursor, oid_ints):
         # Just like load(), but we only fetch the OIDs
         # we can't find in the cache.
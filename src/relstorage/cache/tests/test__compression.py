@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import unittest
+
+from relstorage.tests import TestCase
+
+from .. import _compression
+
+def _pickles(count):
+    return [
+        b'\x80\x03cpersistent.mapping\nPersistentMapping\nq\x00)\x81q\x01}q\x02'
+        b'X\x04\x00\x00\x00dataq\x03}q\x04(X\x05\x00\x00\x00titleq\x05X\x0c\x00'
+        b'\x00\x00Document %05dq\x06X\x07\x00\x00\x00creatorq\x07X\x05\x00\x00'
+        b'\x00adminq\x08X\x0b\x00\x00\x00descriptionq\tX\x10\x00\x00\x00'
+        b'Some text %06dq\nus.' % (i, i * 7)
+        for i in range(count)
+    ]
+
+
+@unittest.skipIf(_compression.zstandard is None, "zstandard not installed")
+class TestZstdCodec(TestCase):
+
+    def _makeOne(self, train=False, sample_bytes=20000, dictionary_size=1024):
+        codec = _compression.ZstdCodec(train)
+        codec.sample_bytes = sample_bytes
+        codec.dictionary_size = dictionary_size
+        return codec
+
+    def test_round_trip_without_dictionary(self):
+        codec = self._makeOne()
+        data = _pickles(1)[0]
+        compressed = codec.compress(data)
+        self.assertEqual(codec.decompress(compressed), data)
+        self.assertTrue(codec.can_decompress(compressed))
+        self.assertFalse(codec.can_decompress(b'not zstd'))
+        self.assertEqual(codec.dictionaries, [])
+
+    def test_train(self):
+        codec = self._makeOne(train=True)
+        pickles = _pickles(500)
+        before = [codec.compress(p) for p in pickles[:10]]
+        for p in pickles:
+            codec.compress(p)
+        self.assertEqual(len(codec.dictionaries), 1)
+        after = codec.compress(pickles[0])
+        self.assertLess(len(after), len(before[0]))
+        # Both kinds can be read.
+        self.assertEqual(codec.decompress(after), pickles[0])
+        self.assertEqual(codec.decompress(before[0]), pickles[0])
+
+        # Another codec can read them once it knows the dictionary.
+        other = self._makeOne()
+        self.assertFalse(other.can_decompress(after))
+        self.assertTrue(other.can_decompress(before[0]))
+        dict_id, dictionary = codec.dictionaries[0]
+        self.assertEqual(other.add_dictionary(dictionary), dict_id)
+        self.assertTrue(other.can_decompress(after))
+        self.assertEqual(other.decompress(after), pickles[0])
+
+    def test_added_dictionary_prevents_training(self):
+        trained = self._makeOne(train=True)
+        for p in _pickles(500):
+            trained.compress(p)
+        (dict_id, dictionary), = trained.dictionaries
+
+        codec = self._makeOne(train=True)
+        codec.add_dictionary(dictionary, use=True)
+        for p in _pickles(500):
+            codec.compress(p)
+        self.assertEqual(codec.dictionaries, [(dict_id, dictionary)])
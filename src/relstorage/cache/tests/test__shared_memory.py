@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+
+from relstorage.tests import TestCase
+
+from .._shared_memory import SharedMemoryCache
+
+class TestSharedMemoryCache(TestCase):
+
+    def setUp(self):
+        super(TestSharedMemoryCache, self).setUp()
+        temp_dir = tempfile.mkdtemp('.rstest_shm')
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        self.path = os.path.join(temp_dir, 'cache')
+
+    def _makeOne(self, limit=4096):
+        cache = SharedMemoryCache(self.path, limit)
+        self.addCleanup(cache.close)
+        return cache
+
+    def _store(self, cache, oid, tid, state):
+        cache.set_all_for_tid(tid, [(state, oid, None)], None, 1 << 20)
+
+    def test_reuses_existing_layout(self):
+        cache = self._makeOne(8192)
+        self._store(cache, 1, 1, b'abc')
+        # A different size is ignored in favor of the file's.
+        cache2 = self._makeOne(4096)
+        self.assertEqual(cache2.limit, 8192)
+        self.assertEqual(cache2.get_item_with_tid(1, 1), (b'abc', 1))
+
+    def test_replaces_foreign_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'Nope!' * 100)
+        cache = self._makeOne()
+        self.assertEqual(len(cache), 0)
+        self._store(cache, 1, 1, b'abc')
+        self.assertEqual(cache.get_item_with_tid(1, 1), (b'abc', 1))
+
+    def test_ring_overwrites_oldest(self):
+        cache = self._makeOne()
+        state = b'x' * 1000
+        for oid in range(5):
+            self._store(cache, oid, 1, state)
+        # Only four fit; the first has been overwritten.
+        self.assertIsNone(cache.get_item_with_tid(0, 1))
+        for oid in range(1, 5):
+            self.assertEqual(cache.get_item_with_tid(oid, 1), (state, 1))
+        self.assertEqual(sorted(cache.keys()), [1, 2, 3, 4])
+        self.assertLessEqual(cache.weight, cache.limit)
+
+        # States too large for the whole ring are not stored.
+        self._store(cache, 9, 1, b'x' * 5000)
+        self.assertIsNone(cache.get_item_with_tid(9, 1))
+
+    def test_probe_window_evicts_oldest_slot(self):
+        cache = self._makeOne()
+        for tid in range(1, cache.PROBES + 2):
+            self._store(cache, 1, tid, b'abc')
+        self.assertIsNone(cache.get_item_with_tid(1, 1))
+        self.assertEqual(cache.get_item_with_tid(1, cache.PROBES + 1),
+                         (b'abc', cache.PROBES + 1))
+        self.assertEqual(len(cache), cache.PROBES)
+        self.assertEqual(cache.peek(1), (b'abc', cache.PROBES + 1))
+
+    def test_reader_ignores_slot_being_written(self):
+        cache = self._makeOne()
+        self._store(cache, 1, 1, b'abc')
+        offset = next(cache._slot_offsets(1))
+        seq = cache._read_u64(offset)
+        # A writer has begun changing this slot.
+        cache._u64.pack_into(cache._map, offset, seq + 1)
+        self.assertIsNone(cache.get_item_with_tid(1, 1))
+        cache._u64.pack_into(cache._map, offset, seq)
+        self.assertEqual(cache.get_item_with_tid(1, 1), (b'abc', 1))
+
+    def test_reader_checks_data(self):
+        cache = self._makeOne()
+        self._store(cache, 1, 1, b'abc')
+        cache._map[cache._data_offset] = b'X'[0]
+        self.assertIsNone(cache.get_item_with_tid(1, 1))
+
+    def test_different_state_same_tid(self):
+        cache = self._makeOne()
+        self._store(cache, 1, 1, b'abc')
+        self._store(cache, 1, 1, b'abc')
+        self.assertEqual(len(cache), 1)
+        # Other processes may compress the same state differently;
+        # the first one stored is kept.
+        self._store(cache, 1, 1, b'def')
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get_item_with_tid(1, 1), (b'abc', 1))
+
+    def test_freeze(self):
+        cache = self._makeOne()
+        self._store(cache, 1, 1, b'abc')
+        self._store(cache, 1, 2, b'def')
+        self._store(cache, 1, 3, b'ghi')
+        cache.freeze({1: 2})
+        # Older is gone, newer remains
+        self.assertIsNone(cache.peek_item_with_tid(1, 1))
+        self.assertEqual(cache.peek_item_with_tid(1, None), (b'def', 2))
+        self.assertEqual(cache.peek_item_with_tid(1, 3), (b'ghi', 3))
+        self.assertTrue(cache.contains_oid_with_tid(1, None))
+
+        # Freezing something that's not there unfreezes.
+        cache.freeze({1: 4})
+        self.assertIsNone(cache.peek_item_with_tid(1, None))
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self):
+        cache = self._makeOne()
+        cache2 = self._makeOne()
+        self._store(cache, 1, 1, b'abc')
+        cache.save_checkpoints((1, 1))
+        cache2.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.weight, 0)
+        self.assertIsNone(cache.get_item_with_tid(1, 1))
+        self.assertIsNone(cache.restore())
+        self._store(cache, 1, 1, b'abc')
+        self.assertEqual(cache2.get_item_with_tid(1, 1), (b'abc', 1))
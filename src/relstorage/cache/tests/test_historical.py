@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from relstorage.tests import TestCase
+
+
+class TestRevisionRangeIndex(TestCase):
+
+    def _getClass(self):
+        from relstorage.cache.historical import RevisionRangeIndex
+        return RevisionRangeIndex
+
+    def _makeOne(self):
+        return self._getClass()()
+
+    def test_range_before(self):
+        inst = self._makeOne()
+        inst.add(1, 2, 5)
+        inst.add(1, 5, 9)
+        inst.add(1, 5, 9)
+        self.assertIsNone(inst.range_before(1, 2))
+        self.assertEqual(inst.range_before(1, 3), (2, 5))
+        self.assertEqual(inst.range_before(1, 5), (2, 5))
+        self.assertEqual(inst.range_before(1, 6), (5, 9))
+        self.assertEqual(inst.range_before(1, 9), (5, 9))
+        self.assertIsNone(inst.range_before(1, 10))
+        self.assertIsNone(inst.range_before(2, 3))
+        self.assertEqual(len(inst), 1)
+
+    def test_bounded(self):
+        class Index(self._getClass()):
+            __slots__ = ()
+            max_oids = 2
+            max_ranges_per_oid = 2
+
+        inst = Index()
+        for start in range(4):
+            inst.add(1, start, start + 1)
+        # Only the most recent ranges are kept.
+        self.assertIsNone(inst.range_before(1, 1))
+        self.assertEqual(inst.range_before(1, 4), (3, 4))
+
+        inst.add(2, 1, 2)
+        inst.add(3, 1, 2)
+        self.assertEqual(len(inst), 2)
+        self.assertIsNone(inst.range_before(1, 4))
+
+    def test_clear(self):
+        inst = self._makeOne()
+        inst.add(1, 2, 5)
+        inst.clear()
+        self.assertEqual(len(inst), 0)
+        self.assertEqual(inst.stats()['tracked OIDs'], 0)
@@ -16,6 +16,8 @@ from __future__ import division
 from __future__ import print_function
 
 import threading
+import time
+from contextlib import closing
 from functools import partial
 
 from relstorage.tests import TestCase
@@ -255,6 +257,56 @@ class LocalClientOIDTests(AbstractStateCacheTests):
         self.assertEqual(c[self.key], self.value)
         self.assertEqual(c[self.missing_key], None)
 
+    def test_get_view(self):
+        c = self._makeOne()
+        self.assertIsNone(c.get_view(self.key))
+        c[self.key] = self.value
+        state, tid = c.get_view(self.key)
+        self.assertIsInstance(state, memoryview)
+        self.assertTrue(state.readonly)
+        self.assertEqual(state.tobytes(), self.value[0])
+        self.assertEqual(tid, self.tid)
+        self.assertEqual(c.stats()['hits'], 1)
+
+        # The view survives the entry being removed.
+        c.invalidate_all([self.oid])
+        self.assertIsNone(c[self.key])
+        self.assertEqual(state.tobytes(), self.value[0])
+
+        self.assertEqual(c.get_view(self.key, peek=True), None)
+        self.assertEqual(c.stats()['misses'], 2)
+
+    def test_get_view_compressed(self):
+        c = self._makeOne(cache_local_compression='zlib')
+        value = (b'statebytes' * 100, self.tid)
+        c[self.key] = value
+        state, tid = c.get_view(self.key, peek=True)
+        self.assertIsInstance(state, memoryview)
+        self.assertEqual((state.tobytes(), tid), value)
+
+    def _check_codec(self, name):
+        from relstorage.cache import _compression
+        module = _compression.lz4_block if name == 'lz4' else _compression.zstandard
+        if module is None:
+            self.skipTest("%s is not installed" % (name,))
+        c = self._makeOne(cache_local_compression=name)
+        value = (b'statebytes' * 100, self.tid)
+        c[self.key] = value
+        stored = c._cache.peek_item_with_tid(self.oid, self.tid)
+        stored = stored[0] if isinstance(stored, tuple) else stored.state
+        self.assertLess(len(stored), len(value[0]))
+        self.assertEqual(c[self.key], value)
+        self.assertEqual(c[self.missing_key], None)
+
+    def test_set_and_get_string_lz4(self):
+        self._check_codec('lz4')
+
+    def test_set_and_get_string_zstd(self):
+        self._check_codec('zstd')
+
+    def test_set_and_get_string_zstd_dict(self):
+        self._check_codec('zstd-dict')
+
     def test_set_and_get_object_too_large(self):
         c = self._makeOne(cache_local_compression='none')
         c[self.key] = (b'abcdefgh' * 10000, self.key_tid)
@@ -358,3 +410,332 @@ class LocalClientOIDTests(AbstractStateCacheTests):
 
         # At no point did we spawn extra threads
         self.assertEqual(1, threading.active_count())
+
+    def test_load_and_save_zstd_dictionary(self):
+        import tempfile
+        import shutil
+        from relstorage.cache import _compression
+        from .test__compression import _pickles
+        if _compression.zstandard is None:
+            self.skipTest("zstandard is not installed")
+
+        temp_dir = tempfile.mkdtemp(".rstest_cache")
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        c = self._makeOne(cache_local_dir=temp_dir, cache_local_compression='zstd-dict')
+        c._zstd.sample_bytes = 20000
+        c._zstd.dictionary_size = 1024
+        pickles = _pickles(500)
+        c.set_all_for_tid(1, [(p, oid, None) for oid, p in enumerate(pickles)])
+        (dict_id, _), = c._zstd.dictionaries
+        self.assertTrue(c.save())
+
+        # The dictionary is read back and used, no matter the configuration.
+        c2 = self._makeOne(cache_local_dir=temp_dir, cache_local_compression='zstd-dict')
+        c2.restore()
+        self.assertEqual(c2[(499, 1)], (pickles[499], 1))
+        self.assertEqual([d[0] for d in c2._zstd.dictionaries], [dict_id])
+        c2.set_all_for_tid(2, [(pickles[0], 1000, None)])
+        self.assertEqual([d[0] for d in c2._zstd.dictionaries], [dict_id])
+
+        c3 = self._makeOne(cache_local_dir=temp_dir, cache_local_compression='none')
+        c3.restore()
+        self.assertEqual(c3[(499, 1)], (pickles[499], 1))
+
+        # Without the dictionary, the states that need it are ignored.
+        from relstorage.cache.persistence import sqlite_connect
+        conn = sqlite_connect(c.options, c.prefix)
+        conn.execute('DELETE FROM compression_dictionaries')
+        conn.commit()
+        conn.close()
+        c4 = self._makeOne(cache_local_dir=temp_dir, cache_local_compression='zstd')
+        c4.restore()
+        self.assertIsNone(c4[(499, 1)])
+        # Those compressed before the dictionary was trained are fine.
+        self.assertEqual(c4[(0, 1)], (pickles[0], 1))
+        self.assertLess(len(c4), len(pickles))
+
+    def test_checkpoint(self):
+        import tempfile
+        import shutil
+        from relstorage.cache.persistence import sqlite_connect
+        from relstorage.cache.local_database import Database
+
+        temp_dir = tempfile.mkdtemp(".rstest_cache")
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        c = self._makeOne(cache_local_dir=temp_dir)
+        # Not enabled
+        self.assertIsNone(c.checkpoint())
+
+        def rows():
+            conn = sqlite_connect(c.options, c.prefix)
+            with closing(conn):
+                return sorted(Database.from_connection(conn).oid_to_tid.items())
+
+        c = self._makeOne(cache_local_dir=temp_dir, cache_local_checkpoint_interval=1000)
+        self.assertEqual(c.checkpoint(), 0)
+        c.set_all_for_tid(1, [(b'abc', 1, None), (b'def', 2, None)])
+        self.assertEqual(c.checkpoint((1, 1)), 2)
+        self.assertEqual(rows(), [(1, 1), (2, 1)])
+
+        # Only what was stored since then is written.
+        c.set_all_for_tid(2, [(b'ghi', 2, None)])
+        self.assertEqual(c.checkpoint((2, 2)), 1)
+        self.assertEqual(rows(), [(1, 1), (2, 2)])
+        self.assertEqual(c.checkpoint(), 0)
+
+        # Saving writes only the rest.
+        c.set_all_for_tid(3, [(b'jkl', 3, None)])
+        self.assertTrue(c.save(checkpoints=(3, 3)))
+        self.assertEqual(rows(), [(1, 1), (2, 2), (3, 3)])
+
+        c2 = self._makeOne(cache_local_dir=temp_dir)
+        self.assertEqual(c2.restore(), (3, 3))
+        self.assertEqual(c2[(2, 2)], (b'ghi', 2))
+
+    def test_checkpoint_in_background(self):
+        import tempfile
+        import shutil
+
+        temp_dir = tempfile.mkdtemp(".rstest_cache")
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        c = self._makeOne(cache_local_dir=temp_dir, cache_local_checkpoint_interval=0.01)
+        written = []
+        checkpoint = c.checkpoint
+        def checkpointing(checkpoints):
+            written.append(checkpoint(checkpoints))
+        c.checkpoint = checkpointing
+        c.set_all_for_tid(1, [(b'abc', 1, None)])
+        c.start_checkpoints(lambda: (1, 1))
+        self.addCleanup(c.close)
+        while not written:
+            time.sleep(0.01)
+        c.close()
+        self.assertIsNone(c._checkpointer)
+        self.assertEqual(written[0], 1)
+
+        c2 = self._makeOne(cache_local_dir=temp_dir)
+        self.assertEqual(c2.restore(), (1, 1))
+        self.assertEqual(c2[(1, 1)], (b'abc', 1))
+
+    def test_restore_lazily(self):
+        import tempfile
+        import shutil
+
+        temp_dir = tempfile.mkdtemp(".rstest_cache")
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        c = self._makeOne(cache_local_dir=temp_dir)
+        c.set_all_for_tid(1, [(b'abc', 1, None), (b'def', 2, None)])
+        c[(1, 1)] # pylint:disable=pointless-statement
+        self.assertTrue(c.save(checkpoints=(1, 1)))
+
+        c2 = self._makeOne(cache_local_dir=temp_dir, cache_local_dir_lazy=True)
+        self.assertEqual(c2.restore(), (1, 1))
+        self.assertEqual(len(c2), 0)
+
+        # Only exact TIDs are found.
+        self.assertIsNone(c2[(1, None)])
+        self.assertIsNone(c2[(1, 2)])
+        self.assertEqual(c2[(1, 1)], (b'abc', 1))
+        # Which are now in memory.
+        self.assertEqual(len(c2), 1)
+        self.assertEqual(c2.get_many([(1, 1), (2, 1), (3, 1)]),
+                         {1: (b'abc', 1), 2: (b'def', 1)})
+        self.assertEqual(len(c2), 2)
+
+        # Each OID is offered only once.
+        self.assertEqual(c2.persisted_tids([1, 3]), {1: 1})
+        self.assertEqual(c2.persisted_tids([1, 2, 3]), {2: 1})
+        self.assertEqual(c2.persisted_tids([1, 2, 3]), {})
+
+        c2.close()
+        self.assertIsNone(c2[(3, 1)])
+        self.assertEqual(c2.persisted_tids([3]), {})
+
+
+class ShardedLocalClientOIDTests(LocalClientOIDTests):
+    # Everything should work the same with a sharded cache.
+
+    def _makeOne(self, **kw):
+        kw.setdefault('cache_local_shards', 4)
+        return super(ShardedLocalClientOIDTests, self)._makeOne(**kw)
+
+    def test_shards(self):
+        from relstorage.cache._sharded import ShardedCache
+        c = self._makeOne()
+        self.assertIsInstance(c._cache, ShardedCache)
+        self.assertEqual(len(c._cache.shards), 4)
+        self.assertEqual(c._cache.limit, c.limit)
+
+        c.set_all_for_tid(1, [(b'abc', oid, None) for oid in range(8)])
+        self.assertEqual(len(c), 8)
+        self.assertEqual([len(shard) for shard in c._cache.shards], [2, 2, 2, 2])
+        self.assertEqual(sorted(c.keys()), list(range(8)))
+
+        self.assertEqual(c.get_many([(0, 1), (5, 1), (9, 1)]),
+                         {0: (b'abc', 1), 5: (b'abc', 1)})
+        stats = c.stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['sets'], 8)
+
+        c.freeze({1: 1, 2: 1})
+        self.assertEqual(c[(1, None)], (b'abc', 1))
+        self.assertEqual(c[(2, None)], (b'abc', 1))
+        self.assertIsNone(c[(3, None)])
+
+        c.delitems({1: 1, 6: 1})
+        c.invalidate_all([3])
+        self.assertEqual(sorted(c.keys()), [0, 2, 4, 5, 7])
+
+        c.flush_all()
+        self.assertEqual(len(c), 0)
+        self.assertIsInstance(c._cache, ShardedCache)
+
+
+class SharedMemoryLocalClientOIDTests(LocalClientOIDTests):
+    # Everything should work the same with a shared memory cache.
+
+    def setUp(self):
+        import tempfile
+        import shutil
+        super(SharedMemoryLocalClientOIDTests, self).setUp()
+        self.temp_dir = tempfile.mkdtemp(".rstest_shm")
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.path = self.temp_dir + '/cache'
+
+    def _makeOne(self, **kw):
+        kw.setdefault('cache_local_shared_path', self.path)
+        c = super(SharedMemoryLocalClientOIDTests, self)._makeOne(**kw)
+        if c._shared:
+            self.addCleanup(c._cache.close)
+        return c
+
+    def test_load_and_save(self):
+        c = self._makeOne()
+        self.assertIsNone(c.restore())
+        # Nothing to record without checkpoints
+        self.assertFalse(c.save())
+
+        c[(0, 1)] = (b'abc', 1)
+        c[(1, 1)] = (b'def', 1)
+        c[(1, 2)] = (b'ghi', 2)
+        self.assertTrue(c.save(checkpoints=(2, 1)))
+
+        # Another process sees the states, but nothing is frozen
+        # until it restores.
+        c2 = self._makeOne()
+        self.assertEqual(c2[(0, 1)], (b'abc', 1))
+        self.assertIsNone(c2[(0, None)])
+        self.assertEqual(c2.restore(), (2, 1))
+        self.assertEqual(c2[(0, None)], (b'abc', 1))
+        self.assertEqual(c2[(1, None)], (b'ghi', 2))
+
+        # Invalid OIDs are no longer frozen, but the states remain.
+        c2.remove_invalid_persistent_oids([1])
+        self.assertIsNone(c2[(1, None)])
+        self.assertEqual(c2[(1, 2)], (b'ghi', 2))
+
+        # Zapping removes it for everyone.
+        c2.zap_all()
+        self.assertIsNone(c[(0, 1)])
+        self.assertEqual(len(c), 0)
+        self.assertIsNone(c.restore())
+
+    def test_cache_corruption_on_store(self):
+        # Processes may compress the same state differently, so
+        # different bytes can't be detected as corruption. The first
+        # stored is kept.
+        c = self._makeOne()
+        c[self.key] = self.value
+        c[(self.oid, self.tid)] = (b'bad bytes', self.tid)
+        self.assertEqual(c[(self.oid, self.tid)], self.value)
+
+    def test_load_and_save_zstd_dictionary(self):
+        self.skipTest("Shared memory doesn't use persistent cache files")
+
+    def test_zstd_dictionary_not_trained(self):
+        from relstorage.cache import _compression
+        from .test__compression import _pickles
+        if _compression.zstandard is None:
+            self.skipTest("zstandard is not installed")
+        c1 = self._makeOne(cache_local_compression='zstd-dict')
+        c2 = self._makeOne(cache_local_compression='zstd-dict')
+        c1._zstd.sample_bytes = 20000
+        c1._zstd.dictionary_size = 1024
+        pickles = _pickles(500)
+        c1.set_all_for_tid(1, [(p, oid, None) for oid, p in enumerate(pickles)])
+        self.assertEqual(c1._zstd.dictionaries, [])
+        self.assertEqual(c2[(499, 1)], (pickles[499], 1))
+
+        # Something compressed with a dictionary this process doesn't
+        # have is a miss, not an error.
+        c3 = self._makeOne(cache_local_shared_path=self.path + '3',
+                           cache_local_compression='none')
+        codec = _compression.ZstdCodec(train=True)
+        codec.sample_bytes = 20000
+        codec.dictionary_size = 1024
+        for p in pickles:
+            codec.compress(p)
+        self.assertTrue(codec.dictionaries)
+        c3.set_all_for_tid(1, [(b'.s' + codec.compress(pickles[1]), 1, None)])
+        c3.set_all_for_tid(1, [(pickles[2], 2, None)])
+        self.assertIsNone(c3[(1, 1)])
+        self.assertIsNone(c3.get_view((1, 1)))
+        self.assertEqual(c3.get_many([(1, 1), (2, 1)]), {2: (pickles[2], 1)})
+
+    def test_checkpoint(self):
+        self.skipTest("Shared memory doesn't use persistent cache files")
+
+    test_checkpoint_in_background = test_checkpoint
+    test_restore_lazily = test_checkpoint
+
+    def test_shared_between_clients(self):
+        from relstorage.cache._shared_memory import SharedMemoryCache
+        c1 = self._makeOne()
+        c2 = self._makeOne()
+        self.assertIsInstance(c1._cache, SharedMemoryCache)
+        self.assertIsNot(c1._cache, c2._cache)
+        self.assertEqual(c1._cache.limit, c1.limit)
+
+        c1.set_all_for_tid(1, [(b'abc', oid, None) for oid in range(8)])
+        self.assertEqual(len(c2), 8)
+        self.assertEqual(sorted(c2.keys()), list(range(8)))
+        self.assertEqual(c2.get_many([(0, 1), (5, 1), (9, 1)]),
+                         {0: (b'abc', 1), 5: (b'abc', 1)})
+        self.assertEqual(c2.stats()['hits'], 2)
+        self.assertEqual(c2.stats()['misses'], 1)
+        self.assertEqual(c1.stats()['sets'], 8)
+        self.assertEqual(c2.stats()['sets'], 0)
+
+        # Freezing is private to each client
+        c1.freeze({1: 1, 2: 1})
+        self.assertEqual(c1[(1, None)], (b'abc', 1))
+        self.assertIsNone(c2[(1, None)])
+
+        # Invalidating is not.
+        c2.delitems({1: 1, 6: 1})
+        c2.invalidate_all([3])
+        self.assertEqual(sorted(c1.keys()), [0, 2, 4, 5, 7])
+        self.assertIsNone(c1[(1, None)])
+        self.assertEqual(c1[(2, None)], (b'abc', 1))
+
+        # Flushing forgets what this client knows, but keeps the data.
+        c1.flush_all()
+        self.assertIsNone(c1[(2, None)])
+        self.assertEqual(c1[(2, 1)], (b'abc', 1))
+        self.assertEqual(len(c2), 5)
+
+    def test_close_releases_file(self):
+        c1 = self._makeOne()
+        c2 = self._makeOne()
+        cache = c1._cache
+        c1.flush_all()
+        c1.zap_all()
+        # The same file is still in use.
+        self.assertIs(c1._cache, cache)
+        c1.close()
+        self.assertIsNone(cache._map)
+        # Closing again is harmless.
+        cache.close()
+        c2.set_all_for_tid(1, [(b'abc', 0, None)])
+        self.assertEqual(c2[(0, 1)], (b'abc', 1))
@@ -193,6 +193,33 @@ class GenericLRUCacheTests(TestCase):
         return cache
 
 
+    def test_age_while_other_threads_use_cache(self):
+        # Aging releases the GIL; it mustn't run at the same time as
+        # anything else using the cache.
+        import threading
+        cache = self._makeOne(100000)
+        for i in range(1000):
+            cache[i] = (b'abc', i)
+
+        done = threading.Event()
+        def age():
+            while not done.is_set():
+                cache.age_frequencies()
+
+        thread = threading.Thread(target=age)
+        thread.start()
+        try:
+            for _ in range(20):
+                for i in range(1000):
+                    self.assertEqual(cache.get_item_with_tid(i, i), (b'abc', i))
+                    cache[i + 1000] = (b'def', i)
+                    del cache[i + 1000]
+        finally:
+            done.set()
+            thread.join()
+
+        self.assertEqual(len(cache), 1000)
+
     def test_delete(self):
         cache = self._makeOne(20)
         cache[1] = (b'abc', 0)
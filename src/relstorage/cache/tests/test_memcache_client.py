@@ -69,6 +69,17 @@ class AbstractStateCacheTests(TestCase):
         self.assertEqual(c[0, 2],
                          (b'def', 2))
 
+    def test_get_many(self):
+        c = self._makeOne()
+        c.set_all_for_tid(
+            1,
+            [(b'abc', 0, -1),
+             (b'ghi', 1, -1),])
+
+        self.assertEqual(c.get_many([(0, 1), (1, 1), (2, 1), (1, 2)]),
+                         {0: (b'abc', 1), 1: (b'ghi', 1)})
+        self.assertEqual(c.get_many(()), {})
+
     def test_updating_delta_map(self):
         self.assertIs(self._makeOne().updating_delta_map(self), self)
 
@@ -16,12 +16,15 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import threading
+
 from hamcrest import assert_that
 from nti.testing.matchers import validly_provides
 
 from relstorage.tests import TestCase
 from relstorage.tests import MockAdapter
 from relstorage.options import Options
+from relstorage._compat import OID_SET_TYPE as OidSet
 from relstorage.cache import interfaces
 from relstorage.cache import mvcc
 
@@ -399,6 +402,42 @@ class TestMVCCDatabaseCorrdinator(TestCase):
         self.assertEqual(self.coord.minimum_highest_visible_tid, 5)
         self.assertEqual(self.coord.object_index.depth, 3)
 
+    def test_poll_single_flight(self):
+        self.test_poll_no_index_begins()
+        second_viewer = self.add_viewer()
+        self.polled_changes = []
+        self.do_poll(viewer=second_viewer)
+        self.assertEqual(second_viewer.highest_visible_tid, 1)
+
+        self.coord.single_flight = True
+        polling = threading.Event()
+        proceed = threading.Event()
+        polled_since = []
+
+        def poll_invalidations(_conn, _cursor, last_tid):
+            polled_since.append(last_tid)
+            polling.set()
+            proceed.wait(5)
+            return [(0, 2)], 2
+        self.viewer.adapter.poller.poll_invalidations = poll_invalidations
+
+        results = {}
+        def lead():
+            results['leader'] = list(self.coord.poll(self.viewer, None, None))
+        leader = threading.Thread(target=lead)
+        leader.start()
+        polling.wait(5)
+        # We wait for the leader instead of polling ourself.
+        threading.Timer(0.1, proceed.set).start()
+        results['follower'] = list(self.coord.poll(second_viewer, None, None))
+        leader.join(5)
+
+        self.assertEqual(polled_since, [1])
+        self.assertEqual(results, {'leader': [(0, 2)], 'follower': [(0, 2)]})
+        self.assertIs(second_viewer.object_index, self.viewer.object_index)
+        self.assertEqual(second_viewer.highest_visible_tid, 2)
+        self.assertIsNone(self.coord._in_flight_poll)
+
     def test_restore_timeout(self):
         from relstorage.tests import mock
         from relstorage.tests import MockOptions
@@ -660,6 +699,19 @@ class TestObjectIndex(TestCase):
         })
 
 
+    def test_newest_items(self):
+        ix = self._makeOne(highest_visible_tid=1)
+        ix[1] = 1
+        ix[2] = 1
+        ix = ix.with_polled_changes(2, 1, [(1, 2), (3, 2)])
+        ix = ix.with_polled_changes(3, 2, [(3, 3), (4, 3)])
+        self.assertEqual(ix.depth, 3)
+
+        self.assertEqual(dict(ix.newest_items()), {1: 2, 2: 1, 3: 3, 4: 3})
+        self.assertEqual(dict(ix.newest_items(OidSet([1, 3, 5]))), {1: 2, 3: 3})
+        for oid, tid in ix.newest_items().items():
+            self.assertEqual(ix[oid], tid)
+
     def test_polled_changes_first_poll_get_changes_same_tid(self):
         # Some other entity had a TID in the past (since we began) and
         # they polled and got changes that overlapped our
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from relstorage.tests import TestCase
+
+from . import MockOptions
+
+
+class TestAccessPatternPrefetcher(TestCase):
+
+    def _getClass(self):
+        from relstorage.cache.prefetcher import AccessPatternPrefetcher
+        return AccessPatternPrefetcher
+
+    def _makeOne(self, follower_count=3):
+        return self._getClass()(follower_count)
+
+    def test_from_options(self):
+        kind = self._getClass()
+        self.assertIsNone(kind.from_options(MockOptions()))
+        self.assertIsNone(kind.from_options(MockOptions.from_args(cache_prefetch_followers=0)))
+        inst = kind.from_options(MockOptions.from_args(cache_prefetch_followers=5))
+        self.assertEqual(inst.follower_count, 5)
+
+    def test_learns_followers(self):
+        inst = self._makeOne()
+        # Nothing known the first time through.
+        for oid in 1, 2, 3, 4, 5:
+            self.assertEqual(inst.missed(oid), [])
+
+        # Each OID is followed by the next three, nearest last.
+        self.assertEqual(inst.followers_of(1), [4, 3, 2])
+        self.assertEqual(inst.followers_of(2), [5, 4, 3])
+        self.assertEqual(inst.followers_of(4), [5])
+        self.assertEqual(inst.followers_of(5), [])
+        self.assertEqual(len(inst), 4)
+
+        # Seeing it again reports what followed last time.
+        self.assertEqual(inst.missed(1), [4, 3, 2])
+
+    def test_repeated_follower_moves_to_front(self):
+        inst = self._makeOne(follower_count=2)
+        for oid in 1, 2, 3, 1, 3:
+            inst.missed(oid)
+        self.assertEqual(inst.followers_of(1), [3, 2])
+        # 1 never follows itself.
+        self.assertNotIn(1, inst.followers_of(1))
+
+    def test_shared_table_separate_windows(self):
+        inst = self._makeOne()
+        other = inst.new_instance()
+        inst.missed(1)
+        other.missed(2)
+        # 2 wasn't loaded by the same instance that loaded 1.
+        self.assertEqual(inst.followers_of(1), [])
+        inst.missed(3)
+        self.assertEqual(other.followers_of(1), [3])
+
+    def test_bounded(self):
+        class Prefetcher(self._getClass()):
+            __slots__ = ()
+            max_oids = 2
+        inst = Prefetcher(1)
+        for oid in 1, 2, 3, 4:
+            inst.missed(oid)
+        self.assertEqual(len(inst), 2)
+        # The oldest entry was discarded.
+        self.assertEqual(inst.followers_of(1), [])
+        self.assertEqual(inst.followers_of(3), [4])
+
+    def test_clear(self):
+        inst = self._makeOne()
+        inst.missed(1)
+        inst.missed(2)
+        inst.clear()
+        self.assertEqual(len(inst), 0)
+        self.assertEqual(inst.missed(3), [])
+        self.assertEqual(inst.followers_of(2), [])
+        self.assertEqual(inst.stats()['tracked OIDs'], 0)
@@ -186,6 +186,38 @@ class StorageCacheTests(TestCase):
         self.test_closed_state(c2)
         self.test_closed_state(c)
 
+    def test_load_lazily_from_persistent_cache(self):
+        c, oid, tid = self._setup_for_save()
+        c.save(overwrite=True)
+
+        c2 = self._makeOne(current_oids={oid: tid},
+                           cache_local_dir=c.options.cache_local_dir,
+                           cache_local_dir_lazy=True)
+        self.assertEqual(0, len(c2))
+        c2.adapter.poller.poll_tid = tid
+        c2.adapter.poller.poll_changes = []
+        c2.poll(None, None, None)
+        self.assertEqual(c2.highest_visible_tid, tid)
+        self.assertIsNone(c2.object_index[oid])
+
+        adapter = c2.adapter
+        def load_current(_cursor, _oid_int):
+            raise AssertionError("Should not load")
+        adapter.mover.load_current = load_current
+        self.assertEqual(c2.load(None, oid), (b'abc', tid))
+        self.assertEqual(c2.object_index[oid], tid)
+        self.assertEqual(1, len(c2))
+
+        # If the database has a different state, that's used instead.
+        c3 = self._makeOne(current_oids={oid: tid - 1},
+                           cache_local_dir=c.options.cache_local_dir,
+                           cache_local_dir_lazy=True)
+        c3.adapter.poller.poll_tid = tid
+        c3.adapter.poller.poll_changes = []
+        c3.poll(None, None, None)
+        self.assertEqual(c3.load_many(None, [oid]), {oid: (b'', tid - 1)})
+        self.assertEqual(c3.object_index[oid], tid - 1)
+
     def test_save_no_hits_no_sets(self):
         c, _, _ = self._setup_for_save()
         c.local_client.reset_stats()
@@ -236,6 +268,142 @@ class StorageCacheTests(TestCase):
         res = c.load(None, 2)
         self.assertEqual(res, (None, None))
 
+    def test_load_many_without_checkpoints(self):
+        c = self._makeOne(current_oids={1: 1})
+        self.assertEqual(c.load_many(None, [1, 2]), {1: (b'', 1)})
+        # Nothing was cached.
+        self.assertEqual(len(c), 0)
+
+    def test_load_many(self):
+        from relstorage.tests.fakecache import data
+        c = self._makeOne()
+        adapter = c.adapter
+        adapter.mover.data.update({
+            1: (b'abc', 2),
+            2: (b'def', 2),
+            3: (b'ghi', 3),
+        })
+        # Establish polling, then poll again to find the changes.
+        c.poll(None, None, None)
+        adapter.poller.poll_tid = 3
+        adapter.poller.poll_changes = [(1, 2), (2, 2), (3, 3)]
+        c.poll(None, None, None)
+        self.assertEqual(c.highest_visible_tid, 3)
+
+        c.cache[(1, 2)] = (b'abc', 2)
+        self.assertEqual(c.object_index[1], 2)
+
+        loaded_oids = []
+        load_currents = adapter.mover.load_currents
+        def record_load_currents(cursor, oids):
+            loaded_oids.append(sorted(oids))
+            return load_currents(cursor, oids)
+        adapter.mover.load_currents = record_load_currents
+
+        result = c.load_many(None, [1, 2, 3, 4])
+        self.assertEqual(result, {
+            1: (b'abc', 2),
+            2: (b'def', 2),
+            3: (b'ghi', 3),
+        })
+        # Only the misses went to the database, all at once.
+        self.assertEqual(loaded_oids, [[2, 3, 4]])
+        # And they were stored in the cache.
+        self.assertEqual(c.local_client[(2, 2)], (b'def', 2))
+        self.assertEqual(c.local_client[(3, 3)], (b'ghi', 3))
+        self.assertIn('myprefix:state:2:2', data)
+
+        # Everything that exists is now a hit.
+        del loaded_oids[:]
+        self.assertEqual(c.load_many(None, [1, 2, 3]), result)
+        self.assertEqual(loaded_oids, [])
+
+    def test_load_prefetches_followers(self):
+        c = self._makeOne(cache_prefetch_followers=2)
+        adapter = c.adapter
+        adapter.mover.data.update({
+            1: (b'abc', 2),
+            2: (b'def', 2),
+            3: (b'ghi', 2),
+        })
+        c.poll(None, None, None)
+        adapter.poller.poll_tid = 2
+        adapter.poller.poll_changes = [(1, 2), (2, 2), (3, 2)]
+        c.poll(None, None, None)
+
+        loaded_oids = []
+        load_current = adapter.mover.load_current
+        load_currents = adapter.mover.load_currents
+        def record_load_current(cursor, oid):
+            loaded_oids.append(oid)
+            return load_current(cursor, oid)
+        def record_load_currents(cursor, oids):
+            loaded_oids.append(sorted(oids))
+            return load_currents(cursor, oids)
+        adapter.mover.load_current = record_load_current
+        adapter.mover.load_currents = record_load_currents
+
+        # The first traversal goes one at a time, and teaches the prefetcher.
+        for oid in 1, 2, 3:
+            c.load(None, oid)
+        self.assertEqual(loaded_oids, [1, 2, 3])
+        self.assertEqual(c.prefetcher.followers_of(1), [3, 2])
+        self.assertIsNotNone(c.stats()['prefetch_stats'])
+
+        # After the cache is emptied, the followers come along
+        # with the first object.
+        c.cache.flush_all()
+        del loaded_oids[:]
+        self.assertEqual(c.load(None, 1), (b'abc', 2))
+        self.assertEqual(loaded_oids, [[1, 2, 3]])
+        self.assertEqual(c.load(None, 2), (b'def', 2))
+        self.assertEqual(c.load(None, 3), (b'ghi', 2))
+        self.assertEqual(loaded_oids, [[1, 2, 3]])
+
+    def test_prefetcher_disabled_by_default(self):
+        c = self._makeOne()
+        self.assertIsNone(c.prefetcher)
+        self.assertIsNone(c.stats()['prefetch_stats'])
+
+    def test_load_before(self):
+        c = self._makeOne()
+        mover = c.adapter.mover
+        loaded = []
+        def load_before_with_next(_cursor, oid_int, tid_int):
+            loaded.append((oid_int, tid_int))
+            if oid_int != 1:
+                return None
+            if tid_int <= 2:
+                return None, None, None
+            if tid_int <= 5:
+                return b'abc', 2, 5
+            return b'def', 5, None
+        mover.load_before_with_next = load_before_with_next
+
+        self.assertIsNone(c.load_before(None, 2, 10))
+        self.assertEqual(c.load_before(None, 1, 2), (None, None, None))
+        self.assertEqual(c.load_before(None, 1, 4), (b'abc', 2, 5))
+        self.assertEqual(c.load_before(None, 1, 6), (b'def', 5, None))
+        self.assertEqual(len(loaded), 4)
+        # Both revisions were cached.
+        self.assertEqual(c.local_client[(1, 2)], (b'abc', 2))
+        self.assertEqual(c.local_client[(1, 5)], (b'def', 5))
+
+        # The replaced revision is now served from the cache,
+        # for any tid in its range; the current one is not.
+        del loaded[:]
+        self.assertEqual(c.load_before(None, 1, 3), (b'abc', 2, 5))
+        self.assertEqual(c.load_before(None, 1, 5), (b'abc', 2, 5))
+        self.assertEqual(loaded, [])
+        self.assertEqual(c.load_before(None, 1, 6), (b'def', 5, None))
+        self.assertEqual(loaded, [(1, 6)])
+
+        # If it falls out of the cache, we go back to the database.
+        c.clear(load_persistent=False)
+        del loaded[:]
+        self.assertEqual(c.load_before(None, 1, 3), (b'abc', 2, 5))
+        self.assertEqual(loaded, [(1, 3)])
+
     def test_store_temp(self):
         c = self._makeOne()
         temp_storage = TemporaryStorage()
@@ -246,9 +414,7 @@ class StorageCacheTests(TestCase):
         self.assertEqual(dict(temp_storage.stored_oids),
                          {1: (3, 6, 0), 2: (6, 9, 0)})
         self.assertEqual(temp_storage.max_stored_oid, 2)
-        f = temp_storage._queue
-        f.seek(0)
-        self.assertEqual(f.read(), b'abcdefghi')
+        self.assertEqual(temp_storage._chunks[0][:9], b'abcdefghi')
         c.after_tpc_finish(p64(3), temp_storage)
 
         # self.assertEqual(dict(c.delta_after0), {2: 3, 1: 3})
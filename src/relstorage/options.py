@@ -97,6 +97,12 @@ class Options(object):
     pack_skip_prepack = False
     #: Amount of time between commits/log messages.
     pack_batch_timeout = 15.0
+    #: Find reachable objects with a query in the database
+    pack_traverse_in_database = False
+    #: How many processes find the references between objects
+    pack_reference_processes = 0
+    #: Delete garbage by joining against pack_object in the database
+    pack_delete_in_database = False
 
     #: List of memcache servers
     cache_servers = ()  # ['127.0.0.1:11211']
@@ -110,15 +116,33 @@ class Options(object):
     cache_local_object_max = 16384
     #: How to compress local pickles
     cache_local_compression = 'none'
+    #: How many independent parts to divide the local cache into
+    cache_local_shards = 1
     #: Directory holding persistent cache files
     cache_local_dir = None
+    #: Seconds between background writes to the persistent cache files
+    cache_local_checkpoint_interval = 0
+    #: Read the persistent cache files on demand instead of at startup
+    cache_local_dir_lazy = False
+    #: File holding a local cache shared by all processes on the host
+    cache_local_shared_path = None
     #: Switch checkpoints after this many writes
     cache_delta_size_limit = 100000 if not PYPY else 50000
+    #: How many followers of each object to prefetch on a cache miss
+    cache_prefetch_followers = 0
+    #: Let only one connection at a time poll, sharing its result
+    cache_poll_single_flight = False
 
     #: How long to wait for a commit lock, in seconds.
     commit_lock_timeout = 30
     #: Lock ID for Oracle
     commit_lock_id = 0
+    #: Announce commits with NOTIFY, and listen for them instead of polling
+    commit_notify = False
+    #: Send stored objects to the database in the background once this many bytes are waiting
+    commit_stream_size = 0
+    #: Send stored objects to the database in the background once this many are waiting
+    commit_stream_rows = 0
 
     #: Automatically create the schema if needed
     create_schema = True
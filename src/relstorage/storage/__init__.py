@@ -76,6 +76,7 @@ from .tpc import NotInTransaction
 from .tpc.begin import HistoryFree
 from .tpc.begin import HistoryPreserving
 from .tpc.restore import Restore
+from .tpc.stats import CommitStats
 
 from .util import copy_storage_methods
 from .util import make_cannot_write
@@ -146,6 +147,7 @@ class RelStorage(LegacyMethodsMixin,
     def __init__(self, adapter, name=None, create=None,
                  options=None, cache=None, blobhelper=None,
                  store_connection_pool=None,
+                 commit_stats=None,
                  **kwoptions):
         # pylint:disable=too-many-branches, too-many-statements
         if options and kwoptions:
@@ -217,6 +219,10 @@ class RelStorage(LegacyMethodsMixin,
         else:
             self.blobhelper = BlobHelper(options=options, adapter=adapter)
 
+        # A :class:`relstorage.storage.tpc.stats.CommitStats`, shared
+        # with all instances, timing the phases of committing.
+        self.commit_stats = commit_stats or CommitStats.for_adapter(adapter)
+
         tpc_begin_factory = HistoryPreserving if self._options.keep_history else HistoryFree
 
         if hasattr(self._adapter.packundo, 'deleteObject'):
@@ -287,7 +293,8 @@ class RelStorage(LegacyMethodsMixin,
         other = type(self)(adapter=adapter, name=self.__name__,
                            create=False, options=options, cache=cache,
                            blobhelper=blobhelper,
-                           store_connection_pool=self._store_connection_pool.new_instance())
+                           store_connection_pool=self._store_connection_pool.new_instance(),
+                           commit_stats=self.commit_stats)
         if before:
             other._read_only_error = ReadOnlyHistoryError
             other.tpc_begin = make_cannot_write(other, other.tpc_begin)
@@ -390,6 +397,7 @@ class RelStorage(LegacyMethodsMixin,
                 instance.close()
         self._instances = ()
         logger.debug("Closing storage cache with stats %s", self._cache.stats())
+        logger.debug("Closing storage with commit stats %s", self.commit_stats.stats())
         self._cache.close()
         self._cache = _ClosedCache()
         self._tpc_phase.close()
@@ -548,7 +556,9 @@ class RelStorage(LegacyMethodsMixin,
         commit_in_progress = False
         if self._tpc_phase:
             commit_in_progress = True
-            pool = SingleConnectionPool(self._tpc_phase.shared_state.store_connection)
+            shared_state = self._tpc_phase.shared_state
+            pool = SingleConnectionPool(shared_state.store_connection,
+                                        shared_state.temp_streaming_paused)
 
         return self._oids.new_oid(pool, commit_in_progress)
 
@@ -882,7 +892,8 @@ class RelStorage(LegacyMethodsMixin,
         Copy(self.blobhelper, self, self).copyTransactionsFrom(other)
         self._adapter.stats.large_database_change()
 
-    def pack(self, t, referencesf, prepack_only=False, skip_prepack=False, check_refs=False):
+    def pack(self, t, referencesf, prepack_only=False, skip_prepack=False, check_refs=False,
+             resume=False):
         # Force pack_gc to on while checking references; otherwise we don't traverse the
         # tree and nothing happens.
         options = self._options.copy(pack_gc=True) if check_refs else self._options
@@ -891,7 +902,7 @@ class RelStorage(LegacyMethodsMixin,
             assert pack.options.pack_gc
             result = pack.check_refs(referencesf)
         else:
-            result = pack.pack(t, referencesf, prepack_only, skip_prepack)
+            result = pack.pack(t, referencesf, prepack_only, skip_prepack, resume)
             if not self.keep_history:
                 # In a history free database, it's *possible*
                 # that the database's last transaction ID could now have actually
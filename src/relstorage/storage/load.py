@@ -29,6 +29,7 @@ from relstorage.interfaces import POSKeyError
 from relstorage.cache.interfaces import CacheConsistencyError
 from .._compat import metricmethod
 from .._compat import metricmethod_sampled
+from .._compat import iteritems
 from .util import storage_method
 from .util import stale_aware
 
@@ -123,6 +124,30 @@ class Loader(object):
                                               "creation undone"))
         return state, int64_to_8bytes(tid_int)
 
+    @stale_aware
+    @storage_method
+    @metricmethod_sampled
+    def loadMany(self, oids):
+        """
+        Load the current state of each of the *oids*.
+
+        Objects found in the cache are returned from it; all the
+        others are loaded from the database using a single query.
+
+        Returns a dictionary ``{oid: (state, tid)}``. Unlike
+        :meth:`load`, objects that do not exist, or whose creation has
+        been undone, do not raise a ``POSKeyError``; they are simply
+        not included.
+        """
+        oid_ints = [bytes8_to_int64(oid) for oid in oids]
+        load_cursor = self.load_connection.cursor
+        loaded = self.__load_using_method(load_cursor, self.cache.load_many, oid_ints)
+        return {
+            int64_to_8bytes(oid_int): (state, int64_to_8bytes(tid_int))
+            for oid_int, (state, tid_int) in iteritems(loaded)
+            if state
+        }
+
     @storage_method
     def getTid(self, oid):
         """
@@ -223,9 +248,6 @@ class Loader(object):
             return self.load(oid) + (None,)
         oid_int = bytes8_to_int64(oid)
 
-        # TODO: This makes three separate queries, and also bypasses the cache.
-        # We should be able to fix at least the multiple queries.
-
         # In the past, we would use the store connection (only if it was already open)
         # to "allow leading dato from later transactions for conflict resolution".
         # However, this doesn't seem to be used in conflict
@@ -239,12 +261,11 @@ class Loader(object):
         # We had it as a todo for a long time to stop doing that, and
         # pooling store connections was a great time to try it.
         cursor = self.load_connection.cursor
-        if not self.adapter.mover.exists(cursor, oid_int):
+        result = self.cache.load_before(cursor, oid_int, bytes8_to_int64(tid))
+        if result is None:
             raise self.__pke(oid, exists=False)
 
-        state, start_tid = self.adapter.mover.load_before(
-            cursor, oid_int, bytes8_to_int64(tid))
-
+        state, start_tid, end_int = result
         if start_tid is None:
             return None
 
@@ -256,8 +277,6 @@ class Loader(object):
             # self._log_keyerror doesn't work here, only in certain states.
             self.__pke(oid, undone=True)
 
-        end_int = self.adapter.mover.get_object_tid_after(
-            cursor, oid_int, start_tid)
         if end_int is not None:
             end = int64_to_8bytes(end_int)
         else:
@@ -21,6 +21,8 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import time
+
 from ZODB.POSException import ReadOnlyError
 from ZODB.utils import p64 as int64_to_8bytes
 
@@ -47,8 +49,23 @@ class AbstractOIDs(object):
     def set_min_oid(self, store_connection, max_observed_oid):
         raise NotImplementedError
 
+    def min_oid_to_set(self, max_observed_oid):
+        raise NotImplementedError
+
+    def min_oid_was_set(self, max_observed_oid):
+        raise NotImplementedError
+
 class OIDs(AbstractOIDs):
 
+    #: The most ranges of 16 OIDs to reserve from the database at once.
+    MAX_RANGE_COUNT = 1024
+
+    #: How often, in seconds, we'd like to go to the database for
+    #: more OIDs. If we use up what we reserved faster than this,
+    #: we reserve more next time (at most twice as many); if slower,
+    #: fewer.
+    REFILL_INTERVAL = 1.0
+
     def __init__(self, oidallocator):
         # From largest to smallest: [16, 15, 14, ..., 1]
         self.preallocated_oids = [] # type: list
@@ -56,6 +73,9 @@ class OIDs(AbstractOIDs):
         # A value of 0 is not legal for the oidallocator to produce.
         self.max_allocated_oid = 0 # type: int
         self.oidallocator = oidallocator
+        # How many ranges we asked for last time, and when.
+        self.range_count = 1
+        self.last_refill_time = None
         if hasattr(oidallocator, 'new_oids_no_cursor'):
             self.__preallocate_oids = self.__preallocate_oids_no_cursor
 
@@ -65,29 +85,45 @@ class OIDs(AbstractOIDs):
 
         Must be done in a transaction while the store connection is usable.
         """
+        min_oid = self.min_oid_to_set(max_observed_oid)
+        if min_oid is not None:
+            # Set it in the database for everyone.
+            self.oidallocator.set_min_oid(store_connection.cursor, min_oid)
+            self.min_oid_was_set(min_oid)
+
+    def min_oid_to_set(self, max_observed_oid):
+        """
+        Return *max_observed_oid* if the database needs to be told
+        about it before we can produce OIDs greater than it, otherwise
+        None.
+
+        Callers that pass the result to the database themselves
+        (for example, as part of another query) must then call
+        :meth:`min_oid_was_set`.
+        """
         if max_observed_oid > self.max_allocated_oid:
             # They saw one from outside of us that's greater than what
             # we've allocated. We could be a brand new object that's
             # never allocated an OID before (i.e., we're unused, or
             # we've only done loads); or, we could be copying
             # transactions from an external storage.
-
-            # Set it in the database for everyone.
-            self.oidallocator.set_min_oid(store_connection.cursor,
-                                          max_observed_oid)
-            # Then, set it in the storage for this thread
-            # so we don't have to keep doing this if it only ever
-            # updates existing objects.
-            # NOTE: This is a non-transactional change to the our state.
-            # That's OK, though, as the underlying sequence for OIDs we allocate
-            # is also non-transactional.
-            self.max_allocated_oid = max_observed_oid
-            # Discard any preallocated oids that are less than this; they're not
-            # safe to use in the most general case. (In the typical case they probably
-            # are.)
-            preallocated_oids = self.preallocated_oids
-            while preallocated_oids and preallocated_oids[-1] < max_observed_oid:
-                preallocated_oids.pop()
+            return max_observed_oid
+        return None
+
+    def min_oid_was_set(self, max_observed_oid):
+        # Set it in the storage for this thread
+        # so we don't have to keep doing this if it only ever
+        # updates existing objects.
+        # NOTE: This is a non-transactional change to the our state.
+        # That's OK, though, as the underlying sequence for OIDs we allocate
+        # is also non-transactional.
+        self.max_allocated_oid = max_observed_oid
+        # Discard any preallocated oids that are less than this; they're not
+        # safe to use in the most general case. (In the typical case they probably
+        # are.)
+        preallocated_oids = self.preallocated_oids
+        while preallocated_oids and preallocated_oids[-1] < max_observed_oid:
+            preallocated_oids.pop()
 
     def new_oid(self, store_connection_pool, commit_in_progress):
         # Prior to ZODB 5.1.2, this method was actually called on the
@@ -110,7 +146,8 @@ class OIDs(AbstractOIDs):
         # Thus we may or may not have a store connection already open;
         # if we do, we can't restart it or drop it.
         if not self.preallocated_oids:
-            self.__preallocate_oids(store_connection_pool, commit_in_progress)
+            self.__preallocate_oids(store_connection_pool, commit_in_progress,
+                                    self._next_range_count())
             # OIDs are monotonic, always increasing. It should never
             # go down or return equal to what we've already seen.
             self.max_allocated_oid = max(self.preallocated_oids[0], self.max_allocated_oid)
@@ -118,18 +155,37 @@ class OIDs(AbstractOIDs):
         oid_int = self.preallocated_oids.pop()
         return int64_to_8bytes(oid_int)
 
-    def __preallocate_oids(self, store_connection_pool, commit_in_progress): # pylint:disable=method-hidden
+    def _next_range_count(self):
+        # Estimate how many ranges we'd use in REFILL_INTERVAL at the
+        # rate we used the last ones. Grow gradually, but shrink as
+        # fast as needed.
+        now = time.time()
+        last_refill_time = self.last_refill_time
+        self.last_refill_time = now
+        if last_refill_time is None:
+            return self.range_count
+        range_count = self.range_count
+        elapsed = now - last_refill_time
+        if elapsed <= 0:
+            wanted = range_count * 2
+        else:
+            wanted = int(range_count * self.REFILL_INTERVAL / elapsed)
+        self.range_count = max(1, min(wanted, range_count * 2, self.MAX_RANGE_COUNT))
+        return self.range_count
+
+    def __preallocate_oids(self, store_connection_pool, commit_in_progress, range_count): # pylint:disable=method-hidden
         with store_connection_pool.borrowing(commit=True) as store_connection:
             self.preallocated_oids = store_connection.call(
                 self.__new_oid_callback,
-                can_reconnect=not commit_in_progress
+                not commit_in_progress,
+                range_count
             )
 
-    def __preallocate_oids_no_cursor(self, _store_connection, commit_in_progress):# pylint:disable=unused-argument
-        self.preallocated_oids = self.oidallocator.new_oids_no_cursor()
+    def __preallocate_oids_no_cursor(self, _store_connection, commit_in_progress, range_count):# pylint:disable=unused-argument
+        self.preallocated_oids = self.oidallocator.new_oids_no_cursor(range_count)
 
-    def __new_oid_callback(self, _store_conn, store_cursor, _fresh_connection):
-        return self.oidallocator.new_oids(store_cursor)
+    def __new_oid_callback(self, _store_conn, store_cursor, _fresh_connection, range_count):
+        return self.oidallocator.new_oids(store_cursor, range_count)
 
 
 @implementer(IStaleAware)
@@ -144,6 +200,11 @@ class ReadOnlyOIDs(AbstractOIDs):
     def set_min_oid(self, store_connection, max_observed_oid):
         raise ReadOnlyError
 
+    def min_oid_to_set(self, max_observed_oid):
+        raise ReadOnlyError
+
+    min_oid_was_set = min_oid_to_set
+
 @implementer(IStaleAware)
 class StaleOIDs(AbstractOIDs):
 
@@ -167,3 +228,8 @@ class StaleOIDs(AbstractOIDs):
 
     def set_min_oid(self, store_connection, max_observed_oid):
         raise self.stale_error
+
+    def min_oid_to_set(self, max_observed_oid):
+        raise self.stale_error
+
+    min_oid_was_set = min_oid_to_set
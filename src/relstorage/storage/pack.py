@@ -41,6 +41,7 @@ class Pack(object):
         'options',
         'locker',
         'connmanager',
+        'schema',
         'blobhelper',
         'cache',
         'packundo',
@@ -51,6 +52,7 @@ class Pack(object):
         self.options = options
         self.locker = adapter.locker
         self.connmanager = adapter.connmanager
+        self.schema = adapter.schema
         self.packundo = adapter.packundo.with_options(options)
         self.stats = adapter.stats
         self.blobhelper = blobhelper
@@ -179,6 +181,9 @@ class Pack(object):
         self.packundo.pack(tid_int,
                            packed_func=invalidate_cached_data)
         self.cache.remove_all_cached_data_for_oids(oids_removed)
+        # Old revisions are gone now, so loadBefore() mustn't find
+        # them by the ranges they used to be current for.
+        self.cache.revision_ranges.clear()
 
     @contextmanager
     def _holding_pack_lock(self):
@@ -186,6 +191,10 @@ class Pack(object):
         try:
             self.locker.hold_pack_lock(lock_cursor)
             try:
+                # With ``create-schema false``, the schema may not
+                # have been prepared since pack_progress was added.
+                # Then packs just can't be resumed.
+                self.packundo.track_pack_progress = self.schema.has_table('pack_progress')
                 yield
             finally:
                 self.locker.release_pack_lock(lock_cursor)
@@ -194,8 +203,14 @@ class Pack(object):
 
     @writable_storage_method
     @metricmethod
-    def pack(self, t, referencesf, prepack_only=False, skip_prepack=False):
-        """Pack the storage. Holds the pack lock for the duration."""
+    def pack(self, t, referencesf, prepack_only=False, skip_prepack=False, resume=False):
+        """
+        Pack the storage. Holds the pack lock for the duration.
+
+        If *resume* is true and an earlier pack was interrupted after
+        its pre-pack finished, finish that pack instead of starting
+        over; *t* is ignored in that case.
+        """
 
         prepack_only = prepack_only or self.options.pack_prepack_only
         skip_prepack = skip_prepack or self.options.pack_skip_prepack
@@ -204,7 +219,11 @@ class Pack(object):
             raise ValueError('Pick either prepack_only or skip_prepack.')
 
         with self._holding_pack_lock():
-            if not skip_prepack:
+            progress = self.packundo.get_pack_progress() if resume else None
+            if progress is not None:
+                tid_int = progress[0]
+                logger.info("pack: resuming the interrupted pack to TID %d", tid_int)
+            elif not skip_prepack:
                 tid_int = self.__pre_pack(t, referencesf)
             else:
                 # Need to determine the tid_int from the pack_object table
@@ -85,10 +85,11 @@ class BlobStorer(object):
         assert not version
         # We used to flush the batcher here, for some reason.
         store_func = tpc_phase.store
-        cursor = tpc_phase.shared_state.store_connection.cursor
-        blobhelper = tpc_phase.shared_state.blobhelper
-        blobhelper.storeBlob(cursor, store_func,
-                             oid, serial, data, blobfilename, version, txn)
+        with tpc_phase.shared_state.temp_streaming_paused():
+            cursor = tpc_phase.shared_state.store_connection.cursor
+            blobhelper = tpc_phase.shared_state.blobhelper
+            blobhelper.storeBlob(cursor, store_func,
+                                 oid, serial, data, blobfilename, version, txn)
 
     @phase_dependent_aborts_early
     @writable_storage_method
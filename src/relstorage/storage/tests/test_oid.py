@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for oid.py.
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import unittest
+
+from ZODB.utils import u64
+
+
+class MockOIDAllocator(object):
+
+    def __init__(self):
+        self.n = 0
+        self.range_counts = []
+
+    def new_oids_no_cursor(self, range_count=1):
+        from relstorage.adapters.oidallocator import AbstractRangedOIDAllocator
+        self.range_counts.append(range_count)
+        first_n = self.n + 1
+        self.n += range_count
+        return AbstractRangedOIDAllocator._oid_ranges_around(range(first_n, self.n + 1))
+
+
+class TestOIDs(unittest.TestCase):
+
+    def _makeOne(self):
+        from ..oid import OIDs
+        self.allocator = MockOIDAllocator()
+        inst = OIDs(self.allocator)
+        self.now = 1000.0
+        from relstorage.tests import mock
+        patcher = mock.patch('relstorage.storage.oid.time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return inst
+
+    def _new_oids(self, inst, count):
+        return [u64(inst.new_oid(None, False)) for _ in range(count)]
+
+    def test_grows_when_used_quickly(self):
+        inst = self._makeOne()
+        self.assertEqual(self._new_oids(inst, 16 + 32 + 64 + 1), list(range(1, 114)))
+        self.assertEqual(self.allocator.range_counts, [1, 2, 4, 8])
+        self.assertEqual(inst.max_allocated_oid, 16 * 15)
+
+    def test_limited(self):
+        inst = self._makeOne()
+        inst.range_count = inst.MAX_RANGE_COUNT
+        self._new_oids(inst, 1)
+        self._new_oids(inst, 16 * inst.MAX_RANGE_COUNT)
+        self.assertEqual(self.allocator.range_counts,
+                         [inst.MAX_RANGE_COUNT, inst.MAX_RANGE_COUNT])
+
+    def test_shrinks_when_used_slowly(self):
+        inst = self._makeOne()
+        inst.range_count = 64
+        self._new_oids(inst, 1)
+        # We used 64 ranges in 16 seconds; we need 4 a second.
+        self.now += 16
+        self._new_oids(inst, 16 * 64)
+        # And then much slower than that.
+        self.now += 1000
+        self._new_oids(inst, 16 * 4)
+        self.assertEqual(self.allocator.range_counts, [64, 4, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
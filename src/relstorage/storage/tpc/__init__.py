@@ -24,6 +24,7 @@ explicit.
 from __future__ import absolute_import
 from __future__ import print_function
 
+import contextlib
 import logging
 import os
 
@@ -42,6 +43,7 @@ from ...adapters.connections import ClosedConnection
 from ..._util import Lazy as BaseLazy
 
 from .temporary_storage import TemporaryStorage
+from .stream import TempStreamer
 
 log = logging.getLogger("relstorage")
 
@@ -71,8 +73,9 @@ class _LazyResource(BaseLazy):
 
     def _stored_value_for_name_in_inst(self, value, name, inst):
         # type: (Any, str, SharedTPCState) -> None
-        if name == 'store_connection':
-            # Try to do this first
+        if name in ('store_connection', 'temp_streamer'):
+            # Try to do this first. The streamer uses the store
+            # connection, so it comes before that.
             inst._used_resources.insert(0, self)
         else:
             inst._used_resources.append(self)
@@ -186,6 +189,10 @@ class SharedTPCState(object):
     def adapter(self):
         return self._storage._adapter
 
+    @BaseLazy
+    def commit_stats(self):
+        return self._storage.commit_stats
+
     @_LazyResource
     def temp_storage(self):
         return TemporaryStorage()
@@ -198,6 +205,45 @@ class SharedTPCState(object):
     def temp_storage(self, _storage, temp_storage):
         temp_storage.close()
 
+    @_LazyResource
+    def temp_streamer(self):
+        return TempStreamer.from_options(self._storage._options, self)
+
+    @temp_streamer.aborter
+    def temp_streamer(self, _storage, temp_streamer, _force):
+        if temp_streamer is not None:
+            temp_streamer.abort()
+
+    @temp_streamer.releaser
+    def temp_streamer(self, _storage, temp_streamer):
+        if temp_streamer is not None:
+            temp_streamer.abort()
+
+    @contextlib.contextmanager
+    def temp_streaming_paused(self):
+        """
+        A context manager to use around anything that needs the store
+        connection before voting, while objects may still be stored.
+        """
+        temp_streamer = self.__dict__.get('temp_streamer')
+        if temp_streamer is None:
+            yield
+        else:
+            with temp_streamer.paused():
+                yield
+
+    def stop_streaming_temps(self):
+        """
+        Call this before using the store connection for anything
+        else in a transaction that may also store objects. The objects
+        stored from then on are all sent when voting.
+        """
+        if 'temp_streamer' not in self.__dict__:
+            # Never start.
+            self.__dict__['temp_streamer'] = None
+        elif self.temp_streamer is not None:
+            self.temp_streamer.stop()
+
     def has_temp_data(self):
         return 'temp_storage' in self.__dict__ and self.temp_storage
 
@@ -122,8 +122,12 @@ class AbstractBegin(AbstractTPCStateDatabaseAvailable):
 
         # Save the data locally in a temporary place. Later, closer to commit time,
         # we'll send it all over at once. This lets us do things like use
-        # COPY in postgres.
+        # COPY in postgres. If we're streaming, some of it may be sent sooner
+        # in the background.
         self.shared_state.temp_storage.store_temp(oid_int, data, prev_tid_int)
+        temp_streamer = self.shared_state.temp_streamer
+        if temp_streamer is not None:
+            temp_streamer.stored(oid_int)
 
     @metricmethod_sampled
     def checkCurrentSerialInTransaction(self, oid, required_tid, transaction):
@@ -206,6 +210,7 @@ class AbstractBegin(AbstractTPCStateDatabaseAvailable):
 
         # We delegate the actual operation to the adapter's packundo,
         # just like native pack
+        self.shared_state.stop_streaming_temps()
         cursor = self.shared_state.store_connection.cursor
         # When this is done, we get a tpc_vote,
         # and a tpc_finish.
@@ -252,6 +257,7 @@ class HistoryPreserving(AbstractBegin):
         # theoretically these are unreachable? Our custom
         # vote stage just removes this transaction anyway; maybe it
         # can skip the committing.
+        self.shared_state.stop_streaming_temps()
         self._obtain_commit_lock(self.shared_state.store_connection.cursor)
         # A transaction that deletes objects can *only* delete objects.
         # That way we don't need to store an entry in the transaction table
@@ -283,6 +289,7 @@ class HistoryPreserving(AbstractBegin):
         undo_tid_int = bytes8_to_int64(undo_tid)
 
         adapter = self.shared_state.adapter
+        self.shared_state.stop_streaming_temps()
         cursor = self.shared_state.store_connection.cursor
         assert cursor is not None
 
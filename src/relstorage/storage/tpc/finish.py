@@ -31,10 +31,11 @@ def Finish(vote_state, committed_tid_int, needs_store_commit=True):
         # no point doing so again. Also no point in rolling it back either.
         txn = vote_state.shared_state.prepared_txn
         assert txn is not None
-        vote_state.shared_state.adapter.txncontrol.commit_phase2(
-            vote_state.shared_state.store_connection,
-            txn,
-            vote_state.shared_state.load_connection)
+        with vote_state.shared_state.commit_stats.timing('commit'):
+            vote_state.shared_state.adapter.txncontrol.commit_phase2(
+                vote_state.shared_state.store_connection,
+                txn,
+                vote_state.shared_state.load_connection)
 
     vote_state.committing_tid_lock.release_commit_lock(
         vote_state.shared_state.store_connection.cursor)
@@ -68,6 +68,8 @@ class Restore(object):
         # though, so if we do multiple things in a restore transaction,
         # we could still wind up with locking issues (I think?)
         adapter = begin_state.shared_state.adapter
+        # restore() uses the store connection directly.
+        begin_state.shared_state.stop_streaming_temps()
         cursor = begin_state.shared_state.store_connection.cursor
         packed = (status == 'p')
         try:
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Timing statistics for the phases of committing a transaction.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import threading
+import time
+
+from perfmetrics import statsd_client
+
+
+class PhaseHistogram(object):
+    """
+    Counts durations of one commit phase.
+
+    Durations are counted in buckets by powers of two milliseconds:
+    the first bucket holds those under 1ms, the next those under 2ms,
+    then under 4ms, and so on; the last bucket holds everything else.
+    """
+
+    #: How many buckets. The last one starts at a little over 4 minutes.
+    BUCKET_COUNT = 20
+
+    __slots__ = (
+        'count',
+        'total',
+        'min',
+        'max',
+        'buckets',
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * self.BUCKET_COUNT
+
+    def record(self, duration):
+        self.count += 1
+        self.total += duration
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+        ms = int(duration * 1000)
+        self.buckets[min(ms.bit_length(), self.BUCKET_COUNT - 1)] += 1
+
+    def stats(self):
+        histogram = {}
+        for i, count in enumerate(self.buckets):
+            if not count:
+                continue
+            if i == self.BUCKET_COUNT - 1:
+                label = '>=%dms' % (1 << (i - 1),)
+            else:
+                label = '<%dms' % (1 << i,)
+            histogram[label] = count
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'histogram': histogram,
+        }
+
+
+class CommitStats(object):
+    """
+    Records how long each phase of committing transactions takes.
+
+    One of these is shared by a storage and all its instances. Each
+    duration is also sent to the statsd client configured for
+    :mod:`perfmetrics`, if there is one, as a timer named
+    ``relstorage.commit.<adapter>.<phase>``.
+    """
+
+    #: The phases that are recorded.
+    #:
+    #: - ``stream_temps``: Sending a batch of stored objects to the
+    #:   database's temporary tables in the background before vote,
+    #:   when ``commit-stream-size`` or ``commit-stream-rows`` is set.
+    #: - ``flush_temps``: Sending the stored objects (or, when
+    #:   streaming, the ones that weren't sent yet) to the database's
+    #:   temporary tables during vote.
+    #: - ``lock_objects``: Locking the objects being modified and
+    #:   those that must stay current, and detecting conflicts. This
+    #:   includes reserving any OIDs that were stored but not
+    #:   allocated.
+    #: - ``resolve_conflicts``: Resolving conflicts, and sending the
+    #:   resolved states to the database. Only transactions that had
+    #:   conflicts are counted.
+    #: - ``lock_and_move``: Taking the commit lock, choosing the
+    #:   transaction ID, and moving the objects to their permanent
+    #:   tables. Most adapters do all of this in a single call, and
+    #:   commit in that call too unless blobs must be moved first.
+    #: - ``blobs``: Moving blobs to their final location.
+    #: - ``commit``: Committing, when that's not part of ``lock_and_move``.
+    #: - ``objects_locked``: The total time the objects were locked,
+    #:   from the end of ``lock_objects`` through the commit.
+    PHASES = (
+        'stream_temps',
+        'flush_temps',
+        'lock_objects',
+        'resolve_conflicts',
+        'lock_and_move',
+        'blobs',
+        'commit',
+        'objects_locked',
+    )
+
+    def __init__(self, adapter_name):
+        self.adapter_name = adapter_name
+        self._lock = threading.Lock()
+        self._histograms = {phase: PhaseHistogram() for phase in self.PHASES}
+        self._metric_prefix = 'relstorage.commit.%s.' % (adapter_name,)
+
+    @classmethod
+    def for_adapter(cls, adapter):
+        # MySQLAdapter -> 'mysql', Sqlite3Adapter -> 'sqlite3'
+        return cls(type(adapter).__name__.lower().replace('adapter', ''))
+
+    def record(self, phase, duration):
+        """
+        Record that *phase* took *duration* seconds.
+        """
+        with self._lock:
+            self._histograms[phase].record(duration)
+        client = statsd_client()
+        if client is not None:
+            client.timing(self._metric_prefix + phase, duration * 1000)
+
+    def timing(self, phase):
+        """
+        Return a context manager that records the time spent in its
+        body as *phase*.
+        """
+        return _Timing(self, phase)
+
+    def stats(self):
+        """
+        Return a dictionary describing the durations of each phase
+        seen so far.
+        """
+        with self._lock:
+            return {
+                phase: histogram.stats()
+                for phase, histogram in self._histograms.items()
+                if histogram.count
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {phase: PhaseHistogram() for phase in self.PHASES}
+
+
+class _Timing(object):
+
+    __slots__ = ('_stats', '_phase', '_begin')
+
+    def __init__(self, stats, phase):
+        self._stats = stats
+        self._phase = phase
+        self._begin = None
+
+    def __enter__(self):
+        self._begin = time.time()
+        return self
+
+    def __exit__(self, t, v, tb):
+        if t is None:
+            self._stats.record(self._phase, time.time() - self._begin)
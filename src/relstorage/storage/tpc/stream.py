@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+##############################################################################
+#
+# Copyright (c) 2020 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""
+Sending stored objects to the database before voting.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import contextlib
+import sys
+
+import six
+
+from relstorage._util import thread_spawn
+
+logger = __import__('logging').getLogger(__name__)
+
+
+class TempStreamer(object):
+    """
+    Sends the objects stored in a transaction to the database's
+    temporary tables in a background thread, while more are still
+    being stored.
+
+    Whenever the objects stored but not yet sent reach
+    *size_threshold* bytes or *row_threshold* rows (either may be
+    None), and no batch is already being sent, they are sent as a new
+    batch. Voting then only needs to send what's left with
+    :meth:`finish`.
+
+    The store connection must not be used by anything else while a
+    batch is being sent. Use :meth:`paused` or :meth:`stop` around
+    anything else that uses it before voting.
+    """
+
+    def __init__(self, mover, store_connection, temp_storage, commit_stats,
+                 size_threshold=None, row_threshold=None):
+        self.mover = mover
+        self.store_connection = store_connection
+        self.temp_storage = temp_storage
+        self.commit_stats = commit_stats
+        self.size_threshold = size_threshold or None
+        self.row_threshold = row_threshold or None
+        # Items, as from TemporaryStorage.items(), stored since the last
+        # batch was started.
+        self._pending = []
+        self._pending_size = 0
+        # The OIDs in batches already started. If they're stored again,
+        # they need to replace what's in the database.
+        self._sent_oids = set()
+        self._thread = None
+        self._exc_info = None
+        self._paused = 0
+        self._stopped = False
+        #: How many batches have been started.
+        self.batch_count = 0
+
+    @classmethod
+    def from_options(cls, options, shared_state):
+        """
+        Return a new instance for the
+        :class:`~relstorage.storage.tpc.SharedTPCState` *shared_state*
+        if *options* ask for streaming and the driver can use a
+        connection from a background thread; otherwise return None.
+
+        The store connection and temporary storage of *shared_state*
+        are only used if we return an instance.
+        """
+        if not options.commit_stream_size and not options.commit_stream_rows:
+            return None
+        adapter = shared_state.adapter
+        if adapter.driver.gevent_cooperative():
+            return None
+        return cls(adapter.mover,
+                   shared_state.store_connection,
+                   shared_state.temp_storage,
+                   shared_state.commit_stats,
+                   options.commit_stream_size, options.commit_stream_rows)
+
+    def stored(self, oid_int):
+        """
+        Note that the temporary storage has a new state for *oid_int*.
+        """
+        startpos, endpos, prev_tid_int = self.temp_storage.stored_oids[oid_int]
+        self._pending.append((startpos, endpos, oid_int, prev_tid_int))
+        self._pending_size += endpos - startpos
+        if (
+                (self.row_threshold and len(self._pending) >= self.row_threshold)
+                or (self.size_threshold and self._pending_size >= self.size_threshold)
+        ):
+            self._send_pending()
+
+    def _take_pending(self):
+        pending = self._pending
+        self._pending = []
+        self._pending_size = 0
+        # Anything stored twice since the last batch has an item that's
+        # been replaced. Send only the latest.
+        stored_oids = self.temp_storage.stored_oids
+        new = []
+        replacements = []
+        sent_oids = self._sent_oids
+        for item in pending:
+            oid_int = item[2]
+            if stored_oids[oid_int][0] != item[0]:
+                continue
+            if oid_int in sent_oids:
+                replacements.append(item)
+            else:
+                new.append(item)
+                sent_oids.add(oid_int)
+        return new, replacements
+
+    def _send_pending(self):
+        if self._paused or self._stopped or self.busy:
+            return
+        self._raise_if_failed()
+        new, replacements = self._take_pending()
+        if not new and not replacements:
+            return
+        self.batch_count += 1
+        cursor = self.store_connection.cursor
+        self._thread = thread_spawn(self._send, (cursor, new, replacements))
+
+    def _send(self, cursor, new, replacements):
+        try:
+            with self.commit_stats.timing('stream_temps'):
+                self._store(cursor, new, replacements)
+        except: # pylint:disable=bare-except
+            self._exc_info = sys.exc_info()
+
+    def _store(self, cursor, new, replacements):
+        temp_storage = self.temp_storage
+        if new:
+            self.mover.store_temps(cursor, temp_storage.for_items(new))
+        if replacements:
+            self.mover.replace_temps(cursor, temp_storage.for_items(replacements))
+
+    @property
+    def busy(self):
+        return self._thread is not None and not self._thread.ready()
+
+    def wait(self):
+        """
+        Wait for the batch being sent, if any, and raise any error it
+        had.
+        """
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._raise_if_failed()
+
+    def _raise_if_failed(self):
+        if self._exc_info is not None:
+            exc_info = self._exc_info
+            self._exc_info = None
+            try:
+                six.reraise(*exc_info)
+            finally:
+                del exc_info
+
+    @contextlib.contextmanager
+    def paused(self):
+        """
+        A context manager that waits for the batch being sent, and
+        doesn't start another until it exits.
+        """
+        self._paused += 1
+        try:
+            self.wait()
+            yield
+        finally:
+            self._paused -= 1
+
+    def stop(self):
+        """
+        Wait for the batch being sent, and don't start any more.
+        """
+        self._stopped = True
+        self.wait()
+
+    def finish(self, cursor):
+        """
+        Wait for the batch being sent, and then send everything else
+        using *cursor* in this thread.
+        """
+        self.stop()
+        new, replacements = self._take_pending()
+        self._store(cursor, new, replacements)
+
+    def abort(self):
+        """
+        Wait for the batch being sent, ignoring any error.
+        """
+        try:
+            self.stop()
+        except Exception: # pylint:disable=broad-except
+            logger.debug("Error streaming temporary objects", exc_info=True)
@@ -22,29 +22,107 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from tempfile import SpooledTemporaryFile
+import mmap
+import threading
+from bisect import bisect_right
+from tempfile import TemporaryFile
 
 from relstorage._compat import OID_OBJECT_MAP_TYPE as OidObjectMap
 from relstorage._compat import OidObjectMap_max_key
 from relstorage._compat import iteroiditems
+from relstorage._compat import PY3
+
+if PY3:
+    def _slice_chunk(chunk, start, end):
+        return memoryview(chunk)[start:end]
+else: # pragma: no cover
+    # Python 2's mmap objects don't support the new buffer protocol.
+    def _slice_chunk(chunk, start, end):
+        return chunk[start:end]
+
 
 class TemporaryStorage(object):
+    """
+    Holds the states stored during a transaction.
+
+    The states are written one after another into a series of
+    anonymous memory mapped chunks. These begin small and double in
+    size as they are filled. No chunk is ever resized or moved, so
+    reading a state is just a slice of its chunk; :meth:`buffers`
+    exposes those slices without copying them for drivers that can
+    send buffers directly.
+
+    Once :attr:`SPILL_SIZE` bytes have been mapped, further states are
+    appended to a single temporary file instead, and reading them
+    copies them out of it.
+
+    States that have been stored may be read from another thread
+    while more are stored.
+    """
     __slots__ = (
-        '_queue',
+        '_chunks',
+        '_chunk_starts',
+        '_write_pos',
+        '_mapped_size',
+        '_spill_file',
+        '_spill_start',
+        '_spill_lock',
         '_queue_contents',
     )
 
+    #: The size of the first chunk.
+    INITIAL_CHUNK_SIZE = 64 * 1024
+    #: Chunks stop growing at this size (but a single state larger than
+    #: this gets a chunk of its own that fits it).
+    MAX_CHUNK_SIZE = 8 * 1024 * 1024
+    #: Once this many bytes are mapped, states are written to a
+    #: temporary file.
+    SPILL_SIZE = 10 * 1024 * 1024
+
     def __init__(self):
-        # start with a fresh in-memory buffer instead of reusing one that might
-        # already be spooled to disk.
-        # TODO: An alternate idea would be a temporary sqlite database.
-        self._queue = SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+        # Each chunk is an mmap; _chunk_starts[i] is the position of the
+        # first byte of _chunks[i] as if they were all one file.
+        self._chunks = []
+        self._chunk_starts = []
+        # The next free position in the last chunk.
+        self._write_pos = 0
+        self._mapped_size = 0
+        # Everything from _spill_start on is in _spill_file.
+        self._spill_file = None
+        self._spill_start = None
+        # Reading and writing the file both move its position.
+        self._spill_lock = threading.Lock()
         # {oid: (startpos, endpos, prev_tid_int)}
         self._queue_contents = OidObjectMap()
 
     def reset(self):
         self._queue_contents.clear()
-        self._queue.seek(0)
+        self._close_chunks()
+
+    def _new_chunk(self, min_size):
+        """
+        Map a new chunk that can hold at least *min_size* bytes and
+        return it, or return None if we should spill to disk instead.
+        """
+        if self._chunks:
+            size = min(len(self._chunks[-1]) * 2, self.MAX_CHUNK_SIZE)
+            start = self._chunk_starts[-1] + len(self._chunks[-1])
+        else:
+            size = self.INITIAL_CHUNK_SIZE
+            start = 0
+        size = max(size, min_size)
+        if self._mapped_size + size > self.SPILL_SIZE:
+            # Mapping the file in chunks would keep a file descriptor
+            # open for each one, so we just append to it.
+            self._spill_file = TemporaryFile(prefix='relstorage-temp-')
+            self._spill_start = start
+            return None
+        chunk = mmap.mmap(-1, size)
+        self._chunks.append(chunk)
+        self._chunk_starts.append(start)
+        self._mapped_size += size
+        self._write_pos = 0
+        return chunk
 
     def store_temp(self, oid_int, state, prev_tid_int=0):
         """
@@ -53,12 +131,24 @@ class TemporaryStorage(object):
         Typically, we can't actually cache the object yet, because its
         transaction ID is not yet chosen.
         """
-        queue = self._queue
-        queue.seek(0, 2)  # seek to end
-        startpos = queue.tell()
-        queue.write(state)
-        endpos = queue.tell()
-        self._queue_contents[oid_int] = (startpos, endpos, prev_tid_int)
+        length = len(state)
+        if self._spill_file is None:
+            if self._chunks and self._write_pos + length <= len(self._chunks[-1]):
+                chunk = self._chunks[-1]
+            else:
+                chunk = self._new_chunk(length)
+        if self._spill_file is None:
+            pos = self._write_pos
+            chunk[pos:pos + length] = state
+            self._write_pos = pos + length
+            startpos = self._chunk_starts[-1] + pos
+        else:
+            spill_file = self._spill_file
+            with self._spill_lock:
+                spill_file.seek(0, 2)  # seek to end
+                startpos = self._spill_start + spill_file.tell()
+                spill_file.write(state)
+        self._queue_contents[oid_int] = (startpos, startpos + length, prev_tid_int)
 
     def __len__(self):
         # How many distinct OIDs have been stored?
@@ -74,11 +164,22 @@ class TemporaryStorage(object):
     def max_stored_oid(self):
         return OidObjectMap_max_key(self._queue_contents)
 
+    def _read_temp_buffer(self, startpos, endpos):
+        if self._spill_start is not None and startpos >= self._spill_start:
+            spill_file = self._spill_file
+            with self._spill_lock:
+                spill_file.seek(startpos - self._spill_start)
+                state = spill_file.read(endpos - startpos)
+            if len(state) != endpos - startpos:
+                raise AssertionError("Queued cache data is truncated")
+            return state
+        index = bisect_right(self._chunk_starts, startpos) - 1
+        chunk_start = self._chunk_starts[index]
+        return _slice_chunk(self._chunks[index], startpos - chunk_start, endpos - chunk_start)
+
     def _read_temp_state(self, startpos, endpos):
-        self._queue.seek(startpos)
-        length = endpos - startpos
-        state = self._queue.read(length)
-        if len(state) != length:
+        state = bytes(self._read_temp_buffer(startpos, endpos))
+        if len(state) != endpos - startpos:
             raise AssertionError("Queued cache data is truncated")
         return state
 
@@ -93,15 +194,49 @@ class TemporaryStorage(object):
         return self.iter_for_oids(None)
 
     def iter_for_oids(self, oids):
-        read_temp_state = self._read_temp_state
-        for startpos, endpos, oid_int, prev_tid_int in self.items(oids):
-            state = read_temp_state(startpos, endpos)
-            yield state, oid_int, prev_tid_int
+        return self._iter_items(self.items(oids), self._read_temp_state)
+
+    def iter_buffers_for_oids(self, oids):
+        """
+        Like :meth:`iter_for_oids`, but the states are buffers (on
+        Python 3, :class:`memoryview` objects) that refer directly to
+        the stored data. (States that were spilled to disk are still
+        read into new bytes objects.)
+
+        The buffers are only valid until this object is reset or
+        closed and must not be kept; anything that needs the state
+        afterwards (such as the cache) must use :meth:`iter_for_oids`.
+        """
+        return self._iter_items(self.items(oids), self._read_temp_buffer)
+
+    @staticmethod
+    def _iter_items(items, read):
+        for startpos, endpos, oid_int, prev_tid_int in items:
+            yield read(startpos, endpos), oid_int, prev_tid_int
+
+    def buffers(self):
+        """
+        Return an iterable with the same length as this object that
+        produces ``(buffer, oid_int, prev_tid_int)``.
+
+        .. seealso:: :meth:`iter_buffers_for_oids`
+        """
+        return _StoredItems(self, None, True)
+
+    def for_items(self, items):
+        """
+        Return an iterable that produces ``(state, oid_int,
+        prev_tid_int)`` for each of *items*, a sequence like that
+        returned by :meth:`items`.
+
+        It has a length, and its ``buffers()`` method works like
+        :meth:`buffers`.
+        """
+        return _StoredItems(self, items)
 
     def items(self, oids=None):
-        # Order the queue by file position, which should help
-        # if the file is large and needs to be read
-        # sequentially from disk.
+        # Order the queue by position, so that we read each
+        # chunk (and the file, if we've spilled) sequentially.
         items = [
             (startpos, endpos, oid_int, prev_tid_int)
             for (oid_int, (startpos, endpos, prev_tid_int)) in iteroiditems(self._queue_contents)
@@ -110,8 +245,51 @@ class TemporaryStorage(object):
         items.sort()
         return items
 
+    def _close_chunks(self):
+        for chunk in self._chunks:
+            try:
+                chunk.close()
+            except BufferError: # pragma: no cover
+                # Someone still has a buffer into it; it will be
+                # unmapped when that goes away.
+                pass
+        if self._spill_file is not None:
+            self._spill_file.close()
+        del self._chunks[:]
+        del self._chunk_starts[:]
+        self._write_pos = 0
+        self._mapped_size = 0
+        self._spill_file = None
+        self._spill_start = None
+
     def close(self):
-        if self._queue is not None:
-            self._queue.close()
-            self._queue = None
+        if self._chunks is not None:
+            self._close_chunks()
+            self._chunks = None
             self._queue_contents = () # Not None so len() keeps working
+
+
+class _StoredItems(object):
+    __slots__ = ('_temp_storage', '_items', '_as_buffers')
+
+    def __init__(self, temp_storage, items, as_buffers=False):
+        self._temp_storage = temp_storage
+        # None means all of them.
+        self._items = items
+        self._as_buffers = as_buffers
+
+    def __len__(self):
+        if self._items is None:
+            return len(self._temp_storage)
+        return len(self._items)
+
+    def __iter__(self):
+        temp_storage = self._temp_storage
+        items = self._items if self._items is not None else temp_storage.items()
+        read = (temp_storage._read_temp_buffer
+                if self._as_buffers
+                else temp_storage._read_temp_state)
+        return temp_storage._iter_items(items, read)
+
+    def buffers(self):
+        return _StoredItems(self._temp_storage, self._items, True)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for stats.py.
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import unittest
+
+from perfmetrics import statsd_client_stack
+
+from ..stats import CommitStats
+from ..stats import PhaseHistogram
+
+
+class MockStatsdClient(object):
+
+    def __init__(self):
+        self.timings = []
+
+    def timing(self, stat, value):
+        self.timings.append((stat, value))
+
+
+class TestPhaseHistogram(unittest.TestCase):
+
+    def test_buckets(self):
+        histogram = PhaseHistogram()
+        for duration in (0.0001, 0.0009, 0.001, 0.0035, 0.004, 1000):
+            histogram.record(duration)
+
+        stats = histogram.stats()
+        self.assertEqual(stats['count'], 6)
+        self.assertEqual(stats['min'], 0.0001)
+        self.assertEqual(stats['max'], 1000)
+        self.assertEqual(stats['histogram'], {
+            '<1ms': 2,
+            '<2ms': 1,
+            '<4ms': 1,
+            '<8ms': 1,
+            '>=262144ms': 1,
+        })
+
+
+class TestCommitStats(unittest.TestCase):
+
+    def test_for_adapter(self):
+        class MySQLAdapter(object):
+            pass
+        self.assertEqual(CommitStats.for_adapter(MySQLAdapter()).adapter_name, 'mysql')
+
+    def test_timing(self):
+        stats = CommitStats('mysql')
+        with stats.timing('lock_objects'):
+            pass
+        with self.assertRaises(ValueError):
+            with stats.timing('commit'):
+                raise ValueError
+
+        result = stats.stats()
+        self.assertEqual(list(result), ['lock_objects'])
+        self.assertEqual(result['lock_objects']['count'], 1)
+
+        stats.reset()
+        self.assertEqual(stats.stats(), {})
+
+    def test_statsd(self):
+        client = MockStatsdClient()
+        stats = CommitStats('postgresql')
+        statsd_client_stack.push(client)
+        try:
+            stats.record('commit', 0.25)
+        finally:
+            statsd_client_stack.pop()
+
+        self.assertEqual(client.timings, [('relstorage.commit.postgresql.commit', 250)])
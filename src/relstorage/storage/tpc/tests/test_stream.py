@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for stream.py.
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import threading
+import unittest
+
+from ..temporary_storage import TemporaryStorage
+from ..stats import CommitStats
+
+
+class MockStoreConnection(object):
+    cursor = 'cursor'
+
+
+class MockMover(object):
+
+    def __init__(self):
+        self.calls = []
+        self.threads = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def _record(self, kind, cursor, state_oid_tid_iter):
+        self.release.wait()
+        self.threads.append(threading.current_thread())
+        self.calls.append((kind, cursor, list(state_oid_tid_iter)))
+
+    def store_temps(self, cursor, state_oid_tid_iter):
+        self._record('store', cursor, state_oid_tid_iter)
+
+    def replace_temps(self, cursor, state_oid_tid_iter):
+        self._record('replace', cursor, state_oid_tid_iter)
+
+
+class TestTempStreamer(unittest.TestCase):
+
+    def _makeOne(self, size_threshold=None, row_threshold=None, **temp_storage_attrs):
+        from ..stream import TempStreamer
+        self.mover = MockMover()
+        kind = type('TemporaryStorage', (TemporaryStorage,),
+                    dict(temp_storage_attrs, __slots__=()))
+        self.temp_storage = kind()
+        self.addCleanup(self.temp_storage.close)
+        self.commit_stats = CommitStats('mock')
+        return TempStreamer(self.mover, MockStoreConnection(), self.temp_storage,
+                            self.commit_stats, size_threshold, row_threshold)
+
+    def _store(self, inst, oid_int, state):
+        self.temp_storage.store_temp(oid_int, state)
+        inst.stored(oid_int)
+
+    def test_rows(self):
+        inst = self._makeOne(row_threshold=2)
+        self._store(inst, 1, b'abc')
+        self.assertEqual(inst.batch_count, 0)
+        self._store(inst, 2, b'def')
+        inst.wait()
+        self.assertEqual(inst.batch_count, 1)
+        self._store(inst, 3, b'ghi')
+        inst.finish('vote cursor')
+        self.assertEqual(self.mover.calls, [
+            ('store', 'cursor', [(b'abc', 1, 0), (b'def', 2, 0)]),
+            ('store', 'vote cursor', [(b'ghi', 3, 0)]),
+        ])
+        self.assertIsNot(self.mover.threads[0], threading.current_thread())
+        self.assertIs(self.mover.threads[1], threading.current_thread())
+        self.assertEqual(self.commit_stats.stats()['stream_temps']['count'], 1)
+
+    def test_size(self):
+        inst = self._makeOne(size_threshold=5)
+        self._store(inst, 1, b'abc')
+        self.assertEqual(inst.batch_count, 0)
+        self._store(inst, 2, b'def')
+        inst.finish('vote cursor')
+        self.assertEqual(inst.batch_count, 1)
+        self.assertEqual(self.mover.calls, [
+            ('store', 'cursor', [(b'abc', 1, 0), (b'def', 2, 0)]),
+        ])
+
+    def test_stored_again(self):
+        inst = self._makeOne(row_threshold=2)
+        self._store(inst, 1, b'abc')
+        self._store(inst, 2, b'def')
+        inst.wait()
+        # Twice before the next batch, and once after being sent.
+        self._store(inst, 3, b'ghi')
+        self._store(inst, 3, b'jkl')
+        self._store(inst, 1, b'mno')
+        inst.finish('vote cursor')
+        self.assertEqual(self.mover.calls, [
+            ('store', 'cursor', [(b'abc', 1, 0), (b'def', 2, 0)]),
+            ('store', 'cursor', [(b'jkl', 3, 0)]),
+            ('replace', 'vote cursor', [(b'mno', 1, 0)]),
+        ])
+
+    def test_one_batch_at_a_time(self):
+        inst = self._makeOne(row_threshold=1)
+        self.mover.release.clear()
+        self._store(inst, 1, b'abc')
+        self._store(inst, 2, b'def')
+        self._store(inst, 3, b'ghi')
+        self.assertEqual(inst.batch_count, 1)
+        self.mover.release.set()
+        inst.finish('vote cursor')
+        self.assertEqual(self.mover.calls, [
+            ('store', 'cursor', [(b'abc', 1, 0)]),
+            ('store', 'vote cursor', [(b'def', 2, 0), (b'ghi', 3, 0)]),
+        ])
+
+    def test_paused_and_stopped(self):
+        inst = self._makeOne(row_threshold=1)
+        with inst.paused():
+            self._store(inst, 1, b'abc')
+            self.assertEqual(inst.batch_count, 0)
+        self._store(inst, 2, b'def')
+        inst.wait()
+        self.assertEqual(inst.batch_count, 1)
+        inst.stop()
+        self._store(inst, 3, b'ghi')
+        self.assertEqual(inst.batch_count, 1)
+
+    def test_stored_while_spilling(self):
+        # Once states are spilled to a file, the background thread
+        # reads them from it while more are appended.
+        inst = self._makeOne(row_threshold=50,
+                             INITIAL_CHUNK_SIZE=64, MAX_CHUNK_SIZE=64, SPILL_SIZE=128)
+        states = {}
+        for oid_int in range(1, 20001):
+            states[oid_int] = (b'%d.' % oid_int) * (oid_int % 7 + 1)
+            self._store(inst, oid_int, states[oid_int])
+        inst.finish('vote cursor')
+
+        self.assertIsNotNone(self.temp_storage._spill_file)
+        self.assertGreater(inst.batch_count, 1)
+        sent = {}
+        for _kind, _cursor, items in self.mover.calls:
+            for state, oid_int, _ in items:
+                sent[oid_int] = bytes(state)
+        self.assertEqual(sent, states)
+
+    def test_error_raised(self):
+        inst = self._makeOne(row_threshold=1)
+        def store_temps(*_args):
+            raise ValueError
+        self.mover.store_temps = store_temps
+        self._store(inst, 1, b'abc')
+        with self.assertRaises(ValueError):
+            inst.wait()
+
+        self._store(inst, 2, b'def')
+        inst.abort()
+
+
+class MockDriver(object):
+
+    def __init__(self, gevent_cooperative=False):
+        self._gevent_cooperative = gevent_cooperative
+
+    def gevent_cooperative(self):
+        return self._gevent_cooperative
+
+
+class MockAdapter(object):
+
+    def __init__(self, gevent_cooperative=False):
+        self.driver = MockDriver(gevent_cooperative)
+        self.mover = MockMover()
+
+
+class MockSharedState(object):
+
+    def __init__(self, gevent_cooperative=False):
+        self.adapter = MockAdapter(gevent_cooperative)
+        self.temp_storage = TemporaryStorage()
+        self.commit_stats = CommitStats('mock')
+        self.used_store_connection = False
+
+    @property
+    def store_connection(self):
+        self.used_store_connection = True
+        return MockStoreConnection()
+
+
+class TestFromOptions(unittest.TestCase):
+
+    def _callFUT(self, shared_state, **kwargs):
+        from relstorage.tests import MockOptions
+        from ..stream import TempStreamer
+        self.addCleanup(shared_state.temp_storage.close)
+        return TempStreamer.from_options(MockOptions.from_args(**kwargs), shared_state)
+
+    def test_not_configured(self):
+        shared_state = MockSharedState()
+        self.assertIsNone(self._callFUT(shared_state))
+        # We didn't get a connection we didn't need.
+        self.assertFalse(shared_state.used_store_connection)
+
+    def test_gevent(self):
+        shared_state = MockSharedState(gevent_cooperative=True)
+        self.assertIsNone(self._callFUT(shared_state, commit_stream_rows=10))
+        self.assertFalse(shared_state.used_store_connection)
+
+    def test_configured(self):
+        shared_state = MockSharedState()
+        inst = self._callFUT(shared_state, commit_stream_size=100, commit_stream_rows=10)
+        self.assertTrue(shared_state.used_store_connection)
+        self.assertIs(inst.mover, shared_state.adapter.mover)
+        self.assertIs(inst.temp_storage, shared_state.temp_storage)
+        self.assertEqual(inst.size_threshold, 100)
+        self.assertEqual(inst.row_threshold, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for temporary_storage.py.
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import unittest
+
+from relstorage._compat import PY3
+
+
+class TestTemporaryStorage(unittest.TestCase):
+
+    def _makeOne(self, **kwargs):
+        from ..temporary_storage import TemporaryStorage
+        kind = type('TemporaryStorage', (TemporaryStorage,), dict(kwargs, __slots__=()))
+        inst = kind()
+        self.addCleanup(inst.close)
+        return inst
+
+    def test_store_and_read(self):
+        inst = self._makeOne()
+        inst.store_temp(2, b'abc')
+        inst.store_temp(1, b'def', 42)
+        inst.store_temp(2, b'ghi')
+        self.assertEqual(len(inst), 2)
+        self.assertEqual(inst.read_temp(1), b'def')
+        self.assertEqual(inst.read_temp(2), b'ghi')
+        self.assertEqual(list(inst), [(b'def', 1, 42), (b'ghi', 2, 0)])
+        self.assertEqual(list(inst.iter_for_oids({2})), [(b'ghi', 2, 0)])
+
+    def test_chunks_grow_and_spill(self):
+        inst = self._makeOne(INITIAL_CHUNK_SIZE=4, MAX_CHUNK_SIZE=16, SPILL_SIZE=32)
+        states = {}
+        for oid in range(1, 20):
+            states[oid] = (b'%d' % oid) * 3
+            inst.store_temp(oid, states[oid])
+        states[20] = b'x' * 40
+        inst.store_temp(20, states[20])
+
+        # Once 32 bytes are mapped, everything else goes to one file.
+        self.assertEqual([len(c) for c in inst._chunks], [4, 8, 16])
+        self.assertIsNotNone(inst._spill_file)
+        self.assertEqual(inst._spill_start, 28)
+        for oid, state in states.items():
+            self.assertEqual(inst.read_temp(oid), state)
+        self.assertEqual([(s, o) for s, o, _ in inst], sorted(
+            ((s, o) for o, s in states.items()),
+            key=lambda so: inst.stored_oids[so[1]]))
+
+        inst.reset()
+        self.assertEqual(len(inst), 0)
+        self.assertEqual(inst._chunks, [])
+        self.assertIsNone(inst._spill_file)
+        inst.store_temp(1, b'abc')
+        self.assertEqual(inst.read_temp(1), b'abc')
+
+    def test_large_state_gets_own_chunk(self):
+        inst = self._makeOne(INITIAL_CHUNK_SIZE=4, MAX_CHUNK_SIZE=16)
+        inst.store_temp(1, b'abc')
+        inst.store_temp(2, b'x' * 40)
+        self.assertEqual([len(c) for c in inst._chunks], [4, 40])
+        self.assertEqual(inst.read_temp(2), b'x' * 40)
+
+    def test_spilled_buffers(self):
+        inst = self._makeOne(INITIAL_CHUNK_SIZE=4, SPILL_SIZE=4)
+        inst.store_temp(1, b'abc')
+        inst.store_temp(2, b'defgh')
+        inst.store_temp(3, b'ijk')
+        self.assertEqual(len(inst._chunks), 1)
+        self.assertEqual([(bytes(b), oid) for b, oid, _ in inst.buffers()],
+                         [(b'abc', 1), (b'defgh', 2), (b'ijk', 3)])
+
+    def test_empty_state(self):
+        inst = self._makeOne(INITIAL_CHUNK_SIZE=4)
+        inst.store_temp(1, b'abcd')
+        inst.store_temp(2, b'')
+        inst.store_temp(3, b'ef')
+        self.assertEqual(list(inst), [(b'abcd', 1, 0), (b'', 2, 0), (b'ef', 3, 0)])
+
+    def test_buffers(self):
+        inst = self._makeOne()
+        inst.store_temp(1, b'abc')
+        inst.store_temp(2, b'def')
+        buffers = inst.buffers()
+        self.assertEqual(len(buffers), 2)
+        result = list(buffers)
+        if PY3:
+            self.assertIsInstance(result[0][0], memoryview)
+        self.assertEqual([(bytes(b), oid, tid) for b, oid, tid in result],
+                         [(b'abc', 1, 0), (b'def', 2, 0)])
+        del result
+        del buffers
+
+    def test_close(self):
+        inst = self._makeOne()
+        inst.store_temp(1, b'abc')
+        inst.close()
+        self.assertEqual(len(inst), 0)
+        self.assertFalse(inst)
+        inst.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
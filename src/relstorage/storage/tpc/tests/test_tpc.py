@@ -226,13 +226,13 @@ class TestSharedTPCState(unittest.TestCase):
         self.assertFalse(inst.has_temp_data())
         ts = inst.temp_storage
         inst.release()
-        self.assertIsNone(ts._queue)
+        self.assertIsNone(ts._chunks)
         self.assertIsNone(inst.temp_storage)
         self.assertFalse(inst.has_temp_data())
 
         inst = self._makeOne()
         ts = inst.temp_storage
         inst.abort()
-        self.assertIsNone(ts._queue)
+        self.assertIsNone(ts._chunks)
         self.assertIsNone(inst.temp_storage)
         self.assertFalse(inst.has_temp_data())
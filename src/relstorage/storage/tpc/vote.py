@@ -158,7 +158,14 @@ class AbstractVote(AbstractTPCStateDatabaseAvailable):
     def _flush_temps_to_db(self, cursor):
         if self.shared_state.has_temp_data():
             # Don't bother if we're empty.
-            self.shared_state.adapter.mover.store_temps(cursor, self.shared_state.temp_storage)
+            with self.shared_state.commit_stats.timing('flush_temps'):
+                temp_streamer = self.shared_state.temp_streamer
+                if temp_streamer is not None:
+                    # Some may have already been sent.
+                    temp_streamer.finish(cursor)
+                else:
+                    self.shared_state.adapter.mover.store_temps(cursor,
+                                                                self.shared_state.temp_storage)
 
     def __enter_critical_phase_until_transaction_end(self):
         self.shared_state.load_connection.enter_critical_phase_until_transaction_end()
@@ -216,14 +223,26 @@ class AbstractVote(AbstractTPCStateDatabaseAvailable):
         # used, or whether we're updating existing objects and avoid a
         # bit more overhead, but benchmarking suggests that it's not
         # worth it in common cases.
-        storage._oids.set_min_oid(
-            store_connection,
-            self.shared_state.temp_storage.max_stored_oid)
+        #
+        # When we do need to tell the database, we let the adapter do
+        # it along with taking locks; some adapters can do both in a
+        # single round trip.
+        oids = storage._oids
+        min_oid = oids.min_oid_to_set(self.shared_state.temp_storage.max_stored_oid)
 
         # Lock objects being modified and those registered with
         # readCurrent(). This could raise ReadConflictError or locking
         # errors. See ``IRelStorageAdapter`` for details.
-        conflicts = adapter.lock_objects_and_detect_conflicts(cursor, self.required_tids)
+        commit_stats = self.shared_state.commit_stats
+        with commit_stats.timing('lock_objects'):
+            conflicts = adapter.lock_objects_and_detect_conflicts(cursor, self.required_tids,
+                                                                  min_oid)
+        if min_oid is not None and not any(
+                conflict[2] is None for conflict in conflicts or ()):
+            # A readCurrent row may mean a conflict, in which case
+            # some adapters (MySQL) roll back without setting it, and
+            # we're about to raise. Let the retry set it again.
+            oids.min_oid_was_set(min_oid)
         self.lock_and_vote_times[0] = time.time()
         # Ok, we have now taken database locks: exclusive for each old
         # object we are updating and shared for each we wanted to
@@ -240,7 +259,10 @@ class AbstractVote(AbstractTPCStateDatabaseAvailable):
         # make get serviced ASAP (some gevent drivers can actually
         # guarantee this), but only right before we're about to do something
         # that could potentially be unbounded or allow switching.
+        begin = time.time()
         invalidated_oid_ints = self.__check_and_resolve_conflicts(storage, conflicts)
+        if invalidated_oid_ints:
+            commit_stats.record('resolve_conflicts', time.time() - begin)
 
         blobs_must_be_moved_now = False
         committing_tid_bytes = None
@@ -251,7 +273,8 @@ class AbstractVote(AbstractTPCStateDatabaseAvailable):
         if self.shared_state.has_blobs():
             # Avoid accessing the actual blobhelper unless we need it
             try:
-                self.shared_state.blobhelper.vote(committing_tid_bytes)
+                with commit_stats.timing('blobs'):
+                    self.shared_state.blobhelper.vote(committing_tid_bytes)
             except StorageTransactionError:
                 # If this raises an STE, it must be a shared (non-db)
                 # blobhelper, and the TID must not be locked.
@@ -456,12 +479,13 @@ class AbstractVote(AbstractTPCStateDatabaseAvailable):
 
         # Note that this may commit the load_connection and make it not
         # viable for a historical view anymore.
-        committing_tid_int, prepared_txn = self.shared_state.adapter.lock_database_and_move(
-            self.shared_state.store_connection, self.shared_state.load_connection,
-            self.shared_state.has_blobs(),
-            self.ude,
-            **kwargs
-        )
+        with self.shared_state.commit_stats.timing('lock_and_move'):
+            committing_tid_int, prepared_txn = self.shared_state.adapter.lock_database_and_move(
+                self.shared_state.store_connection, self.shared_state.load_connection,
+                self.shared_state.has_blobs(),
+                self.ude,
+                **kwargs
+            )
 
         self.shared_state.prepared_txn = prepared_txn
         committing_tid_lock = self.committing_tid_lock
@@ -513,7 +537,8 @@ class AbstractVote(AbstractTPCStateDatabaseAvailable):
                 # Avoid accessing the actual blobhelper unless we need it
                 assert not self.shared_state.blobhelper.NEEDS_DB_LOCK_TO_FINISH
                 try:
-                    self.shared_state.blobhelper.finish(self.committing_tid_lock.tid)
+                    with self.shared_state.commit_stats.timing('blobs'):
+                        self.shared_state.blobhelper.finish(self.committing_tid_lock.tid)
                 except (IOError, OSError):
                     # If something failed to move, that's not really a problem:
                     # if we did any moving now, we're just a cache.
@@ -529,6 +554,7 @@ class AbstractVote(AbstractTPCStateDatabaseAvailable):
                 locks_released = time.time()
 
             locked_duration = locks_released - self.lock_and_vote_times[0]
+            self.shared_state.commit_stats.record('objects_locked', locked_duration)
             between_vote_and_finish = finish_entry - self.lock_and_vote_times[1]
             do_log_duration_info(
                 "Objects were locked by %s for %.3fs",
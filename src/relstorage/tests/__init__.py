@@ -412,6 +412,20 @@ class MockObjectMover(object):
     def load_current(self, _cursor, oid_int):
         return self.data.get(oid_int, (None, None))
 
+    def load_currents(self, _cursor, oids):
+        for oid_int in oids:
+            if oid_int in self.data:
+                state, tid_int = self.data[oid_int]
+                yield oid_int, state, tid_int
+
+    def load_before_with_next(self, _cursor, oid_int, tid_int):
+        if oid_int not in self.data:
+            return None
+        state, start_tid_int = self.data[oid_int]
+        if start_tid_int >= tid_int:
+            return None, None, None
+        return state, start_tid_int, None
+
     def current_object_tids(self, _cursor, oids, timeout=None):
         # pylint:disable=unused-argument
         return {
@@ -1,34 +1,52 @@
-
 """Test a big tree of random OID references.
 
-Run like this: bin/py -m cProfile -- -s tottime relstorage/tests/bigmark.py
+Compares the time and memory taken by the markers in
+:mod:`relstorage.treemark`. Run like this::
+
+    python -m relstorage.tests.bigmark [csr|tree] [oid_count]
+
+Each marker is run in a separate process so that memory usage can be
+compared. For profiling, use::
+
+    python -m cProfile -s tottime -m relstorage.tests.bigmark csr
 """
+from __future__ import print_function
 
 import logging
+import resource
+import subprocess
+import sys
 from random import randint
 from random import random
+from random import seed
 
 from relstorage._compat import xrange
+from relstorage._compat import perf_counter
+from relstorage.treemark import CSRMarker
 from relstorage.treemark import TreeMarker
 
 log = logging.getLogger('bigmark')
 
+MARKERS = {
+    'csr': CSRMarker,
+    'tree': TreeMarker,
+}
 
-def bigmark():
-    """Follow ~20M references between 10M objects."""
 
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s %(levelname)s [%(name)s] %(message)s')
+def bigmark(marker_name='csr', oid_count=10 * 1000 * 1000):
+    """Follow ~2 references per object between *oid_count* objects."""
 
-    oid_count = 10 * 1000 * 1000
     k = 10000
-
-    log.info("Generating random references.")
-
-    marker = TreeMarker()
-    marker.add_refs([(0, i * k) for i in range(20)])
-    refcount = 20
+    # Use the same references for every marker.
+    seed(0)
+
+    log.info("Generating random references for %s.", marker_name)
+    begin = perf_counter()
+    marker = MARKERS[marker_name]()
+    # Refer to enough objects from the root that the graph
+    # reliably branches out.
+    marker.add_refs([(0, i * k) for i in range(1000)])
+    refcount = 1000
     for i in xrange(1, oid_count):
         if random() < 0.2:
             refs = []
@@ -36,17 +54,49 @@ def bigmark():
                 refs.append((i * k, randint(0, oid_count) * k))
             marker.add_refs(refs)
             refcount += len(refs)
-
-    log.info("Generated %d references.", refcount)
+    add_duration = perf_counter() - begin
+    log.info("Generated %d references in %.2fs.", refcount, add_duration)
 
     log.info("Finding reachable objects.")
-
+    begin = perf_counter()
     pass_count = marker.mark([0])
+    mark_duration = perf_counter() - begin
 
     log.info(
-        "Found %d reachable objects in %d passes.",
-        marker.reachable_count, pass_count)
+        "Found %d reachable objects in %d passes in %.2fs.",
+        marker.reachable_count, pass_count, mark_duration)
+    return {
+        'marker': marker_name,
+        'refs': refcount,
+        'reachable': marker.reachable_count,
+        'passes': pass_count,
+        'add_refs': add_duration,
+        'mark': mark_duration,
+        # Kilobytes on Linux, bytes on macOS.
+        'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format='%(asctime)s %(levelname)s [%(name)s] %(message)s')
+    oid_count = int(argv[1]) if len(argv) > 1 else 10 * 1000 * 1000
+    if argv and argv[0] in MARKERS:
+        result = bigmark(argv[0], oid_count)
+        print(
+            "%(marker)s: %(refs)d refs, %(reachable)d reachable in %(passes)d passes; "
+            "add_refs %(add_refs).2fs, mark %(mark).2fs, max RSS %(max_rss)d"
+            % result)
+        return
+
+    for name in sorted(MARKERS):
+        subprocess.check_call([
+            sys.executable, '-m', 'relstorage.tests.bigmark',
+            name, str(oid_count)
+        ])
 
 
 if __name__ == '__main__':
-    bigmark()
+    main()
@@ -232,6 +232,49 @@ class HistoryFreeRelStorageTests(GenericRelStorageTests, ZODBTestCase):
         eq(pobj.getoid(), oid2)
         eq(pobj.value, 11)
 
+    def checkPackResumeSkipsDeletedGarbage(self):
+        self.__check_pack_resume_skips_deleted_garbage()
+
+    def checkPackResumeSkipsDeletedGarbageInDatabase(self):
+        self._storage = self.make_storage(pack_delete_in_database=True)
+        self.__check_pack_resume_skips_deleted_garbage()
+
+    def __check_pack_resume_skips_deleted_garbage(self):
+        import transaction
+        import ZODB
+        from persistent.mapping import PersistentMapping
+        db = self._closing(ZODB.DB(self._storage))
+        conn = self._closing(db.open())
+        root = conn.root()
+        gone1 = root['gone1'] = PersistentMapping()
+        gone2 = root['gone2'] = PersistentMapping()
+        transaction.commit()
+        del root['gone1']
+        del root['gone2']
+        transaction.commit()
+        oid1 = bytes8_to_int64(gone1._p_oid)
+        oid2 = bytes8_to_int64(gone2._p_oid)
+        self.assertLess(oid1, oid2)
+
+        packtime = self._storage.lastTransactionInt()
+        self._storage.pack(packtime, referencesf, prepack_only=True)
+        # Pretend an interrupted pack had gotten this far, without
+        # actually deleting anything.
+        packundo = self._storage._adapter.packundo
+        connmanager = self._storage._adapter.connmanager
+        lock_conn, cursor = connmanager.open_for_pre_pack()
+        try:
+            packundo._record_deleted_zoid(cursor, oid1)
+            lock_conn.commit()
+        finally:
+            connmanager.close(lock_conn, cursor)
+        self.assertEqual(packundo.get_pack_progress(), (packtime, oid1))
+
+        self._storage.pack(None, referencesf, resume=True)
+        self.assertIsNone(packundo.get_pack_progress())
+        self._storage.load(gone1._p_oid, '')
+        self.assertRaises(KeyError, self._storage.load, gone2._p_oid, '')
+
     def checkRSResolve(self):
         # ZODB.tests.ConflictResolution.ConflictResolvingStorage has a checkResolve
         # with a different signature (as of 4.4.0) that we were unintentionally(?)
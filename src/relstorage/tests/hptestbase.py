@@ -513,6 +513,57 @@ class HistoryPreservingRelStorageTests(GenericRelStorageTests,
         self.__maybe_ignore_monotonic(RevisionStorage.RevisionStorage,
                                       'checkLoadBeforeOld')
 
+    def checkLoadBeforeCachesReplacedRevisions(self):
+        oid = self._storage.new_oid()
+        tid1 = self._dostore(oid, data=MinPO(1))
+        tid2 = self._dostore(oid, revid=tid1, data=MinPO(2))
+        after_tid1 = p64(bytes8_to_int64(tid1) + 1)
+        after_tid2 = p64(bytes8_to_int64(tid2) + 1)
+
+        self.assertIsNone(self._storage.loadBefore(oid, tid1))
+        old = self._storage.loadBefore(oid, after_tid1)
+        self.assertEqual(old[1:], (tid1, tid2))
+        current = self._storage.loadBefore(oid, after_tid2)
+        self.assertEqual(current[1:], (tid2, None))
+
+        # The replaced revision comes from the cache from now on;
+        # the current one does not.
+        mover = self._storage._adapter.mover
+        load_before_with_next = mover.load_before_with_next
+        loaded = []
+        def record(cursor, oid_int, tid_int):
+            loaded.append(oid_int)
+            return load_before_with_next(cursor, oid_int, tid_int)
+        mover.load_before_with_next = record
+        try:
+            self.assertEqual(self._storage.loadBefore(oid, after_tid1), old)
+            self.assertEqual(self._storage.loadBefore(oid, tid2), old)
+            self.assertEqual(loaded, [])
+            self.assertEqual(self._storage.loadBefore(oid, after_tid2), current)
+            self.assertEqual(loaded, [bytes8_to_int64(oid)])
+        finally:
+            del mover.load_before_with_next
+
+    def checkLoadBeforeAfterPack(self):
+        oid = self._storage.new_oid()
+        tid1 = self._dostore(oid, data=MinPO(1))
+        tid2 = self._dostore(oid, revid=tid1, data=MinPO(2))
+        after_tid1 = p64(bytes8_to_int64(tid1) + 1)
+        old = self._storage.loadBefore(oid, after_tid1)
+        self.assertEqual(old[1:], (tid1, tid2))
+
+        self._storage.pack(bytes8_to_int64(tid2), referencesf)
+        # Packing removed the first revision from our cache, but
+        # another process that shares it may have put it back.
+        self._storage._cache.local_client[(bytes8_to_int64(oid), bytes8_to_int64(tid1))] = (
+            old[0], bytes8_to_int64(tid1))
+        # We don't use it; it's gone from the database.
+        try:
+            result = self._storage.loadBefore(oid, after_tid1)
+        except POSKeyError:
+            result = None
+        self.assertIsNone(result)
+
     def checkSimpleHistory(self):
         if not self.__tid_clock_needs_care():
             return super(HistoryPreservingRelStorageTests, self).checkSimpleHistory()
@@ -973,6 +973,130 @@ class GenericRelStorageTests(
         finally:
             db.close()
 
+    def checkPackTraverseInDatabase(self):
+        self._storage = self.make_storage(pack_traverse_in_database=True)
+        if self.keep_history:
+            # Ignored; the references are followed here.
+            self.assertFalse(
+                self._storage._adapter.packundo._can_traverse_graph_in_database(None))
+        self.__check_pack_collects_unreachable_cycle()
+
+    def checkPackReferenceProcesses(self):
+        self._storage = self.make_storage(pack_reference_processes=2)
+        self.__check_pack_collects_unreachable_cycle()
+
+    def checkPackWithoutPackProgressTable(self):
+        # With ``create-schema false``, the schema may be from before
+        # pack_progress was added. Packing still works.
+        adapter = self._storage._adapter
+        adapter.connmanager.open_and_call(
+            lambda _conn, cursor: cursor.execute('DROP TABLE pack_progress'))
+        self.assertFalse(adapter.schema.has_table('pack_progress'))
+        self.__check_pack_collects_unreachable_cycle(
+            lambda packtime: self._storage.pack(packtime, referencesf, resume=True))
+
+    def checkPackReferenceProcessDies(self):
+        # If a process finding references goes away, we don't wait
+        # for it forever; the references are found in this process.
+        self._storage = self.make_storage(pack_reference_processes=2)
+        self._storage._adapter.packundo.reference_process_check_frequency = 0.1
+        parent_pid = os.getpid()
+        def get_references(state):
+            if os.getpid() != parent_pid:
+                os._exit(1)
+            return referencesf(state)
+        self.__check_pack_collects_unreachable_cycle(
+            lambda packtime: self._storage.pack(packtime, get_references))
+
+    def checkPackDeleteInDatabase(self):
+        self._storage = self.make_storage(pack_delete_in_database=True)
+        # Use several ranges.
+        self._storage._adapter.packundo.pack_delete_range_size = 2
+        self.__check_pack_collects_unreachable_cycle()
+
+    def checkPackReferenceProcessesBrokenPickle(self):
+        self._storage = self.make_storage(pack_reference_processes=2)
+        self.checkPackBrokenPickle()
+
+    def checkReadCurrentConflictDoesNotReserveStoredOIDs(self):
+        # When vote fails because of readCurrent, the OIDs the
+        # transaction stored beyond what we allocated may not have
+        # been reserved in the database, so the retry must do it.
+        storage = self._storage
+        oid = storage.new_oid()
+        revid1 = self._dostoreNP(oid, data=zodb_pickle(MinPO(1)))
+        revid2 = self._dostoreNP(oid, revid=revid1, data=zodb_pickle(MinPO(2)))
+        big_oid_int = bytes8_to_int64(storage.new_oid()) + 1000
+        big_oid = int64_to_8bytes(big_oid_int)
+        oids = storage._oids
+
+        adapter = storage._adapter
+        def lock_objects_and_detect_conflicts(_cursor, _read_current_oids, _min_oid=None):
+            # Like MySQL: report the readCurrent conflict, having
+            # rolled back before reserving the OIDs.
+            return [(bytes8_to_int64(oid), bytes8_to_int64(revid1), None, None)]
+        adapter.lock_objects_and_detect_conflicts = lock_objects_and_detect_conflicts
+        t = TransactionMetaData()
+        try:
+            storage.tpc_begin(t)
+            storage.checkCurrentSerialInTransaction(oid, revid2, t)
+            storage.store(big_oid, z64, zodb_pickle(MinPO(3)), '', t)
+            with self.assertRaises(ReadConflictError):
+                storage.tpc_vote(t)
+            storage.tpc_abort(t)
+        finally:
+            del adapter.lock_objects_and_detect_conflicts
+        self.assertEqual(oids.min_oid_to_set(big_oid_int), big_oid_int)
+
+        t = TransactionMetaData()
+        storage.tpc_begin(t)
+        storage.store(big_oid, z64, zodb_pickle(MinPO(3)), '', t)
+        storage.tpc_vote(t)
+        storage.tpc_finish(t)
+        self.assertIsNone(oids.min_oid_to_set(big_oid_int))
+        self.assertGreater(bytes8_to_int64(storage.new_oid()), big_oid_int)
+
+    def checkPackResume(self):
+        # Once its pre-pack has finished, an interrupted pack can be
+        # finished without repeating it.
+        self.__check_pack_collects_unreachable_cycle(self.__prepack_then_resume)
+
+    def __prepack_then_resume(self, packtime):
+        packundo = self._storage._adapter.packundo
+        self.assertIsNone(packundo.get_pack_progress())
+        self._storage.pack(packtime, referencesf, prepack_only=True)
+        self.assertEqual(packundo.get_pack_progress(), (packtime, 0))
+
+        def pre_pack(*_args):
+            raise AssertionError("Should not pre-pack again")
+        packundo.pre_pack = pre_pack
+        self._storage.pack(None, referencesf, resume=True)
+        self.assertIsNone(packundo.get_pack_progress())
+
+    def __check_pack_collects_unreachable_cycle(self, pack=None):
+        db = self._closing(DB(self._storage))
+        conn = self._closing(db.open())
+        root = conn.root()
+        # A cycle that stays reachable, and one that doesn't.
+        kept1 = root['kept'] = PersistentMapping()
+        kept2 = kept1['other'] = PersistentMapping({'other': kept1})
+        gone1 = root['gone'] = PersistentMapping()
+        gone2 = gone1['other'] = PersistentMapping({'other': gone1})
+        transaction.commit()
+        del root['gone']
+        transaction.commit()
+
+        packtime = self._storage.lastTransactionInt()
+        if pack is None:
+            self._storage.pack(packtime, referencesf)
+        else:
+            pack(packtime)
+
+        for obj in kept1, kept2:
+            self._storage.load(obj._p_oid, '')
+        for obj in gone1, gone2:
+            self.assertRaises(KeyError, self._storage.load, obj._p_oid, '')
+
     def checkPackBrokenPickle(self):
         # Verify the pack stops with the right exception if it encounters
         # a broken pickle.
@@ -1329,6 +1453,75 @@ class GenericRelStorageTests(
         conn.prefetch(z64, mapping)
         self.assertEqual(2, len(self._storage._cache))
 
+    def checkLoadMany(self):
+        db = DB(self._storage)
+        conn = db.open()
+
+        mapping = conn.root()['key'] = PersistentMapping()
+        transaction.commit()
+        oids = [z64, mapping._p_oid]
+        missing_oid = int64_to_8bytes(bytes8_to_int64(mapping._p_oid) + 1000)
+
+        # Use the connection's storage; it has polled.
+        storage = conn._storage
+        expected = {oid: storage.load(oid) for oid in oids}
+        self._storage._cache.clear(load_persistent=False)
+        self.assertEmpty(self._storage._cache)
+
+        loaded = storage.loadMany(oids + [missing_oid])
+        self.assertEqual(loaded, expected)
+        self.assertEqual(2, len(self._storage._cache))
+
+        # Now it all comes from the cache.
+        storage._cache.reset_stats()
+        self.assertEqual(storage.loadMany(oids), expected)
+        self.assertEqual(storage._cache.stats()['hits'], 2)
+        db.close()
+
+    def checkCommitStats(self):
+        db = DB(self._storage)
+        conn = db.open()
+        self._storage.commit_stats.reset()
+
+        conn.root()['key'] = PersistentMapping()
+        transaction.commit()
+
+        # Shared among instances.
+        self.assertIs(conn._storage.commit_stats, self._storage.commit_stats)
+        stats = self._storage.commit_stats.stats()
+        for phase in 'flush_temps', 'lock_objects', 'lock_and_move', 'objects_locked':
+            self.assertEqual(stats[phase]['count'], 1, phase)
+        self.assertNotIn('resolve_conflicts', stats)
+        db.close()
+
+    def checkStreamTemps(self):
+        self._storage = self.make_storage(commit_stream_rows=10)
+        db = DB(self._storage)
+        conn = db.open()
+        self._storage.commit_stats.reset()
+
+        root = conn.root()
+        for i in range(100):
+            root[i] = PersistentMapping({'i': i})
+        transaction.commit()
+
+        stats = self._storage.commit_stats.stats()
+        self.assertGreaterEqual(stats['stream_temps']['count'], 1)
+        self.assertEqual(stats['flush_temps']['count'], 1)
+
+        # Change some of them again, along with objects that were sent.
+        for i in range(0, 100, 3):
+            root[i]['i'] = -i
+        transaction.commit()
+        conn.close()
+
+        conn = db.open()
+        root = conn.root()
+        self.assertEqual([root[i]['i'] for i in range(100)],
+                         [-i if i % 3 == 0 else i for i in range(100)])
+        conn.close()
+        db.close()
+
     ######
     # Parallel Commit Tests
     ######
@@ -85,9 +85,53 @@ class TestTreeMarker(unittest.TestCase):
         obj.mark([5])
         self.assertEqual(set(obj.reachable), set([5, 7, 8 << 32, 9 << 32]))
 
+    def test_refs_out_of_order(self):
+        obj = self._make()
+        obj.add_refs([
+            (9, 13),
+            (5, 7),
+        ])
+        obj.add_refs([
+            (7, 9),
+            (3, 1),
+            (5, 9),
+        ])
+        obj.mark([5])
+        self.assertEqual(set(obj.reachable), set([5, 7, 9, 13]))
+        self.assertEqual(obj.reachable_count, 4)
+
+    def test_pass_count(self):
+        obj = self._make()
+        obj.add_refs([
+            (1, 2),
+            (2, 3),
+        ])
+        self.assertEqual(obj.mark([1]), 4)
+        obj.free_refs()
+        self.assertEqual(sorted(obj.reachable), [1, 2, 3])
+
+
+class TestCSRMarker(TestTreeMarker):
+
+    @property
+    def _class(self):
+        from ..treemark import CSRMarker
+        return CSRMarker
+
+    def test_add_refs_after_mark(self):
+        obj = self._make()
+        obj.add_refs([(1, 2)])
+        obj.mark([1])
+        obj.add_refs([(0, 3), (3, 4)])
+        obj.mark([0])
+        self.assertEqual(sorted(obj.reachable), [0, 1, 2, 3, 4])
+        self.assertEqual(obj.reachable_count, 5)
+
+
 def test_suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(TestTreeMarker))
+    suite.addTest(unittest.makeSuite(TestCSRMarker))
     return suite
 
 if __name__ == '__main__':
@@ -205,6 +205,32 @@ class TestGenerateTIDPG(PostgreSQLAdapterMixin,
             expected_tid_int
         )
 
+class TestReplaceTempsPG(PostgreSQLAdapterMixin,
+                         StorageCreatingMixin,
+                         TestCase,
+                         StorageTestBase.StorageTestBase):
+    # pylint:disable=too-many-ancestors
+
+    def setUp(self):
+        super(TestReplaceTempsPG, self).setUp()
+        self._storage = self._closing(self.make_storage())
+
+    def test_replace_repeatedly(self):
+        # Streaming can send the same object several times before vote.
+        storage = self._storage
+        mover = storage._adapter.mover
+        with storage._store_connection_pool.borrowing() as store_connection:
+            cursor = store_connection.cursor
+            mover.store_temps(cursor, [(b'state 1', 1, 0)])
+            mover.replace_temps(cursor, [(b'state 2', 1, 0)])
+            mover.replace_temps(cursor, [(b'state 3', 1, 0)])
+
+            cursor.execute('SELECT state FROM temp_store WHERE zoid = 1')
+            state, = cursor.fetchone()
+            self.assertEqual(bytes(state), b'state 3')
+            cursor.execute('SELECT COUNT(*) FROM temp_store_replacements')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
 # Timing shows that we spend 6.9s opening database connections to a
 # local PostgreSQL 11 server when using Python 3.7 and psycopg2 2.8
 # during a total test run of 2:27. I had thought that maybe connection
@@ -220,7 +246,7 @@ class PostgreSQLTestSuiteBuilder(AbstractTestSuiteBuilder):
         super(PostgreSQLTestSuiteBuilder, self).__init__(
             drivers,
             PostgreSQLAdapterMixin,
-            extra_test_classes=(TestBlobMerge, TestGenerateTIDPG)
+            extra_test_classes=(TestBlobMerge, TestGenerateTIDPG, TestReplaceTempsPG)
         )
 
     def _compute_large_blob_size(self, use_small_blobs):
@@ -10,7 +10,10 @@ from __future__ import absolute_import
 
 import collections
 import gc
+import heapq
 import logging
+from array import array
+from bisect import bisect_left
 
 import BTrees
 
@@ -19,8 +22,18 @@ from relstorage._compat import iteritems
 IIunion32 = BTrees.family32.II.union # pylint:disable=no-member
 IISet32 = BTrees.family32.II.Set
 IISet64 = BTrees.family64.II.Set
+IITreeSet64 = BTrees.family64.II.TreeSet
+IIdifference64 = BTrees.family64.II.difference # pylint:disable=no-member
 log = logging.getLogger(__name__)
 
+try:
+    array('q')
+except ValueError: # pragma: no cover
+    # Python 2 has no 'q'; 'l' is 64 bits on the platforms we support.
+    INT64_TYPECODE = 'l'
+else:
+    INT64_TYPECODE = 'q'
+
 
 class IISet32X(object):
     """An IISet32 extended with a Python set layer for efficient inserts."""
@@ -165,3 +178,136 @@ class TreeMarker(object):
             for oid_lo in oids_lo:
                 # Decode the OID.
                 yield oid_hi | oid_lo
+
+
+class CSRMarker(object):
+    """
+    Finds all OIDs reachable from a set of root OIDs.
+
+    This has the same interface as :class:`TreeMarker`, but keeps the
+    references in compressed sparse row form: a sorted array of the
+    distinct referring OIDs, an array of offsets, and one array of
+    all the referenced OIDs, grouped by referring OID. Each reference
+    takes 8 bytes, plus 16 bytes per referring OID.
+
+    References are expected to arrive ordered by referring OID, as
+    the ``object_ref`` query used by packing produces them. Those that
+    arrive out of order are kept aside and merged in before marking.
+
+    Marking is a breadth-first search one level at a time: the
+    references of the whole frontier are gathered into an array, and
+    the OIDs not seen before are found and recorded with BTree set
+    operations rather than one OID at a time.
+    """
+
+    def __init__(self):
+        # The distinct referring OIDs, sorted.
+        self._sources = array(INT64_TYPECODE)
+        # _targets[_offsets[i]:_offsets[i + 1]] are referenced by _sources[i].
+        # The final offset is only added by _finish_refs().
+        self._offsets = array(INT64_TYPECODE)
+        self._targets = array(INT64_TYPECODE)
+        # (from_oid, to_oid) pairs that arrived out of order.
+        self._unsorted = []
+        self._refs_finished = False
+        self._reachable = IITreeSet64()
+        self.reachable_count = 0
+
+    def add_refs(self, pairs):
+        """Add a list of (from_oid, to_oid) reference pairs.
+
+        `from_oid` and `to_oid` must be 64 bit integers.
+        """
+        if self._refs_finished:
+            self._unfinish_refs()
+        sources = self._sources
+        offsets = self._offsets
+        targets = self._targets
+        last = sources[-1] if sources else -1
+        for from_oid, to_oid in pairs:
+            if from_oid != last:
+                if from_oid < last:
+                    self._unsorted.append((from_oid, to_oid))
+                    continue
+                last = from_oid
+                sources.append(from_oid)
+                offsets.append(len(targets))
+            targets.append(to_oid)
+
+    def _finish_refs(self):
+        if self._refs_finished:
+            return
+        if self._unsorted:
+            self._merge_unsorted()
+        self._offsets.append(len(self._targets))
+        self._refs_finished = True
+
+    def _unfinish_refs(self):
+        self._offsets.pop()
+        self._refs_finished = False
+
+    @staticmethod
+    def _iter_pairs(sources, offsets, targets):
+        for i, from_oid in enumerate(sources):
+            end = offsets[i + 1] if i + 1 < len(offsets) else len(targets)
+            for to_oid in targets[offsets[i]:end]:
+                yield from_oid, to_oid
+
+    def _merge_unsorted(self):
+        unsorted = self._unsorted
+        unsorted.sort()
+        log.debug("Merging %d out of order reference(s)", len(unsorted))
+        merged = heapq.merge(
+            self._iter_pairs(self._sources, self._offsets, self._targets),
+            unsorted)
+        self._sources = array(INT64_TYPECODE)
+        self._offsets = array(INT64_TYPECODE)
+        self._targets = array(INT64_TYPECODE)
+        self._unsorted = []
+        self.add_refs(merged)
+        assert not self._unsorted
+
+    def mark(self, oids):
+        """Mark specific OIDs and descendants of those OIDs as reachable."""
+        self._finish_refs()
+        sources = self._sources
+        offsets = self._offsets
+        targets = self._targets
+        source_count = len(sources)
+        reachable = self._reachable
+        pass_count = 1
+
+        frontier = IIdifference64(IITreeSet64(oids), reachable)
+        while frontier:
+            found = len(frontier)
+            reachable.update(frontier)
+            self.reachable_count += found
+            log.debug(
+                "Found %d more referenced object(s) in pass %d",
+                found, pass_count)
+
+            # The frontier is sorted, like the sources, so each search
+            # can start where the last one stopped.
+            next_targets = array(INT64_TYPECODE)
+            i = 0
+            for oid in frontier:
+                i = bisect_left(sources, oid, i)
+                if i == source_count:
+                    break
+                if sources[i] == oid:
+                    next_targets.extend(targets[offsets[i]:offsets[i + 1]])
+
+            frontier = IIdifference64(IITreeSet64(next_targets), reachable)
+            pass_count += 1
+
+        return pass_count
+
+    def free_refs(self):
+        """Free the collection of refs to save RAM."""
+        self._sources = self._offsets = self._targets = None
+        self._unsorted = None
+
+    @property
+    def reachable(self):
+        """Iterate over all the reachable OIDs."""
+        return iter(self._reachable)
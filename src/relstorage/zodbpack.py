@@ -60,6 +60,14 @@ def main(argv=None):
         "Requires that a pre-pack has been run, or that packing was aborted "
         "before it was completed.",
     )
+    parser.add_argument(
+        "--resume", dest="resume", default=False,
+        action="store_true",
+        help="If an earlier pack was interrupted after its preparation stage "
+        "finished, finish that pack (skipping what it already removed) instead "
+        "of starting over. Otherwise, pack normally; the preparation stage "
+        "reuses the references it already found. (Only on RelStorage.)",
+    )
     parser.add_argument(
         '--check-refs-only', dest='check_refs', default=False,
         action='store_true',
@@ -88,7 +96,7 @@ def main(argv=None):
         logger.info("Opening %s...", name)
         storage = s.open()
         logger.info("Packing %s.", name)
-        if options.prepack or options.reuse_prepack or options.check_refs:
+        if options.prepack or options.reuse_prepack or options.check_refs or options.resume:
             # TODO: For RelStorages, add options to:
             #
             # - Reset the pre-pack state entirely (pack_object is always reset, but
@@ -100,7 +108,8 @@ def main(argv=None):
                          ZODB.serialize.referencesf,
                          prepack_only=options.prepack,
                          skip_prepack=options.reuse_prepack,
-                         check_refs=options.check_refs)
+                         check_refs=options.check_refs,
+                         resume=options.resume)
         else:
             # Be non-relstorage Storages friendly
             storage.pack(t, ZODB.serialize.referencesf)
@@ -138,28 +138,38 @@ class RelStorageURIResolver(Resolver):
         'read_only',
         'keep_history',
         'pack_gc',
+        'pack_traverse_in_database',
+        'pack_delete_in_database',
         'pack_dry_run',
         'shared_blob_dir',
         'demostorage',
+        'commit_notify',
+        'cache_poll_single_flight',
     )
     _int_args = (
         'cache_local_mb',
         'commit_lock_timeout',
         'commit_lock_id',
+        'cache_prefetch_followers',
+        'cache_local_shards',
+        'commit_stream_rows',
+        'pack_reference_processes',
     )
     _string_args = (
         'name', 'blob_dir', 'replica_conf',
         'cache_module_name', 'cache_prefix',
         'cache_delta_size_limit', 'cache_local_compression',
-        'driver',
+        'cache_local_shared_path', 'driver',
     )
     _bytesize_args = (
         'blob_cache_size', 'blob_cache_size_check',
         'blob_cache_chunk_size',
         'cache_local_object_max',
+        'commit_stream_size',
     )
     _float_args = ('replica_timeout', 'pack_batch_timeout',
-                   'pack_duty_cycle', 'pack_max_delay')
+                   'pack_duty_cycle', 'pack_max_delay',
+                   'cache_local_checkpoint_interval')
     _tuple_args = ('cache_servers',)
 
     def __init__(self, adapter_helper):